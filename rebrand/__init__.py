@@ -0,0 +1,10 @@
+"""Rebrand a RustDesk source checkout (app name, keys, server, icons)."""
+
+__all__ = ['rebrand']
+
+def __getattr__(name):
+    # rebrand.pipeline pulls in the whole engine; import it on first use, not with the CLI
+    if name == 'rebrand':
+        from .pipeline import rebrand
+        return rebrand
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
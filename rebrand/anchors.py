@@ -0,0 +1,69 @@
+"""Anchor index: the lines of a file where its edits can apply, found in one scan.
+
+Every marker a file's line edits look for (replace_line 'find' strings,
+comment_block starts and closing braces) is compiled into a single regex that
+runs once over the raw bytes. Each matching line is recorded as [line index,
+byte offset], and the engine then visits only those lines instead of testing
+every edit against every line.
+
+The index is kept in the file's manifest entry (see state.py), next to the
+size, mtime and SHA-256 of the content it describes, so a later run over an
+unchanged file jumps straight to the edit sites without scanning.
+"""
+
+import functools
+import re
+
+from .state import inputs_key, sha256_bytes
+
+# Start of a line, allowing for a UTF-8 BOM on the first one
+LINE_START = '^(?:\ufeff)?[ \t]*'
+
+def anchor_patterns(edits):
+    """Return the sorted regex sources that find every anchor of edits (toml_set edits have none)."""
+    patterns = set()
+    for edit in edits:
+        op = edit['op']
+        if op == 'replace_line':
+            patterns.add(re.escape(edit['find']))
+        elif op == 'comment_block':
+            patterns.add(LINE_START + re.escape(edit['start']))
+            patterns.add(LINE_START + r'\}[ \t]*\r?$')
+    return sorted(patterns)
+
+@functools.lru_cache(maxsize=None)
+def compile_matcher(patterns):
+    """Compile a tuple of regex sources into one bytes regex matching any of them."""
+    return re.compile(b'|'.join(b'(?:' + pattern.encode('utf-8') + b')' for pattern in patterns), re.MULTILINE)
+
+def scan_anchors(data, patterns):
+    """Return [[line index, byte offset of the first match], ...] for every line of data that matches."""
+    anchors = []
+    if not patterns:
+        return anchors
+    line = 0
+    position = 0
+    for match in compile_matcher(tuple(patterns)).finditer(data):
+        start = match.start()
+        line += data.count(b'\n', position, start)
+        position = start
+        if not anchors or anchors[-1][0] != line:
+            anchors.append([line, start])
+    return anchors
+
+def cached_anchors(entry, data, patterns, mtime_ns):
+    """Return the index stored in a manifest entry if it describes data for these patterns, else None."""
+    if not entry or 'anchors' not in entry or entry.get('patterns') != inputs_key(patterns):
+        return None
+    if entry.get('size') != len(data):
+        return None
+    if entry.get('mtime_ns') != mtime_ns and entry.get('sha256') != sha256_bytes(data):
+        return None
+    return entry['anchors']
+
+def find_anchors(entry, data, patterns, mtime_ns):
+    """Return (anchors, reused): the cached index of data when still valid, else a fresh scan."""
+    anchors = cached_anchors(entry, data, patterns, mtime_ns)
+    if anchors is not None:
+        return anchors, True
+    return scan_anchors(data, patterns), False
@@ -0,0 +1,161 @@
+"""Batch mode: derive one branded tree per brand profile from a single pristine checkout.
+
+Files the rebrand never writes are reflinked or hardlinked from the source, so
+each extra brand costs roughly the size of the files it actually changes.
+"""
+
+import json
+import os
+import shutil
+
+from .downloads import finish_download, sciter_dll_in_background
+from .fileio import copy_file, link_file
+from .package import package_brands
+from .patches import REBRAND_PATCHES
+from .pipeline import GENERATED_FILES, post_update_commands, rebrand
+from .scheduler import schedule_builds
+from .state import STATE_FILE
+from .trace import span
+from .verify import find_artifacts
+
+# Never carried over into brand trees: VCS metadata and cargo build output
+DEFAULT_EXCLUDES = ('.git', 'target')
+
+PROFILE_KEYS = ('app_name', 'pub_key', 'rendezvous_server', 'icon')
+
+def load_profiles(profiles_path):
+    """Load a JSON list of brand profiles.
+
+    Each profile needs app_name, pub_key, rendezvous_server and icon, and may
+    set executable_name, description and name (the output directory; defaults
+    to executable_name, then app_name). Relative icon paths are resolved
+    against the profiles file.
+    """
+    with open(profiles_path, 'r', encoding='utf-8') as file:
+        profiles = json.load(file)
+    if not isinstance(profiles, list):
+        raise ValueError(f"{profiles_path} must contain a JSON list of brand profiles.")
+
+    base = os.path.dirname(os.path.abspath(profiles_path))
+    names = set()
+    for i, profile in enumerate(profiles):
+        missing = [key for key in PROFILE_KEYS if not profile.get(key)]
+        if missing:
+            raise ValueError(f"Brand profile {i + 1} is missing: {', '.join(missing)}")
+        profile['icon'] = os.path.join(base, profile['icon'])
+        profile.setdefault('name', profile.get('executable_name') or profile['app_name'])
+        if profile['name'] in names:
+            raise ValueError(f"Two brand profiles share the output name '{profile['name']}'")
+        names.add(profile['name'])
+    return profiles
+
+def materialized_paths():
+    """Return the relative paths the rebrand writes, which must never be shared with the source."""
+    return {os.path.normpath(path) for path in list(REBRAND_PATCHES) + list(GENERATED_FILES) + [STATE_FILE]}
+
+def derive_tree(source_dir, destination, materialize, link_mode='auto', excludes=DEFAULT_EXCLUDES):
+    """Recreate source_dir at destination, linking every file except those in materialize.
+
+    Returns a {method: file count} summary.
+    """
+    counts = {}
+    for dirpath, dirnames, filenames in os.walk(source_dir):
+        dirnames[:] = [name for name in dirnames if name not in excludes]
+        relative_dir = os.path.relpath(dirpath, source_dir)
+        target_dir = os.path.normpath(os.path.join(destination, relative_dir))
+        os.makedirs(target_dir, exist_ok=True)
+
+        for name in filenames + [name for name in dirnames if os.path.islink(os.path.join(dirpath, name))]:
+            source = os.path.join(dirpath, name)
+            target = os.path.join(target_dir, name)
+            if os.path.islink(source):
+                os.symlink(os.readlink(source), target)
+                method = 'symlink'
+            elif os.path.normpath(os.path.join(relative_dir, name)) in materialize:
+                method = copy_file(source, target)
+            else:
+                method = link_file(source, target, link_mode)
+            counts[method] = counts.get(method, 0) + 1
+        # Symlinked directories were recreated above; do not descend into them
+        dirnames[:] = [name for name in dirnames if not os.path.islink(os.path.join(dirpath, name))]
+    return counts
+
+def rebrand_batch(source_dir, profiles, output_dir, link_mode='auto', jobs=None,
+                  download_sciter=True, overwrite=False, offline=False, sciter_sha256=None,
+                  command=None, inline_sciter=True, build_jobs=None, command_timeout=None,
+                  package_dir=None, package_jobs=None, artifacts=None):
+    """Produce output_dir/<name> for every brand profile, leaving source_dir untouched.
+
+    With a command, every tree is then built by the scheduler (see
+    scheduler.py): inline-sciter.py (unless inline_sciter is False) and the
+    command run in the tree, up to build_jobs brands at a time, logging to
+    output_dir/logs/<name>.log. With a package_dir as well, the artifacts of
+    every brand that built (artifacts: paths relative to the tree, default
+    target/release) are then packaged there (see package.py), up to
+    package_jobs archives at a time.
+
+    Returns (brand tree paths, build summaries), both in profile order.
+    """
+    if not os.path.isdir(source_dir):
+        raise ValueError(f"RustDesk source directory not found: {source_dir}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Fetched once, in the background while the first tree is derived, and linked into every brand tree
+    sciter_dll = None
+    sciter_download = None
+    if download_sciter:
+        sciter_download = sciter_dll_in_background(os.path.join(output_dir, 'sciter.dll'), offline, sciter_sha256)
+
+    materialize = materialized_paths()
+    trees = []
+    for profile in profiles:
+        tree = os.path.join(output_dir, profile['name'])
+        if os.path.exists(tree):
+            if not overwrite:
+                raise FileExistsError(f"Brand tree already exists: {tree} (use overwrite to replace it)")
+            shutil.rmtree(tree)
+
+        with span('derive_tree', brand=profile['name']) as record:
+            counts = derive_tree(source_dir, tree, materialize, link_mode)
+            record.update(counts)
+        summary = ", ".join(f"{count} {method}" for method, count in sorted(counts.items()))
+        print(f"[{profile['name']}] Derived tree {tree}: {summary}")
+
+        if sciter_download:
+            if finish_download(sciter_download):
+                sciter_dll = os.path.join(output_dir, 'sciter.dll')
+            sciter_download = None
+        if sciter_dll:
+            target = os.path.join(tree, 'sciter.dll')
+            if os.path.lexists(target):
+                os.unlink(target)
+            link_file(sciter_dll, target, link_mode)
+
+        rebrand(
+            tree,
+            profile['app_name'],
+            profile['pub_key'],
+            profile['rendezvous_server'],
+            profile['icon'],
+            executable_name=profile.get('executable_name'),
+            description=profile.get('description'),
+            download_sciter=False,
+            inline_sciter=False,
+            jobs=jobs,
+        )
+        trees.append(tree)
+
+    builds = []
+    if command and command.strip():
+        builds = [(profile['name'], tree, post_update_commands(tree, inline_sciter, command))
+                  for profile, tree in zip(profiles, trees)]
+    summaries = schedule_builds(builds, os.path.join(output_dir, 'logs'), build_jobs, command_timeout)
+
+    if package_dir and summaries:
+        built = [(summary['name'], find_artifacts([os.path.join(summary['tree'], path) for path in
+                                                   artifacts or [os.path.join('target', 'release')]]),
+                  round(summary['duration'], 3))
+                 for summary in summaries if summary['returncode'] == 0]
+        if built:
+            package_brands(built, package_dir, package_jobs)
+    return trees, summaries
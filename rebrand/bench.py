@@ -0,0 +1,140 @@
+"""Benchmark harness: time the full rebrand and each step on a synthetic tree, and compare with a baseline.
+
+Every run rebrands a fresh copy of the fixture with an empty cache (icons,
+step cache), so all steps do their full work; it then rebrands the same
+tree again to time the incremental no-op run ('rerun'). Step times come from
+the trace spans of the first rebrand, summed per span name (the 'patch' span
+of every file adds up). The median over all runs is reported.
+
+A baseline is the JSON results of an earlier benchmark. compare_results()
+flags every timing that got slower than the baseline by more than the
+threshold (and by at least MIN_REGRESSION, so tiny steps do not flap).
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from . import trace
+from .fixture import make_fixture
+
+BENCH_VERSION = 1
+MIN_REGRESSION = 0.005  # seconds
+
+BENCH_APP_NAME = 'BenchDesk'
+BENCH_PUB_KEY = 'BenchKey0123456789abcdefghijklmnopqrstuvwxyz='
+BENCH_SERVER = 'rs.bench.example.com'
+
+@contextlib.contextmanager
+def cache_dir_at(path):
+    """Point REBRAND_CACHE_DIR at path for the enclosed block."""
+    previous = os.environ.get('REBRAND_CACHE_DIR')
+    os.environ['REBRAND_CACHE_DIR'] = path
+    try:
+        yield
+    finally:
+        if previous is None:
+            del os.environ['REBRAND_CACHE_DIR']
+        else:
+            os.environ['REBRAND_CACHE_DIR'] = previous
+
+def step_timings():
+    """Return {span name: total seconds} for the spans recorded since the last trace.reset()."""
+    timings = {}
+    for record in trace.recorded_spans():
+        timings[record['name']] = timings.get(record['name'], 0.0) + record['duration_us'] / 1e6
+    return timings
+
+def bench_once(pristine, tree, cache, jobs=None):
+    """Rebrand a copy of pristine at tree twice. Returns {timing name: seconds} for this run."""
+    from .pipeline import rebrand
+
+    shutil.copytree(pristine, tree)
+    icon = os.path.join(tree, 'res', 'icon.png')
+    timings = {}
+    with cache_dir_at(cache), contextlib.redirect_stdout(io.StringIO()):
+        for name in ('total', 'rerun'):
+            trace.reset()
+            started = time.perf_counter()
+            rebrand(tree, BENCH_APP_NAME, BENCH_PUB_KEY, BENCH_SERVER, icon, download_sciter=False,
+                    jobs=jobs, rename={'RustDesk': BENCH_APP_NAME})
+            timings[name] = time.perf_counter() - started
+            if name == 'total':
+                timings.update(step_timings())
+    trace.reset()
+    return timings
+
+def run_benchmark(runs=3, scale=1, jobs=None, **knobs):
+    """Benchmark runs rebrands of a fixture built with scale and knobs (see fixture.make_fixture).
+
+    Returns the results dict: the fixture knobs, the number of runs and the
+    median seconds of every timing.
+    """
+    with trace.recording(), tempfile.TemporaryDirectory(prefix='rebrand-bench-') as temp:
+        pristine = os.path.join(temp, 'pristine')
+        started = time.perf_counter()
+        knobs = make_fixture(pristine, scale, **knobs)
+        print(f"Generated fixture in {time.perf_counter() - started:.2f}s: "
+              + ", ".join(f"{name}={value}" for name, value in knobs.items()))
+
+        samples = {}
+        for run in range(runs):
+            timings = bench_once(pristine, os.path.join(temp, f'run{run}'), os.path.join(temp, f'cache{run}'), jobs)
+            print(f"Run {run + 1}/{runs}: {timings['total']:.3f}s (rerun {timings['rerun']:.3f}s)")
+            for name, seconds in timings.items():
+                samples.setdefault(name, []).append(seconds)
+
+    return {
+        'version': BENCH_VERSION,
+        'knobs': knobs,
+        'runs': runs,
+        'timings': {name: statistics.median(values) for name, values in samples.items()},
+    }
+
+def load_results(path):
+    """Load benchmark results saved with save_results()."""
+    with open(path, 'r', encoding='utf-8') as file:
+        results = json.load(file)
+    if not isinstance(results, dict) or results.get('version') != BENCH_VERSION:
+        raise ValueError(f"{path} is not a benchmark baseline of version {BENCH_VERSION}")
+    return results
+
+def save_results(path, results):
+    """Write benchmark results to path as JSON."""
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+        file.write('\n')
+    print(f"Saved baseline to {path}")
+
+def compare_results(results, baseline, threshold):
+    """Print every timing next to its baseline. Returns the names of the timings that regressed.
+
+    A timing regressed if it is more than threshold (a fraction, 0.2 = 20%)
+    and MIN_REGRESSION seconds slower than in the baseline.
+    """
+    if results['knobs'] != baseline['knobs']:
+        raise ValueError("The baseline was recorded on a fixture with different sizes; use the same --scale and sizes")
+    regressions = []
+    print(f"{'timing':<16} {'now':>10} {'baseline':>10} {'change':>8}")
+    for name, seconds in results['timings'].items():
+        before = baseline['timings'].get(name)
+        if before is None:
+            print(f"{name:<16} {seconds * 1000:8.1f}ms {'-':>10} {'new':>8}")
+            continue
+        change = (seconds - before) / before if before else 0.0
+        regressed = change > threshold and seconds - before >= MIN_REGRESSION
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<16} {seconds * 1000:8.1f}ms {before * 1000:8.1f}ms {change:+8.0%}"
+              + ("  REGRESSION" if regressed else ""))
+    return regressions
+
+def print_results(results):
+    """Print the median timings of a benchmark."""
+    for name, seconds in results['timings'].items():
+        print(f"{name:<16} {seconds * 1000:8.1f}ms")
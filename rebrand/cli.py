@@ -0,0 +1,402 @@
+"""Command line entry point: python -m rebrand <command> ..."""
+
+import argparse
+import os
+
+def positive_int(value):
+    """argparse type for integers >= 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {value}")
+    return number
+
+def replacement(value):
+    """argparse type for OLD=NEW string replacements."""
+    old, separator, new = value.partition('=')
+    if not separator or not old:
+        raise argparse.ArgumentTypeError(f"expected OLD=NEW: {value}")
+    return old, new
+
+def add_brand_arguments(parser):
+    """Add the source and brand profile options shared by 'run' and 'compile'."""
+    parser.add_argument('--source', required=True, help="RustDesk source directory")
+    parser.add_argument('--app-name', required=True, help="New application name")
+    parser.add_argument('--pub-key', required=True, help="Public key of your server (id_ed25519.pub)")
+    parser.add_argument('--rendezvous-server', required=True, help="Custom ID/rendezvous server")
+    parser.add_argument('--icon', required=True, help="Icon PNG image")
+    parser.add_argument('--executable-name', help="New executable name (without .exe)")
+    parser.add_argument('--description', help="New description AKA RustDesk Remote Desktop")
+
+def add_rename_arguments(parser):
+    """Add the string rename options shared by 'run' and 'compile'."""
+    parser.add_argument('--rename-strings', action='store_true',
+                        help="Replace 'RustDesk' with the app name in src/lang, res/ and flutter/ files")
+    parser.add_argument('--rename', action='append', type=replacement, default=[], metavar='OLD=NEW',
+                        help="Also replace OLD with NEW across those files (repeatable)")
+    parser.add_argument('--rename-glob', action='append', metavar='GLOB',
+                        help="Files to rename strings in, relative to the source (repeatable; replaces the defaults)")
+
+def renames(args):
+    """Return the {old: new} string renames given on the command line."""
+    rename = dict(args.rename)
+    if args.rename_strings:
+        rename.setdefault('RustDesk', args.app_name.strip())
+    return rename
+
+def add_download_arguments(parser):
+    """Add the download cache options shared by 'run' and 'batch'."""
+    parser.add_argument('--offline', action='store_true', help="Serve sciter.dll from the download cache only")
+    parser.add_argument('--sciter-sha256', help="Expected SHA-256 of sciter.dll; a download that does not match fails")
+
+def add_trace_arguments(parser):
+    """Add the instrumentation options shared by 'run' and 'batch'."""
+    parser.add_argument('--trace', metavar='FILE',
+                        help="Record timing spans of every step to FILE (.jsonl: JSON lines, else Chrome trace format)")
+    parser.add_argument('--debug', action='store_true', help="Print verbose diagnostics, e.g. a diff of every patched file")
+
+def add_fixture_arguments(parser):
+    """Add the synthetic fixture size options shared by 'fixture' and 'bench'."""
+    parser.add_argument('--scale', type=float, default=1, help="Multiply every size below by this factor (default: 1)")
+    parser.add_argument('--lang-files', type=positive_int, help="Language files under src/lang (default: 50)")
+    parser.add_argument('--lang-entries', type=positive_int, help="Translations per language file (default: 400)")
+    parser.add_argument('--ui-lines', type=positive_int, help="Lines of src/ui.rs besides the icon literals (default: 1000)")
+    parser.add_argument('--icon-bytes', type=positive_int, help="Decoded size of each base64 icon literal (default: 6000)")
+    parser.add_argument('--flutter-files', type=positive_int, help="Extra Dart files under flutter/lib (default: 200)")
+    parser.add_argument('--flutter-lines', type=positive_int, help="Lines per Dart file (default: 150)")
+    parser.add_argument('--ui-files', type=positive_int, help="UI resources under src/ui (default: 20)")
+
+def fixture_knobs(args):
+    """Return the fixture knobs given on the command line."""
+    names = ('lang_files', 'lang_entries', 'ui_lines', 'icon_bytes', 'flutter_files', 'flutter_lines', 'ui_files')
+    return {name: getattr(args, name) for name in names if getattr(args, name) is not None}
+
+def build_parser():
+    """Build the argument parser for the rebrand command line."""
+    parser = argparse.ArgumentParser(prog='rebrand', description="Rebrand a RustDesk source checkout.")
+    subparsers = parser.add_subparsers(dest='command_name', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Apply the rebrand steps to a RustDesk source directory.")
+    add_brand_arguments(run_parser)
+    run_parser.add_argument('--command', help="Command to run after updates, e.g. 'cargo build --release'")
+    run_parser.add_argument('--timeout', type=float, help="Stop inline-sciter.py or the command after this many seconds")
+    run_parser.add_argument('--no-sciter', action='store_true', help="Do not download sciter.dll")
+    run_parser.add_argument('--no-inline-sciter', action='store_true', help="Do not run res/inline-sciter.py")
+    run_parser.add_argument('--jobs', type=positive_int, help="Files to patch in parallel (default: automatic, 1 = sequential)")
+    add_rename_arguments(run_parser)
+    add_download_arguments(run_parser)
+    run_parser.add_argument('--force', action='store_true', help="Re-apply every step, ignoring .rebrand-state.json")
+    run_parser.add_argument('--dry-run', action='store_true',
+                            help="Print the changes as unified diffs without writing, downloading or running anything")
+    add_trace_arguments(run_parser)
+    run_parser.set_defaults(func=cmd_run)
+
+    batch_parser = subparsers.add_parser('batch', help="Derive one branded tree per brand profile from a pristine source.")
+    batch_parser.add_argument('--source', required=True, help="Pristine RustDesk source directory (left untouched)")
+    batch_parser.add_argument('--profiles', required=True, help="JSON file with a list of brand profiles")
+    batch_parser.add_argument('--output', required=True, help="Directory that receives one tree per brand")
+    batch_parser.add_argument('--link-mode', choices=['auto', 'reflink', 'hardlink', 'copy'], default='auto',
+                              help="How unpatched files are shared with the source (default: auto)")
+    batch_parser.add_argument('--jobs', type=positive_int, help="Files to patch in parallel per brand")
+    batch_parser.add_argument('--command', help="Build command to run in every brand tree, e.g. 'cargo build --release'")
+    batch_parser.add_argument('--build-jobs', type=positive_int,
+                              help="Brands to build at once (default: from CPU count and available memory)")
+    batch_parser.add_argument('--timeout', type=float, help="Stop inline-sciter.py or the command after this many seconds")
+    batch_parser.add_argument('--no-sciter', action='store_true', help="Do not download sciter.dll")
+    batch_parser.add_argument('--no-inline-sciter', action='store_true', help="Do not run res/inline-sciter.py before the build")
+    batch_parser.add_argument('--package', metavar='DIR',
+                              help="After the builds, package the artifacts of every brand that built into DIR")
+    batch_parser.add_argument('--package-jobs', type=positive_int, help="Archives to write in parallel (default: one per CPU)")
+    batch_parser.add_argument('--artifact', action='append', metavar='PATH',
+                              help="With --package: built file or directory to package, relative to each brand tree "
+                                   "(repeatable, default: target/release)")
+    add_download_arguments(batch_parser)
+    batch_parser.add_argument('--overwrite', action='store_true', help="Replace brand trees that already exist")
+    add_trace_arguments(batch_parser)
+    batch_parser.set_defaults(func=cmd_batch)
+
+    doctor_parser = subparsers.add_parser('doctor', help="Check that the optional dependencies are installed.")
+    doctor_parser.add_argument('--install', action='store_true', help="pip install any missing packages")
+    doctor_parser.set_defaults(func=cmd_doctor)
+
+    startup_parser = subparsers.add_parser('startup-bench', help="Fail if cold start of the CLI or GUI module is over budget.")
+    startup_parser.add_argument('--budget', type=float, default=0.1, help="Allowed import overhead in seconds (default: 0.1)")
+    startup_parser.add_argument('--runs', type=int, default=5, help="Runs per module; the median is used (default: 5)")
+    startup_parser.set_defaults(func=cmd_startup_bench)
+
+    compile_parser = subparsers.add_parser('compile', help="Compile the file changes of a rebrand into a patch plan.")
+    add_brand_arguments(compile_parser)
+    compile_parser.add_argument('--jobs', type=positive_int, help="Files to patch in parallel")
+    add_rename_arguments(compile_parser)
+    compile_parser.add_argument('--output', required=True, help="Plan file to write")
+    compile_parser.set_defaults(func=cmd_compile)
+
+    apply_parser = subparsers.add_parser('apply', help="Apply a compiled patch plan to a source directory.")
+    apply_parser.add_argument('--plan', required=True, help="Plan file written by 'compile'")
+    apply_parser.add_argument('--target', required=True, help="RustDesk source directory at the revision the plan was compiled from")
+    apply_parser.add_argument('--dry-run', action='store_true', help="Print the changes as unified diffs without writing")
+    apply_parser.set_defaults(func=cmd_apply)
+
+    upgrade_parser = subparsers.add_parser('upgrade', help="Merge the branding of an old release onto a new RustDesk release.")
+    upgrade_parser.add_argument('--old', required=True, help="Pristine source of the old release (directory or git checkout)")
+    upgrade_parser.add_argument('--branded', required=True, help="Branded tree of the old release")
+    upgrade_parser.add_argument('--new', required=True, help="Pristine source of the new release (directory or git checkout)")
+    upgrade_parser.add_argument('--output', required=True, help="Directory that receives the branded new release")
+    upgrade_parser.add_argument('--link-mode', choices=['auto', 'reflink', 'hardlink', 'copy'], default='auto',
+                                help="How files are shared with the new release (default: auto)")
+    upgrade_parser.add_argument('--overwrite', action='store_true', help="Replace the output directory if it exists")
+    upgrade_parser.set_defaults(func=cmd_upgrade)
+
+    verify_parser = subparsers.add_parser('verify', help="Check that built binaries carry the branding and no upstream defaults.")
+    verify_parser.add_argument('--artifact', action='append', metavar='PATH',
+                               help="Built file, or directory of built files, to scan (repeatable; with --profiles "
+                                    "relative to each brand tree, default: target/release)")
+    verify_parser.add_argument('--app-name', help="Application name the build must contain")
+    verify_parser.add_argument('--pub-key', help="Public key the build must contain")
+    verify_parser.add_argument('--rendezvous-server', help="Rendezvous server the build must contain")
+    verify_parser.add_argument('--profiles', help="Verify every brand of a batch instead: its JSON profiles file")
+    verify_parser.add_argument('--output', help="With --profiles: the batch output directory holding the brand trees")
+    verify_parser.add_argument('--resource', choices=['auto', 'flutter', 'cargo'], default='auto',
+                               help="Where the build took its version resource from: Runner.rc (flutter) or "
+                                    "Cargo.toml winres metadata (cargo); auto guesses from the artifact paths")
+    verify_parser.add_argument('--jobs', type=positive_int, help="Worker processes (default: one per CPU)")
+    verify_parser.set_defaults(func=cmd_verify)
+
+    package_parser = subparsers.add_parser('package', help="Zip the built artifacts of every brand into a release directory.")
+    package_parser.add_argument('--profiles', required=True, help="JSON file with the brand profiles of the batch")
+    package_parser.add_argument('--output', required=True, help="The batch output directory holding the brand trees")
+    package_parser.add_argument('--release', required=True, help="Directory that receives the archives and manifest.json")
+    package_parser.add_argument('--artifact', action='append', metavar='PATH',
+                                help="Built file or directory to package, relative to each brand tree "
+                                     "(repeatable, default: target/release)")
+    package_parser.add_argument('--jobs', type=positive_int, help="Archives to write in parallel (default: one per CPU)")
+    package_parser.set_defaults(func=cmd_package)
+
+    watch_parser = subparsers.add_parser('watch', help="Brand a source directory and re-apply the branding whenever a branded file changes.")
+    add_brand_arguments(watch_parser)
+    watch_parser.add_argument('--jobs', type=positive_int, help="Files to patch in parallel (default: automatic, 1 = sequential)")
+    watch_parser.add_argument('--debounce', type=float, default=0.2,
+                              help="Seconds without new changes before re-applying (default: 0.2)")
+    watch_parser.add_argument('--poll-interval', type=float, default=0.5,
+                              help="Seconds between checks when polling (default: 0.5)")
+    watch_parser.add_argument('--polling', action='store_true', help="Poll file stats instead of using inotify")
+    watch_parser.set_defaults(func=cmd_watch)
+
+    fixture_parser = subparsers.add_parser('fixture', help="Write a synthetic RustDesk-shaped source tree.")
+    fixture_parser.add_argument('--output', required=True, help="Directory to create (must not exist)")
+    add_fixture_arguments(fixture_parser)
+    fixture_parser.add_argument('--binary-size', type=positive_int, metavar='MIB',
+                                help="Also write an unbranded stand-in build, target/release/rustdesk.exe, of this size")
+    fixture_parser.set_defaults(func=cmd_fixture)
+
+    bench_parser = subparsers.add_parser('bench', help="Time the rebrand and each step on a synthetic tree.")
+    bench_parser.add_argument('--runs', type=positive_int, default=3, help="Runs; the median is used (default: 3)")
+    bench_parser.add_argument('--jobs', type=positive_int, help="Files to patch in parallel")
+    bench_parser.add_argument('--baseline', metavar='FILE', help="Compare with the results saved in FILE")
+    bench_parser.add_argument('--save-baseline', action='store_true', help="Write the results to the --baseline file")
+    bench_parser.add_argument('--threshold', type=float, default=0.2,
+                              help="Slowdown against the baseline that fails the benchmark (default: 0.2 = 20%%)")
+    add_fixture_arguments(bench_parser)
+    bench_parser.set_defaults(func=cmd_bench)
+
+    return parser
+
+def cmd_run(args):
+    """Handle the 'run' command."""
+    from .pipeline import rebrand
+
+    results = rebrand(
+        args.source,
+        args.app_name,
+        args.pub_key,
+        args.rendezvous_server,
+        args.icon,
+        executable_name=args.executable_name,
+        description=args.description,
+        command=args.command,
+        download_sciter=not args.no_sciter,
+        inline_sciter=not args.no_inline_sciter,
+        jobs=args.jobs,
+        force=args.force,
+        offline=args.offline,
+        sciter_sha256=args.sciter_sha256,
+        rename=renames(args),
+        rename_globs=args.rename_glob,
+        command_timeout=args.timeout,
+        dry_run=args.dry_run,
+    )
+    return 0 if all(result['returncode'] == 0 for result in results) else 1
+
+def cmd_compile(args):
+    """Handle the 'compile' command."""
+    from .plan import compile_plan, save_plan
+
+    plan = compile_plan(
+        args.source,
+        args.app_name,
+        args.pub_key,
+        args.rendezvous_server,
+        args.icon,
+        executable_name=args.executable_name,
+        description=args.description,
+        jobs=args.jobs,
+        rename=renames(args),
+        rename_globs=args.rename_glob,
+    )
+    save_plan(args.output, plan)
+    return 0
+
+def cmd_apply(args):
+    """Handle the 'apply' command."""
+    from .plan import apply_plan, load_plan
+
+    apply_plan(load_plan(args.plan), args.target, dry_run=args.dry_run)
+    return 0
+
+def cmd_batch(args):
+    """Handle the 'batch' command."""
+    from .batch import load_profiles, rebrand_batch
+
+    trees, summaries = rebrand_batch(
+        args.source,
+        load_profiles(args.profiles),
+        args.output,
+        link_mode=args.link_mode,
+        jobs=args.jobs,
+        download_sciter=not args.no_sciter,
+        overwrite=args.overwrite,
+        offline=args.offline,
+        sciter_sha256=args.sciter_sha256,
+        command=args.command,
+        inline_sciter=not args.no_inline_sciter,
+        build_jobs=args.build_jobs,
+        command_timeout=args.timeout,
+        package_dir=args.package,
+        package_jobs=args.package_jobs,
+        artifacts=args.artifact,
+    )
+    return 0 if all(summary['returncode'] == 0 for summary in summaries) else 1
+
+def cmd_doctor(args):
+    """Handle the 'doctor' command."""
+    from .doctor import check_dependencies
+
+    return 0 if check_dependencies(install_missing=args.install) else 1
+
+def cmd_startup_bench(args):
+    """Handle the 'startup-bench' command."""
+    from .doctor import check_startup
+
+    return 0 if check_startup(args.budget, args.runs) else 1
+
+def cmd_upgrade(args):
+    """Handle the 'upgrade' command."""
+    from .upgrade import upgrade
+
+    conflicted = upgrade(args.old, args.branded, args.new, args.output, args.link_mode, args.overwrite)
+    return 1 if conflicted else 0
+
+def cmd_verify(args):
+    """Handle the 'verify' command."""
+    from .batch import load_profiles
+    from .verify import find_artifacts, resource_source, verify
+
+    source = None if args.resource == 'auto' else args.resource
+    if args.profiles:
+        if not args.output:
+            raise ValueError("--profiles needs --output, the batch output directory")
+        relative_paths = args.artifact or [os.path.join('target', 'release')]
+        source = source or resource_source(relative_paths)  # Judged inside the brand tree
+        brands = []
+        for profile in load_profiles(args.profiles):
+            tree = os.path.join(args.output, profile['name'])
+            paths = [os.path.join(tree, path) for path in relative_paths]
+            brands.append((profile['name'], profile, find_artifacts(paths)))
+    else:
+        if not (args.app_name and args.pub_key and args.rendezvous_server and args.artifact):
+            raise ValueError("verify needs --artifact, --app-name, --pub-key and --rendezvous-server (or --profiles)")
+        profile = {'app_name': args.app_name.strip(), 'pub_key': args.pub_key.strip(),
+                   'rendezvous_server': args.rendezvous_server.strip()}
+        brands = [(profile['app_name'], profile, find_artifacts(args.artifact))]
+    return 0 if verify(brands, args.jobs, source) else 1
+
+def cmd_package(args):
+    """Handle the 'package' command."""
+    from .batch import load_profiles
+    from .package import package_brands
+    from .verify import find_artifacts
+
+    brands = []
+    for profile in load_profiles(args.profiles):
+        tree = os.path.join(args.output, profile['name'])
+        paths = [os.path.join(tree, path) for path in args.artifact or [os.path.join('target', 'release')]]
+        brands.append((profile['name'], find_artifacts(paths), None))
+    package_brands(brands, args.release, args.jobs)
+    return 0
+
+def cmd_watch(args):
+    """Handle the 'watch' command."""
+    from .watch import watch
+
+    watch(args.source, args.app_name, args.pub_key, args.rendezvous_server, args.icon,
+          args.executable_name, args.description, args.jobs, args.debounce, args.poll_interval, args.polling)
+    return 0
+
+def cmd_fixture(args):
+    """Handle the 'fixture' command."""
+    from .fixture import make_fixture
+
+    if os.path.exists(args.output):
+        raise ValueError(f"Output already exists: {args.output}")
+    knobs = make_fixture(args.output, args.scale, **fixture_knobs(args))
+    print(f"Wrote fixture to {args.output}: " + ", ".join(f"{name}={value}" for name, value in knobs.items()))
+    if args.binary_size:
+        from .fixture import fake_binary, upstream_binary_strings
+
+        binary = os.path.join(args.output, 'target', 'release', 'rustdesk.exe')
+        os.makedirs(os.path.dirname(binary))
+        fake_binary(binary, args.binary_size << 20, upstream_binary_strings())
+        print(f"Wrote {binary} ({args.binary_size} MiB)")
+    return 0
+
+def cmd_bench(args):
+    """Handle the 'bench' command."""
+    from .bench import compare_results, load_results, print_results, run_benchmark, save_results
+    from .fixture import resolve_knobs
+
+    if args.save_baseline and not args.baseline:
+        raise ValueError("--save-baseline needs --baseline FILE")
+    baseline = load_results(args.baseline) if args.baseline and not args.save_baseline else None
+    if baseline and baseline['knobs'] != resolve_knobs(args.scale, **fixture_knobs(args)):
+        raise ValueError("The baseline was recorded on a fixture with different sizes; use the same --scale and sizes")
+    results = run_benchmark(args.runs, args.scale, args.jobs, **fixture_knobs(args))
+    if not baseline:
+        print_results(results)
+        if args.save_baseline:
+            save_results(args.baseline, results)
+        return 0
+    regressions = compare_results(results, baseline, args.threshold)
+    if regressions:
+        print(f"Slower than the baseline by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+def main(argv=None):
+    """Parse argv and dispatch to the selected command. Returns the exit code."""
+    args = build_parser().parse_args(argv)
+    if getattr(args, 'trace', None) or getattr(args, 'debug', False):
+        from . import trace
+
+        trace.set_debug(args.debug)
+        if args.trace:
+            trace.enable()
+    try:
+        return args.func(args)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}")
+        return 1
+    except ImportError as e:
+        print(f"Error: {e}. Run 'python -m rebrand doctor' to check dependencies.")
+        return 1
+    finally:
+        if getattr(args, 'trace', None):
+            trace.export(args.trace)
@@ -0,0 +1,85 @@
+"""Environment checks: optional dependencies and cold-start time."""
+
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Packages needed by some steps, as (import name, pip name, what needs it)
+required_packages = [
+    ('requests', 'requests', "downloading sciter.dll"),
+    ('PIL', 'Pillow', "icon conversion"),
+    ('ttkthemes', 'ttkthemes', "the InfiniteRemote GUI"),
+]
+
+# Modules that must import fast; none of them may pull in PIL/requests/tkinter at import time
+STARTUP_MODULES = ['rebrand.cli', 'InfiniteRemote']
+
+# Modules the startup modules must leave to the commands that need them
+DEFERRED_MODULES = ['rebrand.pipeline']
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def install(package):
+    """Function to install package using pip."""
+    subprocess.check_call([sys.executable, '-m', 'pip', 'install', package])
+
+def missing_packages():
+    """Return the (import name, pip name, purpose) entries that cannot be imported."""
+    return [entry for entry in required_packages if importlib.util.find_spec(entry[0]) is None]
+
+def check_dependencies(install_missing=False):
+    """Report missing optional packages, installing them if asked. Returns True when all are present."""
+    missing = missing_packages()
+    for import_name, pip_name, purpose in required_packages:
+        state = "missing" if (import_name, pip_name, purpose) in missing else "ok"
+        print(f"{pip_name:<10} {state:<8} (needed for {purpose})")
+
+    if missing and install_missing:
+        for _, pip_name, _ in missing:
+            print(f"{pip_name} is not installed. Installing...")
+            install(pip_name)
+        missing = missing_packages()
+
+    if missing:
+        print("Run 'python -m rebrand doctor --install' to install the missing packages.")
+    return not missing
+
+def measure_startup(module, runs=5):
+    """Return the median wall time in seconds to start a fresh interpreter and import module."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', f'import {module}'], cwd=REPO_DIR, check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def eager_imports(module):
+    """Return the DEFERRED_MODULES that a fresh interpreter has loaded after importing module."""
+    code = f'import sys, {module}; print(*[name for name in {DEFERRED_MODULES!r} if name in sys.modules])'
+    result = subprocess.run([sys.executable, '-c', code], cwd=REPO_DIR, check=True, capture_output=True, text=True)
+    return result.stdout.split()
+
+def check_startup(budget, runs=5):
+    """Time a cold import of each startup module against the bare interpreter.
+
+    Returns False if any module's import overhead exceeds budget seconds, or
+    if importing it loads one of DEFERRED_MODULES.
+    """
+    baseline = measure_startup('sys', runs)
+    print(f"{'interpreter':<16} {baseline * 1000:8.1f} ms")
+
+    within_budget = True
+    for module in STARTUP_MODULES:
+        overhead = max(measure_startup(module, runs) - baseline, 0.0)
+        state = "ok" if overhead <= budget else "OVER BUDGET"
+        print(f"{module:<16} {overhead * 1000:8.1f} ms  (budget {budget * 1000:.0f} ms) {state}")
+        if overhead > budget:
+            within_budget = False
+        eager = eager_imports(module)
+        if eager:
+            print(f"{'':<16} imports {', '.join(eager)} at startup")
+            within_budget = False
+    return within_budget
@@ -0,0 +1,263 @@
+"""Shared on-disk download cache.
+
+Bodies are stored once per content hash under <cache>/objects/<sha256>, and
+<cache>/urls/<sha256 of url>.json remembers which object a URL last served
+together with its ETag and Last-Modified. A cached URL is revalidated with a
+conditional request, so an unchanged file costs one 304 instead of a full
+transfer. Bodies are streamed to a partial file and renamed into place; a
+transfer that drops is resumed with an HTTP Range request (guarded by If-Range)
+instead of starting over. A partial body that cannot be resumed (no validator,
+already as long as the whole body, or refused with 416) is dropped and the
+transfer starts over.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .fileio import remove_quietly, replace_file, replace_with_copy
+from .trace import span
+
+SCITER_DLL_URL = os.environ.get("REBRAND_SCITER_URL") or "https://raw.githubusercontent.com/c-smile/sciter-sdk/master/bin.win/x64/sciter.dll"
+
+# Expected SHA-256 of sciter.dll. None accepts whatever the URL serves; set it
+# (or pass --sciter-sha256 / REBRAND_SCITER_SHA256) to pin a known build.
+SCITER_DLL_SHA256 = os.environ.get('REBRAND_SCITER_SHA256') or None
+
+CHUNK_SIZE = 1 << 16
+TIMEOUT = 60
+RETRIES = 3
+
+session = None
+session_lock = threading.Lock()
+
+class DownloadError(Exception):
+    """Raised when a file can be neither downloaded nor served from the cache."""
+
+def cache_dir():
+    """Return the download cache directory (REBRAND_CACHE_DIR, else the user cache dir)."""
+    if os.environ.get('REBRAND_CACHE_DIR'):
+        return os.environ['REBRAND_CACHE_DIR']
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'rebrand')
+
+def get_session():
+    """Return the shared requests.Session, creating it on first use."""
+    global session
+    with session_lock:
+        if session is None:
+            import requests
+
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        return session
+
+def url_meta_path(cache, url):
+    """Return the path of the metadata file for url."""
+    return os.path.join(cache, 'urls', hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+def object_path(cache, sha256):
+    """Return the path of the cached body with this hash."""
+    return os.path.join(cache, 'objects', sha256)
+
+def load_url_meta(cache, url):
+    """Return the cached metadata for url, or None if it has none (or its object is gone)."""
+    try:
+        with open(url_meta_path(cache, url), 'r', encoding='utf-8') as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if meta.get('url') != url or not os.path.isfile(object_path(cache, meta.get('sha256', ''))):
+        return None
+    return meta
+
+def save_url_meta(cache, url, meta):
+    """Record meta as the latest metadata for url."""
+    os.makedirs(os.path.join(cache, 'urls'), exist_ok=True)
+    replace_file(url_meta_path(cache, url), json.dumps(meta, indent=2, sort_keys=True).encode('utf-8'))
+
+def partial_path(cache, url):
+    """Return where an interrupted download of url is kept until it can be resumed."""
+    return os.path.join(cache, 'objects', '.partial-' + hashlib.sha256(url.encode('utf-8')).hexdigest())
+
+def load_partial_meta(partial):
+    """Return the metadata of the partial body: its 'validator' (ETag or Last-Modified) and full 'size', if known."""
+    try:
+        with open(partial + '.json', 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def remove_partial(partial):
+    """Delete a partial body and its metadata, so the next transfer starts over."""
+    remove_quietly(partial)
+    remove_quietly(partial + '.json')
+
+def hash_file_into(digest, path):
+    """Feed the contents of path into digest."""
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+
+def transfer(cache, url, meta, expected_sha256=None):
+    """Make one request for url, resuming a partial body with a Range request if there is one.
+
+    Returns (outcome, meta). The partial body survives a dropped connection.
+    """
+    partial = partial_path(cache, url)
+    os.makedirs(os.path.dirname(partial), exist_ok=True)
+    headers = {}
+    offset = 0
+    if meta:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    else:
+        offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+        partial_meta = load_partial_meta(partial)
+        size = partial_meta.get('size')
+        if offset and partial_meta.get('validator') and (size is None or offset < size):
+            headers['Range'] = f'bytes={offset}-'
+            headers['If-Range'] = partial_meta['validator']
+        elif offset:
+            remove_partial(partial)  # Cannot be resumed; start over
+            offset = 0
+
+    with get_session().get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+        if response.status_code == 304 and meta:
+            return 'revalidated', meta
+        if response.status_code == 416 and 'Range' in headers:
+            # The partial body is as long as (or longer than) the file now is
+            remove_partial(partial)
+            return transfer(cache, url, meta, expected_sha256)
+        response.raise_for_status()
+
+        digest = hashlib.sha256()
+        resumed = response.status_code == 206
+        if resumed and not response.headers.get('Content-Range', '').startswith(f'bytes {offset}-'):
+            remove_partial(partial)
+            raise DownloadError(f"Server answered the resume of {url} with an unexpected range; starting over")
+        if resumed:
+            hash_file_into(digest, partial)
+        else:
+            validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+            length = response.headers.get('Content-Length', '')
+            # The body is stored decoded, so a Content-Length of an encoded body says nothing about its size
+            size = int(length) if length.isdigit() and not response.headers.get('Content-Encoding') else None
+            replace_file(partial + '.json', json.dumps({'url': url, 'validator': validator, 'size': size}).encode('utf-8'))
+
+        with open(partial, 'ab' if resumed else 'wb') as file:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                digest.update(chunk)
+                file.write(chunk)
+
+        sha256 = digest.hexdigest()
+        if expected_sha256 and sha256 != expected_sha256.lower():
+            remove_partial(partial)
+            raise DownloadError(f"Checksum mismatch for {url}: expected {expected_sha256}, got {sha256}")
+        os.replace(partial, object_path(cache, sha256))
+        os.unlink(partial + '.json')
+
+        meta = {
+            'url': url,
+            'sha256': sha256,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'size': os.path.getsize(object_path(cache, sha256)),
+        }
+        save_url_meta(cache, url, meta)
+        return ('resumed' if resumed else 'downloaded'), meta
+
+def fetch(url, destination=None, expected_sha256=None, offline=False, cache=None, log=print):
+    """Bring the body of url into the download cache and place a copy at destination (if given).
+
+    offline serves only from the cache. expected_sha256 pins the content.
+    Dropped connections are retried, resuming where the transfer stopped.
+    Returns (outcome, path of the cached body); outcome is 'downloaded',
+    'resumed', 'revalidated' (server said 304) or 'cached' (offline).
+    Raises DownloadError or requests exceptions on failure.
+    """
+    cache = cache or cache_dir()
+    meta = load_url_meta(cache, url)
+    if meta and expected_sha256 and meta['sha256'] != expected_sha256.lower():
+        meta = None  # Cached body is not the pinned one; fetch again
+
+    if offline:
+        if not meta:
+            raise DownloadError(f"Offline and {url} is not in the cache ({cache})")
+        outcome = 'cached'
+    else:
+        outcome, meta = transfer_with_retries(cache, url, meta, expected_sha256, log)
+
+    cached = object_path(cache, meta['sha256'])
+    if destination:
+        replace_with_copy(cached, destination)
+    return outcome, cached
+
+def transfer_with_retries(cache, url, meta, expected_sha256=None, log=print):
+    """Run transfer(), retrying dropped connections up to RETRIES times. Returns (outcome, meta)."""
+    import requests
+
+    for attempt in range(1, RETRIES + 1):
+        try:
+            return transfer(cache, url, meta, expected_sha256)
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            # Includes connections dropped mid-body; the next attempt resumes from the partial file
+            if attempt == RETRIES:
+                raise
+            log(f"Download of {url} interrupted ({e}); retrying ({attempt}/{RETRIES - 1})")
+            time.sleep(attempt)
+
+def download_file(url, destination=None, expected_sha256=None, offline=False, log=print):
+    """Download a file from a URL (through the cache) and save it to a local path.
+
+    With destination None the file is only brought into the cache. Returns
+    the path of the cached body, or None if the download failed.
+    """
+    with span('download', url=url) as record:
+        try:
+            outcome, cached = fetch(url, destination, expected_sha256, offline, log=log)
+            record['outcome'] = outcome
+            record['bytes_written'] = os.path.getsize(cached)
+            log(f"Downloaded successfully ({outcome}): {destination or cached}")
+            return cached
+        except Exception as e:
+            record['outcome'] = 'failed'
+            log(f"Error downloading file: {e}")
+            return None
+
+def download_sciter_dll(destination, offline=False, expected_sha256=None, log=print):
+    """Download sciter.dll from the given URL."""
+    return download_file(SCITER_DLL_URL, destination, expected_sha256 or SCITER_DLL_SHA256, offline, log)
+
+def download_in_background(url, destination, expected_sha256=None, offline=False):
+    """Start download_file on a background thread so local work can proceed meanwhile.
+
+    Returns a Future whose result() is (path of the cached body or None,
+    messages); call finish_download() at the point where the file is needed.
+    """
+    def run():
+        messages = []
+        return download_file(url, destination, expected_sha256, offline, log=messages.append), messages
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='download')
+    future = executor.submit(run)
+    executor.shutdown(wait=False)
+    return future
+
+def sciter_dll_in_background(destination, offline=False, expected_sha256=None):
+    """Start downloading sciter.dll in the background. See download_in_background."""
+    return download_in_background(SCITER_DLL_URL, destination, expected_sha256 or SCITER_DLL_SHA256, offline)
+
+def finish_download(future):
+    """Wait for a background download, print its messages, and return the cached body's path (None if it failed)."""
+    cached, messages = future.result()
+    for message in messages:
+        print(message)
+    return cached
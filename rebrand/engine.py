@@ -0,0 +1,355 @@
+"""Single-pass patch engine: every edit to a file is applied in one read, one scan and one write.
+
+Edits are plain dicts (see patches.py) with an 'op' key:
+
+- 'replace_line': replace the line 'offset' lines after each line containing 'find'.
+  'expect' (optional) must appear in the target line; 'first' (default True) stops
+  after the first match.
+- 'toml_set': set 'key' inside the TOML table 'section' (see tomlspans.py).
+- 'comment_block': wrap the block starting at a line beginning with 'start' in
+  /* ... */, ending at the next line that is just '}'. A block already preceded
+  by a '/*' line is left alone, so re-runs do not nest comments.
+
+Every op writes 'line' (without its line ending; the original ending is kept).
+Line edits are located through the anchor index (anchors.py), never by line
+number; toml_set edits are spliced into the spans of the parsed TOML document
+after them. Files of stream.STREAM_THRESHOLD bytes or more with only line
+edits are streamed in chunks instead of read whole (see stream.py).
+"""
+
+import difflib
+import heapq
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from . import trace
+from .anchors import anchor_patterns, find_anchors, scan_anchors
+from .fileio import remove_quietly, replace_file
+from .overlay import is_staged, read_file, spool_file, write_file
+from .state import inputs_key, is_current, make_entry, state_key
+from .stream import STREAM_THRESHOLD, file_anchors, longest_marker, read_lines, splice_lines, stream_anchors
+from .tomlspans import set_toml_keys
+
+BOM = '\ufeff'
+
+def line_ending(line):
+    """Return the line ending of line ('\\r\\n', '\\n' or '')."""
+    if line.endswith('\r\n'):
+        return '\r\n'
+    if line.endswith('\n'):
+        return '\n'
+    return ''
+
+def with_ending(text, old_line):
+    """Return text terminated the same way as old_line (defaults to '\\n')."""
+    return text + (line_ending(old_line) or '\n')
+
+def split_lines(text):
+    """Split text into lines that keep their endings. Only '\n' ends a line."""
+    lines = text.split('\n')
+    result = [line + '\n' for line in lines[:-1]]
+    if lines[-1]:
+        result.append(lines[-1])
+    return result
+
+def apply_edits(lines, edits, anchors=None):
+    """Apply the line edits (replace_line, comment_block) to a list of lines in a single scan.
+
+    anchors lists the indices of the lines that can hold a marker (see
+    anchors.py); only those lines and the lines they point at are visited.
+    None visits every line.
+
+    Returns (new_lines, hits, stale): hits[i] is how many times edits[i]
+    applied, and stale lists (edit index, anchor line, target line) for every
+    anchor whose target line did not hold what the edit expects, which is left
+    unchanged.
+    """
+    changes, hits, stale = plan_edits(lines.__getitem__, len(lines), edits,
+                                      anchors if anchors is not None else range(len(lines)))
+    result = []
+    copied = 0  # lines before this index are already in result
+    for i in sorted(changes):
+        result.extend(lines[copied:i])
+        result.extend(changes[i])
+        copied = i + 1
+    result.extend(lines[copied:])
+    return result, hits, stale
+
+def plan_edits(line_at, line_count, edits, anchors):
+    """Work out what the line edits change, visiting only the anchor lines and the lines they point at.
+
+    line_at(i) returns line i (with its ending); line_count is the number of
+    lines. Only anchor lines, their targets and the line before an anchor
+    are asked for, so the lines can come from anywhere (see stream.py).
+
+    Returns (changes, hits, stale): changes maps the index of every changed
+    line to the lines that replace it; hits and stale are as for apply_edits().
+    """
+    hits = [0] * len(edits)
+    stale = []
+    pending = {}  # line index -> list of (edit index, anchor line) scheduled by an earlier anchor
+    visit = list(anchors)
+    heapq.heapify(visit)
+
+    changes = {}
+    visited = -1  # lines up to this index are done
+    in_block = None  # index of the comment_block edit we are inside
+    while visit:
+        i = heapq.heappop(visit)
+        if i <= visited or i >= line_count:
+            continue
+        visited = i
+        line = line_at(i)
+        stripped = line.strip()
+
+        replacement = []
+        new_line = line
+        for n, anchor in pending.pop(i, ()):
+            expect = edits[n].get('expect')
+            if expect is None or expect in line:
+                new_line = with_ending(edits[n]['line'], line)
+                hits[n] += 1
+            else:
+                stale.append((n, anchor, i))
+
+        for n, edit in enumerate(edits):
+            op = edit['op']
+            if edit.get('first', True) and hits[n] and op != 'comment_block':
+                continue
+            if op == 'replace_line' and edit['find'] in line:
+                offset = edit.get('offset', 0)
+                if offset:
+                    pending.setdefault(i + offset, []).append((n, i))
+                    heapq.heappush(visit, i + offset)
+                    continue
+                expect = edit.get('expect')
+                if expect is None or expect in line:
+                    new_line = with_ending(edit['line'], line)
+                    hits[n] += 1
+                    break
+            elif op == 'comment_block' and in_block is None and stripped.startswith(edit['start']):
+                hits[n] += 1
+                previous = changes[i - 1][-1] if i - 1 in changes else line_at(i - 1) if i else ''
+                if previous.strip() == '/*':
+                    break  # Already commented out by an earlier run
+                replacement.append(with_ending('/*', line))
+                in_block = n
+                break
+
+        replacement.append(new_line)
+        if in_block is not None and stripped == '}':
+            replacement.append(with_ending('*/', line))
+            in_block = None
+        if replacement != [line]:
+            changes[i] = replacement
+
+    for target, scheduled in pending.items():
+        stale.extend((n, anchor, target) for n, anchor in scheduled)  # Target past the end of the file
+    return changes, hits, stale
+
+def describe_edit(edit):
+    """Return a short human readable name for an edit, for log messages."""
+    if edit['op'] == 'toml_set':
+        return f"[{edit['section']}] {edit['key']}"
+    if edit['op'] == 'comment_block':
+        return edit['start']
+    return edit['find']
+
+def rewrite_file(file_path, edits, log=print, entry=None, overlay=None):
+    """Read file_path once, apply all edits, and write it back once if anything changed.
+
+    entry is the file's manifest entry; its anchor index is reused when it
+    still describes the file. With an overlay (see overlay.py) the file is
+    read through it and the result staged in it. Messages go to log. Returns (hits, data,
+    anchors): the per-edit hit counts, the final file bytes and their anchor
+    index, or (None, None, None) if the file does not exist. data is None
+    for a streamed file (see stream.py).
+    """
+    with trace.span('patch', file=file_path) as record:
+        return rewrite_file_traced(file_path, edits, log, entry, overlay, record)
+
+def rewrite_file_traced(file_path, edits, log, entry, overlay, record):
+    """rewrite_file, filling the counters of its trace span record."""
+    try:
+        if (not is_staged(overlay, file_path) and all(edit['op'] != 'toml_set' for edit in edits)
+                and os.path.getsize(file_path) >= STREAM_THRESHOLD):
+            return stream_file_traced(file_path, edits, log, entry, overlay, record)
+        if is_staged(overlay, file_path):
+            data = read_file(overlay, file_path)
+            mtime_ns = None
+        else:
+            with open(file_path, 'rb') as file:
+                data = file.read()
+                mtime_ns = os.fstat(file.fileno()).st_mtime_ns
+    except FileNotFoundError:
+        log(f"{file_path} file not found.")
+        return None, None, None
+    record['bytes_read'] = len(data)
+
+    line_indices = [n for n, edit in enumerate(edits) if edit['op'] != 'toml_set']
+    table_indices = [n for n, edit in enumerate(edits) if edit['op'] == 'toml_set']
+    patterns = anchor_patterns(edits)
+    anchors, reused = find_anchors(entry, data, patterns, mtime_ns)
+    content = data.decode('utf-8')
+    bom = BOM if content.startswith(BOM) else ''
+    lines = split_lines(content[len(bom):])
+    new_lines, line_hits, stale = apply_edits(lines, [edits[n] for n in line_indices], [line for line, _ in anchors])
+    new_data = (bom + ''.join(new_lines)).encode('utf-8')
+    table_hits = []
+    if table_indices:
+        new_data, table_hits = set_toml_keys(new_data, [edits[n] for n in table_indices])
+        new_lines = split_lines(new_data.decode('utf-8')[len(bom):])
+    hits = [0] * len(edits)
+    for n, count in zip(line_indices + table_indices, line_hits + table_hits):
+        hits[n] = count
+    stale = [(line_indices[n], anchor, target) for n, anchor, target in stale]
+
+    if new_data != data:
+        data = new_data
+        if overlay is not None:
+            write_file(overlay, file_path, data)
+        else:
+            replace_file(file_path, data)
+        anchors = scan_anchors(data, patterns)
+        record['bytes_written'] = len(data)
+
+    diff = []
+    if trace.debug:
+        diff = ["  " + line.rstrip('\r\n') for line in difflib.unified_diff(lines, new_lines, file_path, file_path, n=0)]
+    log_outcome(file_path, edits, hits, stale, len(lines), log, reused, diff)
+    return hits, data, anchors
+
+def stream_file_traced(file_path, edits, log, entry, overlay, record):
+    """rewrite_file for a file too large to read whole: only the lines the edits look at are read and decoded."""
+    patterns = anchor_patterns(edits)
+    with open(file_path, 'rb') as file:
+        record['bytes_read'] = os.fstat(file.fileno()).st_size
+        anchors, reused = file_anchors(entry, file, patterns, longest_marker(edits))
+        raw_lines, line_count = read_lines(file, anchors, [edit.get('offset', 0) for edit in edits])
+        lines = {i: raw.decode('utf-8') for i, (_, raw) in raw_lines.items()}
+        bom = BOM if lines.get(0, '').startswith(BOM) else ''
+        if bom:
+            lines[0] = lines[0][len(bom):]
+        if line_count is None:
+            line_count = max(lines, default=-1) + 1  # Every line the edits can reach exists
+        changes, hits, stale = plan_edits(lines.__getitem__, line_count, edits, [line for line, _ in anchors])
+        temp_path = None
+        if changes:
+            replacements = [(raw_lines[i][0], raw_lines[i][0] + len(raw_lines[i][1]),
+                             ((bom if i == 0 else '') + ''.join(changes[i])).encode('utf-8')) for i in sorted(changes)]
+            temp_path, size, _ = splice_lines(file, file_path, replacements)
+
+    if temp_path is not None:
+        try:
+            with open(temp_path, 'rb') as file:
+                anchors = stream_anchors(file, patterns, longest_marker(edits))
+        except BaseException:
+            remove_quietly(temp_path)
+            raise
+        if overlay is not None:
+            spool_file(overlay, file_path, temp_path)
+        else:
+            os.replace(temp_path, file_path)
+        record['bytes_written'] = size
+
+    diff = []
+    if trace.debug:
+        for i in sorted(changes):
+            diff.append(f"  @@ -{i + 1} @@")
+            diff.append("  -" + lines[i].rstrip('\r\n'))
+            diff.extend("  +" + line.rstrip('\r\n') for line in changes[i])
+    log_outcome(file_path, edits, hits, stale, line_count, log, reused, diff)
+    return hits, None, anchors
+
+def log_outcome(file_path, edits, hits, stale, line_count, log, reused=False, diff=()):
+    """Log how many edits applied to a file, its diff lines, and every stale anchor and missing marker."""
+    applied = sum(1 for count in hits if count)
+    log(f"Updated {file_path}: {applied}/{len(edits)} edits applied" + (" (cached anchor index)" if reused else ""))
+    for line in diff:
+        log(line)
+    for n, anchor, target in stale:
+        if target < line_count:
+            reason = f"line {target + 1} does not contain '{edits[n]['expect']}'"
+        else:
+            reason = f"line {target + 1} is past the end of the file"
+        log(f"  stale anchor: {describe_edit(edits[n])} (line {anchor + 1}): {reason}, left unchanged")
+    reported = {n for n, _, _ in stale}
+    for n, (edit, count) in enumerate(zip(edits, hits)):
+        if not count and n not in reported:
+            log(f"  marker not found: {describe_edit(edit)}")
+
+def patch_file(file_path, edits, log=print):
+    """Apply edits to file_path in one pass. Returns the per-edit hit counts, or None if the file does not exist."""
+    return rewrite_file(file_path, edits, log)[0]
+
+def patch_tracked(file_path, edits, entry, log=print, overlay=None):
+    """Patch file_path unless its manifest entry shows these edits are already in place.
+
+    entry is the file's manifest entry (or None). Returns (hits, new entry);
+    the new entry carries the anchor index of the patched file.
+    """
+    key = inputs_key(edits)
+    if not is_staged(overlay, file_path) and is_current(entry, file_path, key):
+        log(f"Up to date: {file_path}")
+        return entry['hits'], entry
+    hits, data, anchors = rewrite_file(file_path, edits, log, entry, overlay)
+    if hits is None:
+        return None, None
+    extra = {'hits': hits, 'patterns': inputs_key(anchor_patterns(edits)), 'anchors': anchors}
+    if overlay is not None and file_path in overlay['spooled']:
+        # Streamed to a temporary file; renaming it into place keeps its size and mtime
+        return hits, make_entry(overlay['spooled'][file_path], key, **extra)
+    return hits, make_entry(file_path, key, data, staged=is_staged(overlay, file_path), **extra)
+
+def patch_tracked_logged(file_path, edits, entry, overlay=None):
+    """Run patch_tracked collecting its messages. Returns (hits, new entry, messages)."""
+    messages = []
+    hits, entry = patch_tracked(file_path, edits, entry, log=messages.append, overlay=overlay)
+    return hits, entry, messages
+
+def apply_patches(base_directory, patches, jobs=None, state=None, progress=None, overlay=None):
+    """Apply a {relative path: [edits]} mapping to the tree at base_directory.
+
+    Files are independent, so they are patched on a pool of up to jobs worker
+    threads (None lets the executor pick; 1 runs sequentially). Log messages
+    and results always come out in the order of patches.
+
+    With a manifest (see state.py), files whose edits are already in place
+    are skipped, and state['files'] is updated for every file patched.
+
+    progress, if given, is called as progress(relative path, files done,
+    total files) after each file. With an overlay, files are read through
+    it and the patched content staged in it instead of written.
+
+    Returns {relative path: hit counts or None}.
+    """
+    files = state['files'] if state is not None else {}
+    paths = list(patches)
+    args = ([os.path.join(base_directory, relative_path) for relative_path in paths],
+            [patches[relative_path] for relative_path in paths],
+            [files.get(state_key(relative_path)) if state is not None else None for relative_path in paths],
+            [overlay] * len(paths))
+
+    if jobs == 1 or len(patches) <= 1:
+        outcomes = (patch_tracked(file_path, edits, entry, print, overlay) + ([],)
+                    for file_path, edits, entry, _ in zip(*args))
+        return collect_outcomes(paths, outcomes, files, state is not None, progress)
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return collect_outcomes(paths, executor.map(patch_tracked_logged, *args), files, state is not None, progress)
+
+def collect_outcomes(paths, outcomes, files, track, progress=None):
+    """Print buffered messages in order and gather the results of apply_patches."""
+    results = {}
+    for done, (relative_path, (hits, entry, messages)) in enumerate(zip(paths, outcomes), 1):
+        for message in messages:
+            print(message)
+        results[relative_path] = hits
+        if track:
+            if entry is None:
+                files.pop(state_key(relative_path), None)
+            else:
+                files[state_key(relative_path)] = entry
+        if progress:
+            progress(relative_path, done, len(paths))
+    return results
@@ -0,0 +1,111 @@
+"""File writing and tree linking helpers.
+
+Files are always replaced by writing a temporary file next to them and
+renaming it over the original, never truncated in place. That keeps a file
+that is hardlinked into another tree (see batch.py) unchanged there.
+atomic_output() is that pattern for any writer; replace_file() and
+replace_with_copy() are built on it.
+"""
+
+import contextlib
+import errno
+import os
+import shutil
+import stat
+import tempfile
+
+FICLONE = 0x40049409  # Linux ioctl: share the source extents copy-on-write
+
+def file_mode(path, default=0o644):
+    """Return the permission bits of path, or default if it does not exist."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return default
+
+def remove_quietly(path):
+    """Delete path if it exists."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+def temp_file_next_to(path, suffix='.tmp'):
+    """Create an empty hidden file named after path in its directory. Returns its name."""
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix=suffix)
+    os.close(fd)
+    return temp_path
+
+@contextlib.contextmanager
+def atomic_output(path, rename=True):
+    """Yield the name of a new temporary file next to path, for the block to write path's new content to.
+
+    When the block succeeds the file gets the permission bits of path and,
+    with rename, replaces it; without, moving it into place is left to the
+    caller. When the block (or the rename) fails, the file is deleted.
+    """
+    temp_path = temp_file_next_to(path)
+    try:
+        yield temp_path
+        os.chmod(temp_path, file_mode(path))
+        if rename:
+            os.replace(temp_path, path)
+    except BaseException:
+        remove_quietly(temp_path)
+        raise
+
+def replace_file(path, data):
+    """Atomically replace path with data (bytes), keeping its permission bits."""
+    with atomic_output(path) as temp_path, open(temp_path, 'wb') as file:
+        file.write(data)
+
+def replace_with_copy(source, destination):
+    """Atomically replace destination with a copy of the file at source."""
+    with atomic_output(destination) as temp_path:
+        copy_file(source, temp_path)
+
+def reflink(source, destination):
+    """Clone source to destination sharing its data blocks. Raises OSError if unsupported."""
+    import fcntl
+
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.unlink(destination)
+            raise
+    shutil.copystat(source, destination)
+
+def link_file(source, destination, mode='auto'):
+    """Make destination a cheap copy of source and return how it was made.
+
+    mode is 'reflink', 'hardlink', 'copy' or 'auto' (reflink, then hardlink,
+    then copy, whichever the filesystem supports first).
+    """
+    if mode in ('auto', 'reflink'):
+        try:
+            reflink(source, destination)
+            return 'reflink'
+        except (OSError, ImportError):
+            if mode == 'reflink':
+                raise
+    if mode in ('auto', 'hardlink'):
+        try:
+            os.link(source, destination)
+            return 'hardlink'
+        except OSError as e:
+            if mode == 'hardlink' or e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise
+    shutil.copy2(source, destination)
+    return 'copy'
+
+def copy_file(source, destination):
+    """Make destination an independent copy of source, sharing blocks when the filesystem allows."""
+    try:
+        reflink(source, destination)
+        return 'reflink'
+    except (OSError, ImportError):
+        shutil.copy2(source, destination)
+        return 'copy'
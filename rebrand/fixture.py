@@ -0,0 +1,287 @@
+"""Synthetic RustDesk-shaped source tree for benchmarks and offline experiments.
+
+make_fixture() writes every file the patch table touches, with the markers
+laid out as in a real checkout, plus size knobs for the parts that grow on
+a real tree: language files, the icon literals and bulk of src/ui.rs, and
+flutter sources. The content is generated from a fixed seed, so the same
+knobs always give the same bytes. res/icon.png is a plain PNG that can be
+used as the brand icon.
+
+fake_binary() writes a stand-in for a build artifact: random bytes with
+given strings embedded, for the post-build verifier (see verify.py).
+"""
+
+import base64
+import os
+import random
+import struct
+import zlib
+
+DEFAULT_KNOBS = {
+    'lang_files': 50,  # src/lang/*.rs
+    'lang_entries': 400,  # translation pairs per language file
+    'ui_lines': 1000,  # lines of src/ui.rs besides the icon literals
+    'icon_bytes': 6000,  # decoded size of each base64 icon literal
+    'flutter_files': 200,  # extra Dart files under flutter/lib
+    'flutter_lines': 150,  # lines per extra Dart file
+    'ui_files': 20,  # UI resources under src/ui, inlined by res/inline-sciter.py
+}
+
+INLINE_SCITER = '''import os
+
+# Fixture stand-in for RustDesk's script: inline every UI resource into src/ui/inline.rs
+ui = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'ui')
+parts = []
+for name in sorted(os.listdir(ui)):
+    if name != 'inline.rs':
+        with open(os.path.join(ui, name), 'r', encoding='utf-8') as file:
+            parts.append('// %s\\n%s' % (name, file.read()))
+with open(os.path.join(ui, 'inline.rs'), 'w', encoding='utf-8') as file:
+    file.write(''.join(parts))
+'''
+
+def solid_png(size, rgba=(32, 96, 200, 255)):
+    """Return the bytes of a size x size PNG filled with one RGBA color (no imaging library needed)."""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    row = b'\0' + bytes(rgba) * size
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 6, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(row * size, 9))
+            + chunk(b'IEND', b''))
+
+def fake_base64(rng, size):
+    """Return size random bytes as base64 text, standing in for an embedded PNG."""
+    return base64.b64encode(rng.randbytes(size)).decode('ascii')
+
+def cargo_toml(rng, dependencies):
+    """Return the main Cargo.toml."""
+    deps = ''.join(f'dep{n} = {{ version = "0.{rng.randrange(1, 30)}", features = ["full"] }}\n' for n in range(dependencies))
+    return f'''[package]
+name = "rustdesk"
+version = "1.3.0"
+authors = ["rustdesk <info@rustdesk.com>"]
+edition = "2021"
+build= "build.rs"
+description = "RustDesk Remote Desktop"
+default-run = "rustdesk"
+rust-version = "1.75"
+
+[lib]
+name = "librustdesk"
+crate-type = ["cdylib", "staticlib", "rlib"]
+
+[[bin]]
+name = "naming"
+path = "src/naming.rs"
+
+[features]
+inline = []
+cli = []
+flutter = ["flutter_rust_bridge"]
+default = ["use_dasp"]
+hwcodec = ["dep:hwcodec"]
+
+[dependencies]
+{deps}
+[package.metadata.winres]
+LegalCopyright = "Copyright © 2024 Purslane Ltd. All rights reserved."
+ProductName = "RustDesk"
+FileDescription = "RustDesk Remote Desktop"
+OriginalFilename = "rustdesk.exe"
+
+[package.metadata.bundle]
+name = "RustDesk"
+identifier = "com.carriez.rustdesk"
+icon = ["res/32x32.png", "res/128x128.png", "res/128x128@2x.png"]
+'''
+
+def config_rs(rng, icon_bytes):
+    """Return libs/hbb_common/src/config.rs with its markers and both ICON literals."""
+    return f'''use std::sync::{{Arc, RwLock}};
+
+pub const RENDEZVOUS_TIMEOUT: u64 = 12_000;
+pub const CONNECT_TIMEOUT: u64 = 18_000;
+
+lazy_static::lazy_static! {{
+    pub static ref ORG: RwLock<String> = RwLock::new("com.carriez".to_owned());
+}}
+
+// 128x128
+#[cfg(target_os = "macos")] // 128x128 on 160x160 canvas, then shrink to 128, mac looks better with padding
+pub const ICON: &str = "data:image/png;base64,{fake_base64(rng, icon_bytes)}";
+#[cfg(not(target_os = "macos"))] // 128x128 no padding
+pub const ICON: &str = "data:image/png;base64,{fake_base64(rng, icon_bytes)}";
+
+lazy_static::lazy_static! {{
+pub static ref APP_NAME: RwLock<String> = RwLock::new("RustDesk".to_owned());
+pub static ref PROD_RENDEZVOUS_SERVER: RwLock<String> = RwLock::new(match option_env!("RENDEZVOUS_SERVER") {{
+    Some(key) if !key.is_empty() => key,
+    _ => "",
+}}.to_owned());
+}}
+pub const PUBLIC_RS_PUB_KEY: &str = "OeVuKk5nlHiXp+APNn0Y3pC1Iwpwn44JGqrQCsWqmBw=";
+pub const RS_PUB_KEY: &str = PUBLIC_RS_PUB_KEY;
+'''
+
+def ui_rs(rng, lines, icon_bytes):
+    """Return src/ui.rs: bulk handler code, then get_icon() with two large base64 literals."""
+    body = []
+    for n in range(lines // 5):
+        body.append(f'    fn handler_{n}(&mut self, id: i32) -> String {{\n'
+                    f'        let value = self.get_option("option-{n}");\n'
+                    f'        log::debug!("handler {n} {{}} {{}}", id, value);\n'
+                    f'        value\n'
+                    f'    }}\n')
+    return ('use sciter::Value;\n\nstruct UIHostHandler;\n\nimpl UI {\n' + ''.join(body) + '}\n\n'
+            '#[cfg(not(target_os = "linux"))]\n'
+            'fn get_icon() -> String {\n'
+            '    // 128x128\n'
+            '    #[cfg(target_os = "macos")]\n'
+            '    // 128x128 on 160x160 canvas, then shrink to 128, mac looks better with padding\n'
+            '    {\n'
+            f'        "data:image/png;base64,{fake_base64(rng, icon_bytes)}".into()\n'
+            '    }\n'
+            '    #[cfg(not(target_os = "macos"))] // 128x128 no padding\n'
+            '    {\n'
+            f'        "data:image/png;base64,{fake_base64(rng, icon_bytes)}".into()\n'
+            '    }\n'
+            '}\n')
+
+def lang_rs(rng, entries):
+    """Return a src/lang/*.rs translation table mentioning RustDesk here and there."""
+    words = ['connect', 'remote', 'desktop', 'password', 'server', 'session', 'file', 'transfer', 'audio', 'display']
+    pairs = []
+    for n in range(entries):
+        key = ' '.join(rng.choice(words) for _ in range(3)).capitalize() + f' {n}'
+        value = key.upper() + (' - RustDesk' if n % 7 == 0 else '')
+        pairs.append(f'        ("{key}", "{value}"),\n')
+    return ('lazy_static::lazy_static! {\npub static ref T: std::collections::HashMap<&\'static str, &\'static str> =\n'
+            '    [\n' + ''.join(pairs) + '    ].iter().cloned().collect();\n}\n')
+
+def dart_model(class_name, lines):
+    """Return a Dart model file whose class starts with the appName field."""
+    body = ''.join(f'  int field{n} = {n};\n' for n in range(lines))
+    return f"import 'package:flutter/material.dart';\n\nclass {class_name} {{\n  final String appName = 'RustDesk';\n{body}}}\n"
+
+def dart_widget(n, lines):
+    """Return a filler Dart file, some of whose strings mention RustDesk."""
+    body = ''.join(f"    final label{i} = '{'RustDesk ' if i % 25 == 0 else ''}label {i}';\n" for i in range(lines))
+    return f"import 'package:flutter/material.dart';\n\nclass Widget{n} extends StatelessWidget {{\n  Widget build(BuildContext context) {{\n{body}  }}\n}}\n"
+
+RUNNER_RC = '''// Microsoft Visual C++ generated resource script.
+#include "resource.h"
+
+VS_VERSION_INFO VERSIONINFO
+ FILEVERSION VERSION_AS_NUMBER
+ PRODUCTVERSION VERSION_AS_NUMBER
+BEGIN
+    BLOCK "StringFileInfo"
+    BEGIN
+        BLOCK "040904e4"
+        BEGIN
+            VALUE "CompanyName", "Purslane Ltd" "\\0"
+            VALUE "FileDescription", "RustDesk Remote Desktop" "\\0"
+            VALUE "FileVersion", VERSION_AS_STRING "\\0"
+            VALUE "InternalName", "rustdesk" "\\0"
+            VALUE "LegalCopyright", "Copyright (C) 2024 Purslane Ltd. All rights reserved." "\\0"
+            VALUE "OriginalFilename", "rustdesk.exe" "\\0"
+            VALUE "ProductName", "RustDesk" "\\0"
+            VALUE "ProductVersion", VERSION_AS_STRING "\\0"
+        END
+    END
+END
+'''
+
+CLIENT_RS = '''pub async fn secure_connection(conn: &mut Stream, key: &str, token: &str) -> ResultType<()> {
+    let rs_pk = get_rs_pk(key);
+    if !key.is_empty() && !token.is_empty() {
+        let sign_pk = sign::PublicKey(rs_pk);
+        conn.send(&msg_out).await?;
+    }
+    Ok(())
+}
+'''
+
+def fixture_files(knobs):
+    """Return {relative path: text} for the fixture described by knobs."""
+    rng = random.Random(1)
+    files = {
+        'Cargo.toml': cargo_toml(rng, 40),
+        'build.py': "#!/usr/bin/env python3\nimport os\n\napp_name = 'RustDesk'\n",
+        'libs/hbb_common/src/config.rs': config_rs(rng, knobs['icon_bytes']),
+        'libs/portable/Cargo.toml': ('[package]\nname = "rustdesk-portable-packer"\nversion = "0.1.0"\n\n'
+                                     '[package.metadata.winres]\nProductName = "RustDesk"\n'
+                                     'OriginalFilename = "rustdesk.exe"\nFileDescription = "RustDesk Remote Desktop"\n'),
+        'libs/portable/generate.py': "import os\n\nexecutable_name = 'rustdesk'\n",
+        'src/ui.rs': ui_rs(rng, knobs['ui_lines'], knobs['icon_bytes']),
+        'src/client.rs': CLIENT_RS,
+        'flutter/lib/models/native_model.dart': dart_model('NativeModel', knobs['flutter_lines']),
+        'flutter/lib/models/platform_model.dart': dart_model('PlatformModel', knobs['flutter_lines']),
+        'flutter/lib/models/web_model.dart': dart_model('WebModel', knobs['flutter_lines']),
+        'flutter/lib/web/bridge.dart': dart_model('Bridge', knobs['flutter_lines']),
+        'flutter/windows/CMakeLists.txt': 'cmake_minimum_required(VERSION 3.14)\nproject(rustdesk LANGUAGES CXX)\nset(PROJECT_NAME "rustdesk")\n',
+        'flutter/windows/runner/main.cpp': 'int APIENTRY wWinMain() {\n    FlutterWindow window(project);\n    setAppName("RustDesk");\n    return 0;\n}\n',
+        'flutter/windows/runner/Runner.rc': RUNNER_RC,
+        'res/rustdesk.desktop': '[Desktop Entry]\nVersion=1.3.0\nName=RustDesk\nGenericName=Remote Desktop\nExec=rustdesk %u\nIcon=rustdesk\n',
+        'res/rustdesk.service': '[Unit]\nDescription=RustDesk\nRequires=network.target\n\n[Service]\nExecStart=/usr/bin/rustdesk --service\n',
+        'res/inline-sciter.py': INLINE_SCITER,
+    }
+    for n in range(knobs['lang_files']):
+        files[f'src/lang/l{n:02d}.rs'] = lang_rs(rng, knobs['lang_entries'])
+    for n in range(knobs['flutter_files']):
+        files[f'flutter/lib/widgets/w{n // 50}/widget_{n}.dart'] = dart_widget(n, knobs['flutter_lines'])
+    for n in range(knobs['ui_files']):
+        files[f'src/ui/page{n}.tis'] = ''.join(f'function handler{n}_{i}() {{ return view.call("option-{i}"); }}\n' for i in range(200))
+    return files
+
+def fake_binary(path, size, strings, seed=1, chunk_size=1 << 20):
+    """Write a size-byte PE-like blob to path: random bytes with each of strings (bytes) embedded, evenly spaced."""
+    rng = random.Random(seed)
+    gap = size // (len(strings) + 1)
+    with open(path, 'wb') as file:
+        file.write(b'MZ')
+        written = 2
+        for n, data in enumerate(list(strings) + [b'']):
+            offset = gap * (n + 1) if data else size
+            while written < offset:
+                filler = rng.randbytes(min(chunk_size, offset - written))
+                file.write(filler)
+                written += len(filler)
+            file.write(data)
+            written += len(data)
+
+def upstream_binary_strings():
+    """Return the strings an unbranded RustDesk build contains, encoded as the verifier looks for them."""
+    from .verify import UPSTREAM_DEFAULTS
+
+    strings = [b'RustDesk']
+    for _, text, encodings in UPSTREAM_DEFAULTS:
+        strings.extend(text.encode(encoding) for encoding in encodings)
+    return strings
+
+def resolve_knobs(scale=1, **knobs):
+    """Return every knob: the given ones or their DEFAULT_KNOBS value, times scale."""
+    unknown = set(knobs) - set(DEFAULT_KNOBS)
+    if unknown:
+        raise ValueError(f"Unknown fixture knobs: {', '.join(sorted(unknown))}")
+    return {name: max(1, int((knobs.get(name) or default) * scale)) for name, default in DEFAULT_KNOBS.items()}
+
+def make_fixture(destination, scale=1, **knobs):
+    """Write a synthetic RustDesk tree at destination and return its knobs.
+
+    Keyword arguments override DEFAULT_KNOBS; scale multiplies every knob
+    afterwards, so scale=10 gives a tree roughly ten times as large.
+    """
+    knobs = resolve_knobs(scale, **knobs)
+
+    for relative_path, text in fixture_files(knobs).items():
+        path = os.path.join(destination, *relative_path.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            file.write(text)
+    for name, size in (('icon.png', 256), ('32x32.png', 32), ('128x128.png', 128)):
+        with open(os.path.join(destination, 'res', name), 'wb') as file:
+            file.write(solid_png(size))
+    return knobs
@@ -0,0 +1,112 @@
+"""Icon pipeline: decode the source PNG once and render every icon RustDesk needs from it.
+
+Rendered icons are cached under <cache>/icons/<RENDER_VERSION>-<sha256 of the
+source PNG>, so repeat runs and batch brands that share an icon never decode
+or resample again.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import os
+
+from .downloads import cache_dir
+from .fileio import replace_file
+
+# Bump whenever render_icons() output changes, so icons cached (and trees branded) by an older renderer are redone
+RENDER_VERSION = 1
+
+ICO_SIZES = [(16, 16), (24, 24), (32, 32), (48, 48), (64, 64), (128, 128), (256, 256)]
+
+# Files written into the tree: relative path -> (format, pixel size)
+ICON_FILES = {
+    'res/icon.ico': ('ICO', 256),
+    'res/tray-icon.ico': ('ICO', 256),
+    'res/32x32.png': ('PNG', 32),
+    'res/128x128.png': ('PNG', 128),
+    'res/128x128@2x.png': ('PNG', 256),
+}
+
+# Base64 PNGs for the source code (ui.rs and the ICON constants in config.rs)
+ICON_STRINGS = ('icon_base64', 'icon_base64_mac')
+
+def icon_key(icon_png):
+    """Return the key of the rendered icons of the source PNG: RENDER_VERSION and the PNG's SHA-256."""
+    with open(icon_png, 'rb') as file:
+        return f"{RENDER_VERSION}-{hashlib.sha256(file.read()).hexdigest()}"
+
+def encode_png(image):
+    """Return image as optimized PNG bytes."""
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+def render_icons(icon_png):
+    """Decode icon_png once and render every output from the in-memory master.
+
+    Returns {relative path: bytes} for ICON_FILES plus the ICON_STRINGS values.
+    """
+    from PIL import Image
+
+    with Image.open(icon_png) as img:
+        master = img.convert('RGBA')
+        master.load()
+
+    def resized(size):
+        if master.size == (size, size):
+            return master
+        return master.resize((size, size), Image.LANCZOS)
+
+    sizes = {}
+    for size in {size for _, size in ICON_FILES.values()} | {128}:
+        sizes[size] = resized(size)
+
+    rendered = {}
+    ico = io.BytesIO()
+    sizes[256].save(ico, format='ICO', sizes=ICO_SIZES)
+    for path, (fmt, size) in ICON_FILES.items():
+        rendered[path] = ico.getvalue() if fmt == 'ICO' else encode_png(sizes[size])
+
+    # macOS: 128x128 on a 160x160 canvas, then shrunk to 128 (mac looks better with padding)
+    canvas = Image.new('RGBA', (160, 160), (0, 0, 0, 0))
+    canvas.paste(sizes[128], (16, 16))
+    rendered['icon_base64'] = base64.b64encode(encode_png(sizes[128])).decode('ascii')
+    rendered['icon_base64_mac'] = base64.b64encode(encode_png(canvas.resize((128, 128), Image.LANCZOS))).decode('ascii')
+    return rendered
+
+def icon_cache_path(key):
+    """Return the cache directory for the icons rendered from the source PNG with hash key."""
+    return os.path.join(cache_dir(), 'icons', key)
+
+def load_cached_icons(key):
+    """Return the cached rendering for key, or None if it is not (completely) cached."""
+    directory = icon_cache_path(key)
+    try:
+        with open(os.path.join(directory, 'strings.json'), 'r', encoding='utf-8') as file:
+            rendered = json.load(file)
+        for path in ICON_FILES:
+            with open(os.path.join(directory, path.replace('/', '_')), 'rb') as file:
+                rendered[path] = file.read()
+    except (OSError, ValueError):
+        return None
+    return rendered
+
+def save_cached_icons(key, rendered):
+    """Store a rendering in the icon cache."""
+    directory = icon_cache_path(key)
+    os.makedirs(directory, exist_ok=True)
+    for path in ICON_FILES:
+        replace_file(os.path.join(directory, path.replace('/', '_')), rendered[path])
+    strings = {name: rendered[name] for name in ICON_STRINGS}
+    # Written last: its presence marks the cache entry complete
+    replace_file(os.path.join(directory, 'strings.json'), json.dumps(strings).encode('utf-8'))
+
+def get_icons(icon_png, key=None):
+    """Return the rendering of icon_png, from the cache when possible."""
+    key = key or icon_key(icon_png)
+    rendered = load_cached_icons(key)
+    if rendered is None:
+        rendered = render_icons(icon_png)
+        save_cached_icons(key, rendered)
+    return rendered
@@ -0,0 +1,151 @@
+"""Non-blocking command runner: child output is streamed line by line through a bounded queue.
+
+start_command() returns at once with a job dict. Two reader threads put
+(stream name, line) tuples on job['lines'], blocking while the consumer is
+MAX_QUEUED_LINES behind; a waiter thread enforces the timeout, records
+job['result'], runs the job's on_exit hook and then puts None on the queue.
+The GUI drains the queue from root.after (see drain_lines); run_streamed()
+drains it on the calling thread for headless runs.
+"""
+
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+MAX_QUEUED_LINES = 1000
+KILL_GRACE = 5  # seconds between asking a cancelled or timed out command to stop and killing it
+
+def start_command(command, cwd, shell=False, timeout=None, env=None, on_exit=None):
+    """Start command in cwd without waiting for it. Returns the job dict.
+
+    command is an argument list, or a string when shell is set. timeout (in
+    seconds) stops the command if it runs longer. env replaces the environment.
+    on_exit, if given, is called with the result on the waiter thread before
+    the job counts as finished, for follow-up work too slow for a GUI thread.
+    """
+    if os.name == 'nt':
+        group = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        group = {'start_new_session': True}  # So stopping it also stops what it started (a shell running cargo)
+    process = subprocess.Popen(command, cwd=cwd, shell=shell, env=env, stdin=subprocess.DEVNULL,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               text=True, encoding='utf-8', errors='replace', bufsize=1, **group)
+    job = {
+        'command': command,
+        'process': process,
+        'lines': queue.Queue(MAX_QUEUED_LINES),
+        'started': time.monotonic(),
+        'cancelled': False,
+        'timed_out': False,
+        'result': None,
+    }
+    readers = [threading.Thread(target=read_stream, args=(stream, name, job['lines']), daemon=True)
+               for stream, name in ((process.stdout, 'stdout'), (process.stderr, 'stderr'))]
+    for reader in readers:
+        reader.start()
+    threading.Thread(target=wait_for, args=(job, readers, timeout, on_exit), daemon=True).start()
+    return job
+
+def read_stream(stream, name, lines):
+    """Queue every line of stream as it arrives."""
+    with stream:
+        for line in stream:
+            lines.put((name, line.rstrip('\r\n')))
+
+def wait_for(job, readers, timeout, on_exit=None):
+    """Wait for the job's process (stopping it at timeout), then record the result, run on_exit and end the queue."""
+    process = job['process']
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        job['timed_out'] = True
+        stop_process(process)
+    process.wait()
+    for reader in readers:
+        reader.join()
+    job['result'] = {
+        'command': job['command'],
+        'returncode': process.returncode,
+        'duration': time.monotonic() - job['started'],
+        'timed_out': job['timed_out'],
+        'cancelled': job['cancelled'],
+    }
+    try:
+        if on_exit:
+            on_exit(job['result'])
+    finally:
+        job['lines'].put(None)
+
+def stop_process(process):
+    """Stop process and its children: terminate, then kill after KILL_GRACE seconds."""
+    if process.poll() is not None:
+        return
+    if os.name == 'nt':
+        subprocess.run(['taskkill', '/T', '/F', '/PID', str(process.pid)], capture_output=True)
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(KILL_GRACE)
+    except ProcessLookupError:
+        pass
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+def cancel_command(job):
+    """Ask a running job to stop. Returns at once; the job still ends with a result."""
+    job['cancelled'] = True
+    threading.Thread(target=stop_process, args=(job['process'],), daemon=True).start()
+
+def drain_lines(job, limit=200):
+    """Take up to limit queued lines without blocking.
+
+    Returns (lines, finished), finished being True once the job's result is
+    recorded and all of its output was taken.
+    """
+    lines = []
+    while len(lines) < limit:
+        try:
+            item = job['lines'].get_nowait()
+        except queue.Empty:
+            return lines, False
+        if item is None:
+            return lines, True
+        lines.append(item)
+    return lines, False
+
+def print_line(stream, line):
+    """Print a line of command output to the matching stream of this process."""
+    print(line, file=sys.stderr if stream == 'stderr' else sys.stdout, flush=True)
+
+def run_streamed(command, cwd, shell=False, timeout=None, output=print_line, env=None):
+    """Run command to completion, passing each output line to output(stream, line) as it arrives.
+
+    Ctrl+C cancels the command before re-raising. Returns the job result.
+    """
+    job = start_command(command, cwd, shell, timeout, env)
+    try:
+        while True:
+            item = job['lines'].get()
+            if item is None:
+                return job['result']
+            output(*item)
+    except KeyboardInterrupt:
+        cancel_command(job)
+        job['process'].wait()
+        raise
+
+def result_outcome(result):
+    """Return how a job ended: 'timed out', 'cancelled' or 'exit status N'."""
+    if result['timed_out']:
+        return "timed out"
+    if result['cancelled']:
+        return "cancelled"
+    return f"exit status {result['returncode']}"
+
+def describe_result(result):
+    """Return a short description of how a job ended, e.g. 'exit status 0 after 12.3s'."""
+    return f"{result_outcome(result)} after {result['duration']:.1f}s"
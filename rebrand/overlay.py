@@ -0,0 +1,140 @@
+"""Transactional writes: every file the rebrand changes is staged in memory, then committed as one batch.
+
+An overlay is a dict {'files': {path: bytes}, 'spooled': {path: temporary
+file}}. The pipeline steps read through it (read_file) and stage their output
+in it (write_file) instead of writing to the tree, so a step that fails
+leaves the tree untouched. Files too large to hold in memory are written
+straight to a temporary file next to their target and staged as that file
+(spool_file, see stream.py). commit() then writes every staged file to a
+temporary file next to its target, fsyncs them all in one pass, and renames
+them into place. The originals are kept as backups (hardlinks where
+possible) until every rename went through; if anything fails, the backups
+are renamed back and the tree is exactly as it was before.
+
+A dry run never commits: print_diffs() shows what the commit would change,
+and discard() drops the staged changes.
+"""
+
+import difflib
+import os
+
+from .fileio import atomic_output, copy_file, remove_quietly, temp_file_next_to
+
+def new_overlay():
+    """Return an empty overlay."""
+    return {'files': {}, 'spooled': {}}
+
+def is_staged(overlay, path):
+    """Return True if path has staged content in overlay."""
+    return overlay is not None and (path in overlay['files'] or path in overlay['spooled'])
+
+def staged_paths(overlay):
+    """Return the sorted paths with staged content in overlay."""
+    return sorted(set(overlay['files']) | set(overlay['spooled']))
+
+def read_file(overlay, path):
+    """Return the bytes of path as the overlay sees them: staged content, else the file on disk."""
+    if overlay is not None and path in overlay['files']:
+        return overlay['files'][path]
+    with open(overlay['spooled'][path] if is_staged(overlay, path) else path, 'rb') as file:
+        return file.read()
+
+def write_file(overlay, path, data):
+    """Stage data as the new content of path."""
+    if path in overlay['spooled']:
+        remove_quietly(overlay['spooled'].pop(path))
+    overlay['files'][path] = data
+
+def spool_file(overlay, path, temp_path):
+    """Stage the already written temporary file temp_path (next to path) as the new content of path."""
+    overlay['files'].pop(path, None)
+    if path in overlay['spooled']:
+        remove_quietly(overlay['spooled'][path])
+    overlay['spooled'][path] = temp_path
+
+def discard(overlay):
+    """Drop every staged change, deleting the temporary files of spooled ones."""
+    for temp_path in overlay['spooled'].values():
+        remove_quietly(temp_path)
+    overlay['files'] = {}
+    overlay['spooled'] = {}
+
+def fsync_path(path, directory=False):
+    """Flush path (a file, or a directory entry list) to disk."""
+    if directory and os.name == 'nt':
+        return  # Directories cannot be opened for fsync on Windows
+    fd = os.open(path, os.O_RDONLY if directory else os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def backup_file(path):
+    """Keep the current file at path under a temporary name. Returns that name, or None if path does not exist."""
+    if not os.path.exists(path):
+        return None
+    backup = temp_file_next_to(path, '.bak')
+    os.unlink(backup)
+    try:
+        os.link(path, backup)
+    except OSError:
+        copy_file(path, backup)
+    return backup
+
+def commit(overlay):
+    """Write every staged file into place, all or nothing. Returns the committed paths.
+
+    On any error every file already renamed into place is restored from its
+    backup (or removed if it did not exist) before the error is re-raised.
+    """
+    temps = sorted(overlay['spooled'].items())  # (path, temporary file); spooled files are written already
+    backups = []  # (path, backup or None), in rename order
+    try:
+        for path, data in sorted(overlay['files'].items()):
+            with atomic_output(path, rename=False) as temp_path, open(temp_path, 'wb') as file:
+                temps.append((path, temp_path))
+                file.write(data)
+        for _, temp_path in temps:
+            fsync_path(temp_path)
+        for path, temp_path in temps:
+            backups.append((path, backup_file(path)))
+            os.replace(temp_path, path)
+        for directory in sorted({os.path.dirname(path) or '.' for path, _ in temps}):
+            fsync_path(directory, directory=True)
+    except BaseException:
+        for path, backup in reversed(backups):
+            if backup is not None:
+                os.replace(backup, path)
+                remove_quietly(backup)  # rename() is a no-op when both names link the same file
+            else:
+                remove_quietly(path)
+        for _, temp_path in temps:
+            remove_quietly(temp_path)
+        overlay['spooled'] = {}
+        raise
+    for _, backup in backups:
+        if backup is not None:
+            remove_quietly(backup)
+    overlay['files'] = {}
+    overlay['spooled'] = {}
+    return sorted(path for path, _ in temps)
+
+def print_diffs(overlay, base_directory):
+    """Print a unified diff of every staged file against the tree, without writing anything."""
+    for path in staged_paths(overlay):
+        data = read_file(overlay, path)
+        relative_path = os.path.relpath(path, base_directory).replace(os.sep, '/')
+        try:
+            with open(path, 'rb') as file:
+                old = file.read()
+        except FileNotFoundError:
+            old = b''
+        if old == data:
+            continue
+        if b'\0' in old[:8192] or b'\0' in data[:8192]:
+            print(f"Binary file {relative_path} would change ({len(old)} -> {len(data)} bytes)")
+            continue
+        old_lines = old.decode('utf-8', errors='replace').splitlines(keepends=True)
+        new_lines = data.decode('utf-8', errors='replace').splitlines(keepends=True)
+        for line in difflib.unified_diff(old_lines, new_lines, 'a/' + relative_path, 'b/' + relative_path):
+            print(line, end='' if line.endswith('\n') else '\n')
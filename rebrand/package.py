@@ -0,0 +1,143 @@
+"""Packaging: gather each brand's build artifacts into a zip archive in a release directory.
+
+Every brand's archive is written by one worker of a thread pool (zlib lets
+go of the GIL while it compresses, so the archives really are compressed in
+parallel). Each artifact is read once: the chunks go to the archive and to
+its SHA-256 at the same time.
+
+The release directory keeps a manifest (MANIFEST_FILE) of what it holds:
+per brand the archive, its hash and the build duration, and per artifact
+its name, size and SHA-256 (plus the mtime it was hashed at). A brand whose
+artifacts all still have the hashes the manifest records, and whose archive
+is still there, is not packaged again. Artifacts whose size and mtime are
+unchanged are not even read to find that out.
+"""
+
+import hashlib
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .fileio import atomic_output, replace_file
+from .state import sha256_file
+
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_VERSION = 1
+CHUNK_SIZE = 1 << 20
+
+def load_manifest(release_dir):
+    """Load the manifest of release_dir, or an empty one if missing or unreadable."""
+    try:
+        with open(os.path.join(release_dir, MANIFEST_FILE), 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {'version': MANIFEST_VERSION, 'brands': {}}
+    if manifest.get('version') != MANIFEST_VERSION or not isinstance(manifest.get('brands'), dict):
+        return {'version': MANIFEST_VERSION, 'brands': {}}
+    return manifest
+
+def save_manifest(release_dir, manifest):
+    """Write the manifest of release_dir."""
+    data = json.dumps(manifest, indent=2, sort_keys=True) + '\n'
+    replace_file(os.path.join(release_dir, MANIFEST_FILE), data.encode('utf-8'))
+
+def artifact_names(name, paths):
+    """Return [(path, name inside the archive)]: every artifact under a folder named after the brand."""
+    names = [(path, f"{name}/{os.path.basename(path)}") for path in paths]
+    seen = set()
+    for path, arcname in names:
+        if arcname in seen:
+            raise ValueError(f"Two artifacts of {name} are both named {os.path.basename(path)}")
+        seen.add(arcname)
+    return names
+
+def artifact_hash(path, recorded):
+    """Return (size, mtime_ns, SHA-256) of path, reusing the hash recorded for it when size and mtime match."""
+    st = os.stat(path)
+    if recorded and recorded.get('size') == st.st_size and recorded.get('mtime_ns') == st.st_mtime_ns:
+        return st.st_size, st.st_mtime_ns, recorded['sha256']
+    return st.st_size, st.st_mtime_ns, sha256_file(path)
+
+def write_archive(archive_path, files, compresslevel=6):
+    """Write files ([(path, name inside the archive)]) to a new zip at archive_path.
+
+    Each file is read once, in chunks, feeding both the compressor and its
+    SHA-256. Returns {name inside the archive: (size, mtime_ns, SHA-256)}.
+    """
+    hashes = {}
+    with atomic_output(archive_path) as temp_path, zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED,
+                                                                    compresslevel=compresslevel) as archive:
+        for path, arcname in files:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as source:
+                st = os.fstat(source.fileno())
+                info = zipfile.ZipInfo.from_file(path, arcname)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with archive.open(info, 'w', force_zip64=st.st_size >= zipfile.ZIP64_LIMIT) as target:
+                    for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                        digest.update(chunk)
+                        target.write(chunk)
+            hashes[arcname] = (st.st_size, st.st_mtime_ns, digest.hexdigest())
+    return hashes
+
+def package_brand(release_dir, name, paths, build_seconds, previous, compresslevel=6):
+    """Package one brand's artifacts unless its archive is up to date. Returns (manifest entry, packaged)."""
+    files = artifact_names(name, paths)
+    archive = name + '.zip'
+    archive_path = os.path.join(release_dir, archive)
+    recorded = {entry['file']: entry for entry in (previous or {}).get('files', [])}
+
+    unchanged = (previous is not None and previous.get('archive') == archive and os.path.isfile(archive_path)
+                 and os.path.getsize(archive_path) == previous.get('archive_size')
+                 and set(recorded) == {arcname for _, arcname in files})
+    if unchanged:
+        hashes = {arcname: artifact_hash(path, recorded[arcname]) for path, arcname in files}
+        unchanged = all(hashes[arcname][2] == recorded[arcname]['sha256'] for arcname in hashes)
+    if unchanged:
+        entry = dict(previous, files=[dict(recorded[arcname], size=size, mtime_ns=mtime_ns)
+                                      for arcname, (size, mtime_ns, _) in sorted(hashes.items())])
+        if build_seconds is not None:
+            entry['build_seconds'] = build_seconds
+        return entry, False
+
+    hashes = write_archive(archive_path, files, compresslevel)
+    entry = {
+        'archive': archive,
+        'archive_sha256': sha256_file(archive_path),
+        'archive_size': os.path.getsize(archive_path),
+        'build_seconds': build_seconds,
+        'files': [{'file': arcname, 'size': size, 'mtime_ns': mtime_ns, 'sha256': digest}
+                  for arcname, (size, mtime_ns, digest) in sorted(hashes.items())],
+    }
+    return entry, True
+
+def package_brands(brands, release_dir, jobs=None, compresslevel=6):
+    """Package every brand into release_dir and update its manifest.
+
+    brands is a list of (name, artifact paths, build duration in seconds or
+    None). Archives are written on a pool of up to jobs threads (None: one
+    per CPU). Brands packaged earlier and not listed keep their manifest
+    entries. Returns the manifest.
+    """
+    os.makedirs(release_dir, exist_ok=True)
+    manifest = load_manifest(release_dir)
+    started = time.perf_counter()
+    packaged = 0
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1, thread_name_prefix='package') as executor:
+        futures = {executor.submit(package_brand, release_dir, name, paths, build_seconds,
+                                   manifest['brands'].get(name), compresslevel): name
+                   for name, paths, build_seconds in brands}
+        for future in as_completed(futures):
+            name = futures[future]
+            entry, changed = future.result()
+            manifest['brands'][name] = entry
+            packaged += changed
+            size = sum(file['size'] for file in entry['files'])
+            outcome = f"packaged into {entry['archive']} ({entry['archive_size'] / (1 << 20):.1f} MiB)" if changed else "unchanged"
+            print(f"[{name}] {len(entry['files'])} artifacts, {size / (1 << 20):.1f} MiB: {outcome}")
+    save_manifest(release_dir, manifest)
+    print(f"Packaged {packaged} of {len(brands)} brands into {release_dir} in {time.perf_counter() - started:.2f}s "
+          f"({len(brands) - packaged} unchanged)")
+    return manifest
@@ -0,0 +1,127 @@
+"""Declarative table of the edits the rebrand applies to a RustDesk source tree.
+
+Paths are relative to the source root and use '/' separators. Each 'line' is a
+str.format template filled from the brand profile (see build_patches). Edits
+with 'requires' are only kept when that profile value is set.
+"""
+
+import os
+
+REBRAND_PATCHES = {
+    'libs/hbb_common/src/config.rs': [
+        {'op': 'replace_line', 'find': 'pub static ref APP_NAME: RwLock<String> = RwLock::new(', 'first': False,
+         'line': 'pub static ref APP_NAME: RwLock<String> = RwLock::new("{app_name}".to_owned());'},
+        {'op': 'replace_line', 'find': 'pub const PUBLIC_RS_PUB_KEY: &str =', 'first': False,
+         'line': 'pub const PUBLIC_RS_PUB_KEY: &str = "{pub_key}";'},
+        {'op': 'replace_line', 'find': 'pub static ref PROD_RENDEZVOUS_SERVER: RwLock<String> = RwLock::new(match option_env!("RENDEZVOUS_SERVER") {',
+         'offset': 2, 'expect': '_ => "', 'first': False,
+         'line': '    _ => "{rendezvous_server}",'},
+        {'op': 'replace_line', 'find': '128x128 on 160x160 canvas', 'offset': 1, 'expect': 'pub const ICON: &str =',
+         'requires': 'icon_base64_mac', 'line': 'pub const ICON: &str = "data:image/png;base64,{icon_base64_mac}";'},
+        {'op': 'replace_line', 'find': '128x128 no padding', 'offset': 1, 'expect': 'pub const ICON: &str =',
+         'requires': 'icon_base64', 'line': 'pub const ICON: &str = "data:image/png;base64,{icon_base64}";'},
+    ],
+    'src/ui.rs': [
+        # The two icon literals returned by get_icon(): padded for macOS, unpadded elsewhere
+        {'op': 'replace_line', 'find': '128x128 on 160x160 canvas', 'offset': 2, 'expect': '"data:image/png;base64,',
+         'requires': 'icon_base64_mac', 'line': '        "data:image/png;base64,{icon_base64_mac}".into()'},
+        {'op': 'replace_line', 'find': '128x128 no padding', 'offset': 2, 'expect': '"data:image/png;base64,',
+         'requires': 'icon_base64', 'line': '        "data:image/png;base64,{icon_base64}".into()'},
+    ],
+    'build.py': [
+        {'op': 'replace_line', 'find': 'app_name', 'line': "app_name = '{app_name}'"},
+    ],
+    'Cargo.toml': [
+        {'op': 'toml_set', 'section': 'package', 'key': 'name', 'line': 'name = "{app_name}"'},
+        {'op': 'toml_set', 'section': 'package', 'key': 'default-run', 'line': 'default-run = "{app_name}"'},
+        {'op': 'toml_set', 'section': 'package', 'key': 'description', 'requires': 'description',
+         'line': 'description = "{description}"'},
+        {'op': 'toml_set', 'section': 'package.metadata.winres', 'key': 'ProductName', 'line': 'ProductName = "{app_name}"'},
+        {'op': 'toml_set', 'section': 'package.metadata.winres', 'key': 'OriginalFilename',
+         'line': 'OriginalFilename = "{app_name_lower}.exe"'},
+        {'op': 'toml_set', 'section': 'package.metadata.winres', 'key': 'FileDescription', 'requires': 'description',
+         'line': 'FileDescription = "{description}"'},
+        {'op': 'toml_set', 'section': 'features', 'key': 'default', 'line': 'default = ["use_dasp", "inline"]'},
+    ],
+    'flutter/lib/models/native_model.dart': [
+        {'op': 'replace_line', 'find': 'class NativeModel', 'offset': 1, 'expect': 'appName',
+         'line': "  final String appName = '{app_name}';"},
+    ],
+    'flutter/lib/models/platform_model.dart': [
+        {'op': 'replace_line', 'find': 'class PlatformModel', 'offset': 1, 'expect': 'appName',
+         'line': "  final String appName = '{app_name}';"},
+    ],
+    'flutter/lib/models/web_model.dart': [
+        {'op': 'replace_line', 'find': 'class WebModel', 'offset': 1, 'expect': 'appName',
+         'line': "  final String appName = '{app_name}';"},
+    ],
+    'flutter/lib/web/bridge.dart': [
+        {'op': 'replace_line', 'find': 'class Bridge', 'offset': 1, 'expect': 'appName',
+         'line': "  final String appName = '{app_name}';"},
+    ],
+    'flutter/windows/CMakeLists.txt': [
+        {'op': 'replace_line', 'find': 'set(PROJECT_NAME', 'line': 'set(PROJECT_NAME "{app_name}")'},
+    ],
+    'flutter/windows/runner/main.cpp': [
+        {'op': 'replace_line', 'find': 'setAppName', 'line': '    setAppName("{app_name}");'},
+    ],
+    'flutter/windows/runner/Runner.rc': [
+        {'op': 'replace_line', 'find': 'FileVersion', 'first': False,
+         'line': '            VALUE "FileVersion", "1.0.0.0" "\\0"'},
+        {'op': 'replace_line', 'find': 'ProductVersion', 'first': False,
+         'line': '            VALUE "ProductVersion", "1.0.0.0" "\\0"'},
+        {'op': 'replace_line', 'find': 'ProductName', 'first': False,
+         'line': '            VALUE "ProductName", "{app_name}" "\\0"'},
+        {'op': 'replace_line', 'find': 'InternalName', 'first': False,
+         'line': '            VALUE "InternalName", "{app_name_lower}" "\\0"'},
+        {'op': 'replace_line', 'find': 'OriginalFilename', 'first': False,
+         'line': '            VALUE "OriginalFilename", "{app_name_lower}.exe" "\\0"'},
+    ],
+    'libs/portable/Cargo.toml': [
+        {'op': 'toml_set', 'section': 'package.metadata.winres', 'key': 'ProductName', 'line': 'ProductName = "{app_name}"'},
+        {'op': 'toml_set', 'section': 'package.metadata.winres', 'key': 'OriginalFilename',
+         'line': 'OriginalFilename = "{app_name_lower}.exe"'},
+    ],
+    'res/rustdesk.desktop': [
+        {'op': 'replace_line', 'find': 'Name=', 'line': 'Name={app_name}'},
+    ],
+    'res/rustdesk.service': [
+        {'op': 'replace_line', 'find': 'Description=', 'line': 'Description={app_name} Service'},
+    ],
+    'src/client.rs': [
+        # Comment out the TCP connection security section
+        {'op': 'comment_block', 'start': 'if !key.is_empty() && !token.is_empty() {'},
+    ],
+    'libs/portable/generate.py': [
+        {'op': 'replace_line', 'find': 'executable_name', 'requires': 'executable_name',
+         'line': "executable_name = '{executable_name}'"},
+    ],
+}
+
+def profile_values(profile):
+    """Return the template values for a brand profile dict, including derived ones."""
+    values = dict(profile)
+    values['app_name_lower'] = profile['app_name'].lower()
+    return values
+
+def build_patches(profile, table=REBRAND_PATCHES):
+    """Fill the patch table from a brand profile.
+
+    Returns {native relative path: [edits]}, leaving out edits whose required
+    profile value is missing and files left with no edits.
+    """
+    values = profile_values(profile)
+    patches = {}
+    for relative_path, edits in table.items():
+        filled = []
+        for edit in edits:
+            requires = edit.get('requires')
+            if requires and values.get(requires) is None:
+                continue
+            edit = dict(edit)
+            if 'line' in edit:
+                edit['line'] = edit['line'].format(**values)
+            filled.append(edit)
+        if filled:
+            patches[relative_path.replace('/', os.sep)] = filled
+    return patches
@@ -0,0 +1,287 @@
+"""Headless rebrand pipeline: runs every update step against a RustDesk checkout."""
+
+import os
+import sys
+import threading
+
+from .downloads import finish_download, sciter_dll_in_background
+from .engine import apply_patches
+from .icons import ICON_FILES, get_icons, icon_key
+from .jobs import describe_result, run_streamed
+from .overlay import commit, discard, new_overlay, print_diffs, staged_paths, write_file
+from .patches import build_patches
+from .rename import DEFAULT_GLOBS, rename_strings
+from .state import (STATE_VERSION, inputs_key, is_current, load_state, make_entry, refresh_entries, save_state,
+                    state_key)
+from .stepcache import INLINE_SCITER_OUTPUT, restore_inline_sciter, save_inline_sciter
+from .trace import span
+
+# Files the pipeline writes whole (relative to the source root), besides the patch table targets
+GENERATED_FILES = tuple(ICON_FILES) + (
+    'sciter.dll',
+    INLINE_SCITER_OUTPUT,  # written by res/inline-sciter.py
+)
+
+# Name of the inline-sciter.py post-update command
+INLINE_SCITER_STEP = 'inline-sciter.py'
+
+# Pipeline steps in order, with their share (percent) of the overall progress
+PROGRESS_STEPS = [
+    ('icons', 10),
+    ('rename', 10),
+    ('patches', 40),
+    ('sciter', 10),
+    ('commands', 30),
+]
+
+def report(progress, step, fraction, file=None, size=0):
+    """Send a progress event for step, fraction (0-1) of the way through it, to progress if set.
+
+    Events are dicts with 'step', 'file', 'bytes' and 'percent' (of the whole pipeline).
+    """
+    if not progress:
+        return
+    start = 0
+    for name, weight in PROGRESS_STEPS:
+        if name == step:
+            break
+        start += weight
+    progress({'step': step, 'file': file, 'bytes': size, 'percent': start + weight * fraction})
+
+def validate_inputs(source_dir, app_name, pub_key, rendezvous_server, icon_png):
+    """Raise ValueError if any required rebrand input is missing or invalid."""
+    if not source_dir or not os.path.isdir(source_dir):
+        raise ValueError(f"RustDesk source directory not found: {source_dir}")
+    if not app_name or not pub_key or not rendezvous_server:
+        raise ValueError("App name, public key, and rendezvous server cannot be empty.")
+    if not icon_png or not os.path.isfile(icon_png):
+        raise ValueError(f"Icon PNG image not found: {icon_png}")
+
+def normalize_inputs(source_dir, app_name, pub_key, rendezvous_server, icon_png):
+    """Strip the text inputs and validate them all (see validate_inputs). Returns (app_name, pub_key, rendezvous_server)."""
+    app_name = app_name.strip() if app_name else app_name
+    pub_key = pub_key.strip() if pub_key else pub_key
+    rendezvous_server = rendezvous_server.strip() if rendezvous_server else rendezvous_server
+    validate_inputs(source_dir, app_name, pub_key, rendezvous_server, icon_png)
+    return app_name, pub_key, rendezvous_server
+
+def post_update_commands(source_dir, inline_sciter=True, command=None, step_cache=True):
+    """Return the commands to run once the files are updated, as (name, command, shell) tuples.
+
+    These are res/inline-sciter.py (regenerates the inlined UI resources) and
+    the user's command, typically a cargo build. With step_cache, an
+    inline-sciter.py whose inputs are unchanged is left out and its cached
+    output restored instead (see stepcache.py); whoever runs the commands
+    passes each result to record_post_update() so new outputs get cached.
+    """
+    commands = []
+    if inline_sciter:
+        inline_sciter_path = os.path.join(source_dir, 'res', 'inline-sciter.py')
+        if not os.path.isfile(inline_sciter_path):
+            print(f"The file '{inline_sciter_path}' was not found. Please check the file path.")
+        elif step_cache and restore_inline_sciter(source_dir):
+            print(f"UI resources unchanged; restored {INLINE_SCITER_OUTPUT} from the step cache instead of running {INLINE_SCITER_STEP}")
+        else:
+            commands.append((INLINE_SCITER_STEP, [sys.executable, inline_sciter_path], False))
+    if command and command.strip():
+        commands.append((command.strip(), command.strip(), True))
+    return commands
+
+def record_post_update(source_dir, name, result):
+    """Cache the output of a post-update command that succeeded, if it is a cacheable step."""
+    if name == INLINE_SCITER_STEP and result['returncode'] == 0:
+        save_inline_sciter(source_dir)
+
+def run_post_update(source_dir, commands, timeout=None, progress=None):
+    """Run post_update_commands() one after another, streaming their output as it is produced.
+
+    timeout (seconds) applies to each command. Returns the job results (see jobs.py).
+    """
+    results = []
+    for done, (name, command, shell) in enumerate(commands):
+        report(progress, 'commands', done / len(commands), name)
+        print(f"Running command: '{name}' in directory: {source_dir}")
+        with span('command', command=name) as record:
+            result = run_streamed(command, source_dir, shell=shell, timeout=timeout)
+            record['returncode'] = result['returncode']
+        result['name'] = name
+        results.append(result)
+        record_post_update(source_dir, name, result)
+        if result['returncode'] == 0:
+            print(f"Command '{name}' executed successfully ({describe_result(result)}).")
+        else:
+            print(f"Error in executing command '{name}': {describe_result(result)}")
+    report(progress, 'commands', 1)
+    return results
+
+def write_icons(source_dir, key, rendered, state, overlay, progress=None):
+    """Stage the rendered icon files (res/icon.ico, res/tray-icon.ico, the PNG set) in overlay.
+
+    Files the manifest shows were already made from this image (key) are skipped.
+    """
+    with span('icons.write', files=0, bytes_written=0) as record:
+        for done, name in enumerate(ICON_FILES, 1):
+            icon_destination_path = os.path.join(source_dir, *name.split('/'))
+            if is_current(state['files'].get(name), icon_destination_path, key):
+                print(f"Up to date: {name}")
+            else:
+                write_file(overlay, icon_destination_path, rendered[name])
+                state['files'][name] = make_entry(icon_destination_path, key, rendered[name], staged=True)
+                record['files'] += 1
+                record['bytes_written'] += len(rendered[name])
+                print(f"Converted and saved icon to '{icon_destination_path}'")
+            report(progress, 'icons', done / len(ICON_FILES), name, len(rendered[name]))
+
+def rebrand(source_dir, app_name, pub_key, rendezvous_server, icon_png,
+            executable_name=None, description=None, command=None,
+            download_sciter=True, inline_sciter=True, jobs=None, force=False,
+            offline=False, sciter_sha256=None, rename=None, rename_globs=None,
+            command_timeout=None, progress=None, dry_run=False):
+    """Rebrand the RustDesk checkout at source_dir without any GUI interaction.
+
+    jobs caps the number of files patched concurrently (1 patches them one
+    after another). Files recorded as already branded in the tree's
+    .rebrand-state.json are skipped unless force is set, which also reruns
+    inline-sciter.py even when its cached output could be restored. offline
+    serves sciter.dll from the download cache only; sciter_sha256 pins its
+    checksum.
+    rename maps leftover strings to their replacements (e.g. {'RustDesk':
+    app_name}) across the files matching rename_globs (see rename.py).
+    command_timeout (seconds) stops inline-sciter.py or the command if it
+    runs longer. progress, if given, is called with a progress event dict
+    (see report) as the steps advance, from the calling thread.
+
+    Every file change is staged in memory and committed at once after the
+    last step succeeded (see overlay.py), so a failure leaves the tree as
+    it was. dry_run prints the staged changes as unified diffs instead and
+    stops there: nothing is written, downloaded or run.
+
+    Returns the results of the post-update commands (see jobs.py). Raises
+    ValueError for invalid inputs and FileNotFoundError when the tree is
+    missing the res/ directory.
+    """
+    app_name, pub_key, rendezvous_server = normalize_inputs(source_dir, app_name, pub_key, rendezvous_server, icon_png)
+
+    # Fetch sciter.dll into the download cache in the background while the files are patched;
+    # it reaches the tree only with the commit below
+    sciter_download = None
+    if download_sciter and not dry_run:
+        sciter_download = sciter_dll_in_background(None, offline, sciter_sha256)
+
+    state = load_state(source_dir) if not force else {'version': STATE_VERSION, 'files': {}}
+    try:
+        overlay, profile_key = stage_rebrand(source_dir, app_name, pub_key, rendezvous_server, icon_png, state,
+                                             executable_name, description, jobs, rename, rename_globs, progress)
+    except BaseException:
+        if sciter_download:
+            sciter_download.cancel()  # A download already running only fills the cache
+        raise
+
+    if dry_run:
+        print_diffs(overlay, source_dir)
+        print(f"Dry run: {len(staged_paths(overlay))} files would be written")
+        discard(overlay)
+        return []
+
+    # Join point: sciter.dll is staged with everything else
+    with span('sciter.wait'):
+        cached = sciter_download and finish_download(sciter_download)
+    if cached:
+        sciter_dll_destination = os.path.join(source_dir, 'sciter.dll')
+        with open(cached, 'rb') as file:
+            write_file(overlay, sciter_dll_destination, file.read())
+        print(f"Downloaded sciter.dll to {sciter_dll_destination}.")
+        report(progress, 'sciter', 1, 'sciter.dll', os.path.getsize(cached))
+    else:
+        report(progress, 'sciter', 1)
+
+    # Everything is staged; write it all or nothing
+    with span('commit', files=len(staged_paths(overlay))):
+        committed = commit(overlay)
+    print(f"Committed {len(committed)} files")
+    refresh_entries(source_dir, state)
+    state['profile'] = profile_key
+    save_state(source_dir, state)
+
+    # Execute the inline-sciter.py script and the user's command after updating files
+    commands = post_update_commands(source_dir, inline_sciter, command, step_cache=not force)
+    return run_post_update(source_dir, commands, command_timeout, progress)
+
+def brand_profile(app_name, pub_key, rendezvous_server, icons, executable_name=None, description=None):
+    """Return the profile dict the patch table is filled from (see patches.build_patches)."""
+    return {
+        'app_name': app_name,
+        'pub_key': pub_key,
+        'rendezvous_server': rendezvous_server,
+        'description': description.strip() if description is not None else None,
+        'executable_name': executable_name.strip() if executable_name and executable_name.strip() else None,
+        'icon_base64': icons['icon_base64'],
+        'icon_base64_mac': icons['icon_base64_mac'],
+    }
+
+def stage_rebrand(source_dir, app_name, pub_key, rendezvous_server, icon_png, state,
+                  executable_name=None, description=None, jobs=None, rename=None, rename_globs=None, progress=None):
+    """Run the file steps of rebrand() (icons, string rename, patch table) with every change staged.
+
+    Inputs are as for rebrand(), already validated. Files state shows are
+    up to date are skipped and state['files'] is updated. Returns (overlay,
+    profile key): the staged changes (see overlay.py) and the hash of the
+    brand profile the patches were filled from.
+    """
+    # Copy the selected icon to the RustDesk res directory as icon.ico and tray-icon
+    res_dir = os.path.join(source_dir, 'res')
+    if not os.path.exists(res_dir):
+        raise FileNotFoundError(f"The resource directory '{res_dir}' does not exist.")
+
+    with span('icons.render', bytes_read=os.path.getsize(icon_png)):
+        icon_hash = icon_key(icon_png)
+        icons = get_icons(icon_png, icon_hash)
+    overlay = new_overlay()
+    write_icons(source_dir, icon_hash, icons, state, overlay, progress)
+
+    # Tree-wide string rewrite first, so the patch manifest records the final content
+    if rename:
+        with span('rename') as record:
+            changed = rename_strings(source_dir, rename, rename_globs or DEFAULT_GLOBS, jobs=jobs, overlay=overlay)
+            record['files'] = len(changed)
+    report(progress, 'rename', 1)
+
+    # Apply every file edit, one read and one write per file
+    profile = brand_profile(app_name, pub_key, rendezvous_server, icons, executable_name, description)
+    def patched(relative_path, done, total):
+        size = state['files'].get(state_key(relative_path), {}).get('size', 0)
+        report(progress, 'patches', done / total, relative_path, size)
+
+    with span('patches') as record:
+        patches = build_patches(profile)
+        try:
+            apply_patches(source_dir, patches, jobs=jobs, state=state, progress=patched, overlay=overlay)
+        except BaseException:
+            discard(overlay)  # Streamed files are staged as temporary files in the tree
+            raise
+        record['files'] = len(patches)
+    return overlay, inputs_key(profile)
+
+def rebrand_in_background(events, *args, then=None, **kwargs):
+    """Run rebrand(*args, **kwargs) on a worker thread, putting its progress events on the events queue.
+
+    The last event has step 'done' (with the rebrand() return value as
+    'result') or 'error' (with the exception as 'error'). then, if given, is
+    called on the worker with the rebrand() return value once it succeeded,
+    and its return value is the 'result' instead; slow follow-up work (such
+    as post_update_commands(), which hashes the tree) belongs there rather
+    than on the caller's thread. Returns the thread.
+    """
+    def run():
+        try:
+            result = rebrand(*args, progress=events.put, **kwargs)
+            if then:
+                result = then(result)
+        except Exception as e:
+            events.put({'step': 'error', 'file': None, 'bytes': 0, 'percent': 100, 'error': e})
+        else:
+            events.put({'step': 'done', 'file': None, 'bytes': 0, 'percent': 100, 'result': result})
+
+    thread = threading.Thread(target=run, name='rebrand', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,178 @@
+"""Patch plans: the rebrand of one source revision for one brand, compiled into byte splices.
+
+For a given upstream tree and brand profile the file changes are fully
+determined. compile_plan() runs the file steps once (icons, string rename,
+patch table) without touching the tree and records, for every file they
+change, its SHA-256 before and after and the byte ranges to replace with
+their replacement bytes. apply_plan() then only checks each file's pre-image
+hash and splices the bytes in: no marker scan, no line parsing, no icon
+rendering. One machine can compile plans that many build agents apply.
+
+A plan is JSON: 'source' hashes the pre-images of every planned file,
+'profile' the brand profile; each file lists 'splices' of [start, end) byte
+ranges with their 'text' (or 'base64' for binary content). The manifest
+entries of the compile run travel along, so 'run' stays incremental on a
+tree the plan was applied to.
+"""
+
+import base64
+import difflib
+import json
+import os
+
+from .overlay import commit, discard, new_overlay, print_diffs, read_file, staged_paths, write_file
+from .pipeline import normalize_inputs, stage_rebrand
+from .state import STATE_VERSION, inputs_key, load_state, refresh_entries, save_state, sha256_bytes, state_key
+
+PLAN_VERSION = 1
+
+def byte_splices(old, new):
+    """Return [start, end, replacement] splices that turn old into new (bytes), computed on lines.
+
+    Only the lines between the first and the last difference are diffed, so
+    a few edits in a large generated file stay cheap.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    shorter = min(len(old_lines), len(new_lines))
+    prefix = 0
+    while prefix < shorter and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < shorter - prefix and old_lines[-suffix - 1] == new_lines[-suffix - 1]:
+        suffix += 1
+    old_offsets = [sum(len(line) for line in old_lines[:prefix])]
+    for line in old_lines[prefix:len(old_lines) - suffix]:
+        old_offsets.append(old_offsets[-1] + len(line))
+    splices = []
+    matcher = difflib.SequenceMatcher(None, old_lines[prefix:len(old_lines) - suffix],
+                                      new_lines[prefix:len(new_lines) - suffix], autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != 'equal':
+            splices.append([old_offsets[i1], old_offsets[i2], b''.join(new_lines[prefix + j1:prefix + j2])])
+    return splices
+
+def encode_splice(start, end, replacement):
+    """Return the JSON form of a splice."""
+    try:
+        return {'start': start, 'end': end, 'text': replacement.decode('utf-8')}
+    except UnicodeDecodeError:
+        return {'start': start, 'end': end, 'base64': base64.b64encode(replacement).decode('ascii')}
+
+def decode_splice(splice):
+    """Return (start, end, replacement bytes) of a splice in JSON form."""
+    if 'text' in splice:
+        return splice['start'], splice['end'], splice['text'].encode('utf-8')
+    return splice['start'], splice['end'], base64.b64decode(splice['base64'])
+
+def compile_plan(source_dir, app_name, pub_key, rendezvous_server, icon_png,
+                 executable_name=None, description=None, jobs=None, rename=None, rename_globs=None):
+    """Compile the rebrand of the tree at source_dir into a plan dict, leaving the tree untouched.
+
+    Arguments are as for pipeline.rebrand(). Every file is planned, whatever
+    the tree's manifest says.
+    """
+    app_name, pub_key, rendezvous_server = normalize_inputs(source_dir, app_name, pub_key, rendezvous_server, icon_png)
+
+    state = {'version': STATE_VERSION, 'files': {}}
+    overlay, profile_key = stage_rebrand(source_dir, app_name, pub_key, rendezvous_server, icon_png, state,
+                                         executable_name, description, jobs, rename, rename_globs)
+    files = []
+    for path in staged_paths(overlay):
+        data = read_file(overlay, path)
+        relative_path = state_key(os.path.relpath(path, source_dir))
+        try:
+            with open(path, 'rb') as file:
+                old = file.read()
+        except FileNotFoundError:
+            old = None
+        if old == data:
+            continue
+        files.append({
+            'path': relative_path,
+            'pre_sha256': sha256_bytes(old) if old is not None else None,
+            'post_sha256': sha256_bytes(data),
+            'splices': [encode_splice(*splice) for splice in byte_splices(old or b'', data)],
+        })
+    discard(overlay)
+    return {
+        'version': PLAN_VERSION,
+        'source': inputs_key({entry['path']: entry['pre_sha256'] for entry in files}),
+        'profile': profile_key,
+        'files': files,
+        # Manifest entries of the planned files; their mtime is taken on the tree the plan is applied to
+        'state': {entry['path']: dict(state['files'][entry['path']], mtime_ns=None)
+                  for entry in files if entry['path'] in state['files']},
+    }
+
+def save_plan(path, plan):
+    """Write a plan to path as JSON."""
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(plan, file, indent=1, sort_keys=True)
+        file.write('\n')
+    splices = sum(len(entry['splices']) for entry in plan['files'])
+    print(f"Wrote plan for {len(plan['files'])} files ({splices} splices) to {path}")
+
+def load_plan(path):
+    """Load a plan written by save_plan()."""
+    with open(path, 'r', encoding='utf-8') as file:
+        plan = json.load(file)
+    if not isinstance(plan, dict) or plan.get('version') != PLAN_VERSION:
+        raise ValueError(f"{path} is not a patch plan of version {PLAN_VERSION}")
+    return plan
+
+def splice(data, splices):
+    """Return data with the (start, end, replacement) splices applied; splices are sorted and disjoint."""
+    pieces = []
+    copied = 0
+    for start, end, replacement in splices:
+        pieces.append(data[copied:start])
+        pieces.append(replacement)
+        copied = end
+    pieces.append(data[copied:])
+    return b''.join(pieces)
+
+def apply_plan(plan, target_dir, dry_run=False):
+    """Apply a plan to the tree at target_dir, all files or none.
+
+    Files already holding their planned content are skipped. Raises
+    ValueError, writing nothing, if any other file differs from the
+    pre-image the plan was compiled against. Returns the number of files
+    written (or that would be, with dry_run).
+    """
+    overlay = new_overlay()
+    mismatched = []
+    for entry in plan['files']:
+        path = os.path.join(target_dir, *entry['path'].split('/'))
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            data = None
+        digest = sha256_bytes(data) if data is not None else None
+        if digest == entry['post_sha256']:
+            continue
+        if digest != entry['pre_sha256']:
+            mismatched.append(entry['path'])
+            continue
+        new_data = splice(data or b'', [decode_splice(splice_entry) for splice_entry in entry['splices']])
+        if sha256_bytes(new_data) != entry['post_sha256']:
+            raise ValueError(f"Plan entry for {entry['path']} is corrupt: spliced content does not match post_sha256")
+        write_file(overlay, path, new_data)
+    if mismatched:
+        raise ValueError(f"{len(mismatched)} files differ from the source the plan was compiled against: "
+                         + ", ".join(mismatched))
+
+    if dry_run:
+        print_diffs(overlay, target_dir)
+        print(f"Dry run: {len(overlay['files'])} files would be written")
+        return len(overlay['files'])
+
+    committed = commit(overlay)
+    state = load_state(target_dir)
+    state['files'].update(plan['state'])
+    refresh_entries(target_dir, state)
+    state['profile'] = plan['profile']
+    save_state(target_dir, state)
+    print(f"Applied plan: {len(committed)} files written, {len(plan['files']) - len(committed)} already up to date")
+    return len(committed)
@@ -0,0 +1,178 @@
+"""Tree-wide string rewrite: replace leftover names (e.g. 'RustDesk') in localization, res/ and flutter/ files.
+
+The patch table only touches known lines of known files. This stage instead
+walks every file matching a set of globs and replaces whole-word occurrences
+of each old string in one regex pass over the raw bytes. Files are spread
+over a process pool that only computes the new content; the calling process
+writes it (or stages it, see overlay.py). Binary files and vendored or build
+directories are skipped, and files without a hit are never written.
+"""
+
+import functools
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .fileio import replace_file
+from .overlay import is_staged, read_file, write_file
+
+# Relative to the source root, '/' separated. '*' stays within a directory, '**' crosses them.
+DEFAULT_GLOBS = ('src/lang/*.rs', 'res/**', 'flutter/**')
+
+# Directories never descended into: VCS metadata, build output and vendored dependencies
+SKIP_DIRS = {'.git', 'target', 'build', '.dart_tool', '.pub-cache', 'ephemeral', 'node_modules', 'Pods', 'vendor', 'third_party'}
+
+BINARY_EXTENSIONS = {'.png', '.ico', '.icns', '.jpg', '.jpeg', '.gif', '.webp', '.ttf', '.otf', '.woff', '.woff2',
+                     '.dll', '.so', '.dylib', '.exe', '.a', '.lib', '.jar', '.zip', '.gz', '.mp3', '.wav'}
+
+# Files with fewer candidates than this are rewritten in-process; a pool costs more than it saves
+POOL_THRESHOLD = 64
+
+def glob_regex(pattern):
+    """Translate a '/' separated glob into a regex matching relative paths."""
+    parts = re.split(r'(\*\*/?|\*|\?)', pattern)
+    regex = ''
+    for part in parts:
+        if part in ('**', '**/'):
+            regex += '.*'
+        elif part == '*':
+            regex += '[^/]*'
+        elif part == '?':
+            regex += '[^/]'
+        else:
+            regex += re.escape(part)
+    return re.compile(regex + r'\Z')
+
+def glob_root(pattern):
+    """Return the leading directories of pattern that contain no wildcard."""
+    parts = pattern.split('/')[:-1]
+    root = []
+    for part in parts:
+        if any(char in part for char in '*?['):
+            break
+        root.append(part)
+    return '/'.join(root)
+
+def find_files(source_dir, globs=DEFAULT_GLOBS):
+    """Return the sorted relative paths under source_dir that match any of globs.
+
+    Only the fixed leading directories of the globs are walked, and SKIP_DIRS
+    and files with a BINARY_EXTENSIONS suffix are left out.
+    """
+    regexes = [glob_regex(pattern) for pattern in globs]
+    roots = {glob_root(pattern) for pattern in globs}
+    # A root inside another root would be walked twice
+    roots = [root for root in roots if not any(other != root and (other == '' or root.startswith(other + '/')) for other in roots)]
+
+    found = set()
+    for root in roots:
+        top = os.path.join(source_dir, *root.split('/')) if root else source_dir
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames[:] = [name for name in dirnames if name not in SKIP_DIRS]
+            relative_dir = os.path.relpath(dirpath, source_dir).replace(os.sep, '/')
+            for name in filenames:
+                if os.path.splitext(name)[1].lower() in BINARY_EXTENSIONS:
+                    continue
+                relative_path = name if relative_dir == '.' else relative_dir + '/' + name
+                if any(regex.match(relative_path) for regex in regexes):
+                    found.add(relative_path)
+    return sorted(found)
+
+@functools.lru_cache(maxsize=None)
+def compile_replacements(replacements):
+    """Compile a tuple of (old, new) string pairs into one bytes regex and a bytes lookup table.
+
+    Old strings match as whole words when they start or end with a word
+    character, so 'RustDesk' is replaced but 'RustDeskMultiWindow' is not.
+    Longer strings win over their prefixes.
+    """
+    alternatives = []
+    for old, _ in sorted(replacements, key=lambda pair: -len(pair[0])):
+        regex = re.escape(old)
+        if re.match(r'\w', old[0]):
+            regex = r'\b' + regex
+        if re.match(r'\w', old[-1]):
+            regex += r'\b'
+        alternatives.append(regex)
+    matcher = re.compile('|'.join(alternatives).encode('utf-8'))
+    table = {old.encode('utf-8'): new.encode('utf-8') for old, new in replacements}
+    return matcher, table
+
+def is_binary(data):
+    """Guess whether data is binary (holds a NUL byte in its first 8 KiB)."""
+    return b'\0' in data[:8192]
+
+def rename_file(file_path, replacements, data=None):
+    """Apply replacements to the file at file_path (or to its content data, if given).
+
+    replacements is a tuple of (old, new) pairs. Returns ({old: hits}, new
+    content or None if nothing matched), or (None, None) if the file was
+    skipped as binary or unreadable. Nothing is written.
+    """
+    if data is None:
+        try:
+            with open(file_path, 'rb') as file:
+                data = file.read()
+        except OSError:
+            return None, None
+    if is_binary(data):
+        return None, None
+
+    matcher, table = compile_replacements(replacements)
+    counts = {}
+
+    def substitute(match):
+        old = match.group(0)
+        counts[old] = counts.get(old, 0) + 1
+        return table[old]
+
+    new_data = matcher.sub(substitute, data)
+    return {old.decode('utf-8'): hits for old, hits in counts.items()}, new_data if counts else None
+
+def rename_strings(source_dir, replacements, globs=DEFAULT_GLOBS, jobs=None, overlay=None):
+    """Replace every old string with its new one in the files of source_dir matching globs.
+
+    replacements maps old strings to new ones (e.g. {'RustDesk': 'My App'}).
+    jobs caps the worker processes (None: one per CPU; 1 runs in this
+    process). Changed files are written, or staged in overlay if given (see
+    overlay.py). Prints a per-string hit summary and returns
+    {relative path: {old: hits}} for the files that changed.
+    """
+    replacements = tuple(sorted((old, new) for old, new in replacements.items() if old and old != new))
+    if not replacements:
+        return {}
+    start = time.perf_counter()
+    paths = find_files(source_dir, globs)
+    file_paths = [os.path.join(source_dir, *path.split('/')) for path in paths]
+
+    staged = [read_file(overlay, file_path) if is_staged(overlay, file_path) else None for file_path in file_paths]
+
+    workers = jobs or os.cpu_count() or 1
+    if workers == 1 or len(paths) < POOL_THRESHOLD:
+        outcomes = [rename_file(*task) for task in zip(file_paths, [replacements] * len(paths), staged)]
+    else:
+        chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(rename_file, file_paths, [replacements] * len(paths), staged,
+                                         chunksize=chunksize))
+
+    changed = {}
+    for path, file_path, (counts, new_data) in zip(paths, file_paths, outcomes):
+        if new_data is not None:
+            if overlay is not None:
+                write_file(overlay, file_path, new_data)
+            else:
+                replace_file(file_path, new_data)
+            changed[path] = counts
+    totals = {old: 0 for old, _ in replacements}
+    for counts in changed.values():
+        for old, hits in counts.items():
+            totals[old] += hits
+
+    skipped = sum(1 for counts, _ in outcomes if counts is None)
+    print(f"Renamed strings in {len(changed)} of {len(paths)} files "
+          f"({skipped} binary or unreadable skipped) in {time.perf_counter() - start:.2f}s")
+    for old, new in replacements:
+        print(f"  '{old}' -> '{new}': {totals[old]} hits")
+    return changed
@@ -0,0 +1,118 @@
+"""Build scheduler: run the build steps of many brand trees, a bounded number at a time.
+
+Each brand is one job: its post-update commands (inline-sciter.py, then the
+build command) run in order inside the brand's own tree, with all output
+going to that brand's log file. Jobs run on a pool whose size defaults to
+what the machine can take (see default_concurrency), and every build is told
+how many cores it may use through CARGO_BUILD_JOBS, so concurrent cargo
+builds do not oversubscribe the CPU.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .jobs import describe_result, result_outcome, run_streamed
+from .pipeline import record_post_update
+from .trace import span
+
+# What one release build of RustDesk roughly needs to make progress
+CORES_PER_BUILD = 4
+MEMORY_PER_BUILD = 3 << 30  # bytes
+
+def available_memory():
+    """Return the available physical memory in bytes, or None if it cannot be determined."""
+    try:
+        with open('/proc/meminfo', 'r', encoding='ascii') as file:
+            for line in file:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def default_concurrency(cores_per_build=CORES_PER_BUILD, memory_per_build=MEMORY_PER_BUILD):
+    """Return how many builds to run at once: limited by CPU count and available memory, at least 1."""
+    limit = max(1, (os.cpu_count() or 1) // cores_per_build)
+    memory = available_memory()
+    if memory is not None:
+        limit = min(limit, max(1, memory // memory_per_build))
+    return limit
+
+def build_job(name, tree, log_path, commands, timeout=None, env=None):
+    """Run one brand's (name, command, shell) commands in order in tree, logging to log_path.
+
+    Stops at the first failing command. Returns the job summary dict.
+    """
+    started = time.monotonic()
+    steps = []
+    with span('build', brand=name) as record, open(log_path, 'w', encoding='utf-8') as log:
+        def output(stream, line):
+            log.write(line + '\n')
+
+        for step_name, command, shell in commands:
+            log.write(f"$ {step_name}\n")
+            log.flush()
+            result = run_streamed(command, tree, shell, timeout, output, env)
+            result['name'] = step_name
+            steps.append(result)
+            record_post_update(tree, step_name, result)
+            log.write(f"[{step_name}: {describe_result(result)}]\n")
+            if result['returncode'] != 0:
+                break
+        record['returncode'] = steps[-1]['returncode'] if steps else 0
+
+    failed = next((step for step in steps if step['returncode'] != 0), None)
+    return {
+        'name': name,
+        'tree': tree,
+        'log': log_path,
+        'steps': steps,
+        'returncode': failed['returncode'] if failed else 0,
+        'failed_step': failed['name'] if failed else None,
+        'duration': time.monotonic() - started,
+    }
+
+def schedule_builds(builds, log_dir, concurrency=None, timeout=None):
+    """Run a list of (name, tree, commands) builds, at most concurrency at a time.
+
+    commands are (name, command, shell) tuples as returned by
+    pipeline.post_update_commands(). Each build logs to log_dir/<name>.log;
+    timeout (seconds) applies to each command. Prints a summary table and
+    returns the job summaries in the order of builds.
+    """
+    if not builds:
+        return []
+    concurrency = concurrency or default_concurrency()
+    os.makedirs(log_dir, exist_ok=True)
+    env = dict(os.environ)
+    env.setdefault('CARGO_BUILD_JOBS', str(max(1, (os.cpu_count() or 1) // concurrency)))
+
+    print(f"Building {len(builds)} brands, {min(concurrency, len(builds))} at a time (logs in {log_dir})")
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='build') as executor:
+        futures = [executor.submit(build_job, name, tree, os.path.join(log_dir, name + '.log'), commands, timeout, env)
+                   for name, tree, commands in builds]
+        for future in as_completed(futures):
+            summary = future.result()
+            outcome = "ok" if summary['returncode'] == 0 else f"failed at {summary['failed_step']}"
+            print(f"[{summary['name']}] Build {outcome} after {summary['duration']:.1f}s")
+        summaries = [future.result() for future in futures]
+
+    print_summary(summaries)
+    return summaries
+
+def print_summary(summaries):
+    """Print a table of the builds with their result, exit code, duration and log."""
+    rows = [("Brand", "Result", "Exit", "Duration", "Log")]
+    for summary in summaries:
+        if summary['returncode'] == 0:
+            outcome = "ok"
+        else:
+            outcome = f"{summary['failed_step']}: {result_outcome(summary['steps'][-1])}"
+        rows.append((summary['name'], outcome, str(summary['returncode']), f"{summary['duration']:.1f}s", summary['log']))
+    widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]) - 1)]
+    for row in rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)) + "  " + row[-1])
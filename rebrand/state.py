@@ -0,0 +1,102 @@
+"""Content-hash manifest (.rebrand-state.json) that makes re-runs incremental.
+
+For every file the rebrand writes, the manifest records a key (a hash of the
+inputs that produced it: the filled edits, or the source icon) and the hash,
+size and mtime of the output. A file is up to date when its key is unchanged
+and it still holds that output; stat is checked first so unchanged files are
+not even read.
+"""
+
+import hashlib
+import json
+import os
+
+from .fileio import replace_file
+
+STATE_FILE = '.rebrand-state.json'
+STATE_VERSION = 1
+
+def sha256_bytes(data):
+    """Return the hex SHA-256 of data."""
+    return hashlib.sha256(data).hexdigest()
+
+def sha256_file(path):
+    """Return the hex SHA-256 of the file at path, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def inputs_key(value):
+    """Return a stable hash of a JSON-serializable value (e.g. a list of edits)."""
+    return sha256_bytes(json.dumps(value, sort_keys=True).encode('utf-8'))
+
+def load_state(base_directory):
+    """Load the manifest of base_directory, or an empty one if missing or unreadable."""
+    path = os.path.join(base_directory, STATE_FILE)
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            state = json.load(file)
+    except (OSError, ValueError):
+        return {'version': STATE_VERSION, 'files': {}}
+    if state.get('version') != STATE_VERSION or not isinstance(state.get('files'), dict):
+        return {'version': STATE_VERSION, 'files': {}}
+    return state
+
+def save_state(base_directory, state):
+    """Write the manifest of base_directory."""
+    data = json.dumps(state, indent=2, sort_keys=True) + '\n'
+    replace_file(os.path.join(base_directory, STATE_FILE), data.encode('utf-8'))
+
+def state_key(relative_path):
+    """Return the manifest key for a relative path ('/' separated on every platform)."""
+    return relative_path.replace(os.sep, '/')
+
+def is_current(entry, file_path, key):
+    """Return True if file_path is the output recorded in entry for inputs key.
+
+    May refresh the stat fields of entry when only the mtime changed.
+    """
+    if not entry or entry.get('key') != key:
+        return False
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        return False
+    if st.st_size != entry.get('size'):
+        return False
+    if st.st_mtime_ns == entry.get('mtime_ns'):
+        return True
+    if sha256_file(file_path) != entry.get('sha256'):
+        return False
+    entry['mtime_ns'] = st.st_mtime_ns
+    return True
+
+def make_entry(file_path, key, data=None, staged=False, sha256=None, **extra):
+    """Return a manifest entry for file_path as just written (data: its bytes, if at hand).
+
+    With staged, data is only staged in an overlay (see overlay.py) and not
+    on disk yet; the entry gets its mtime from refresh_entries() once committed.
+    sha256, if given, is the hash of the file, taken while it was written.
+    """
+    if staged:
+        return dict({'key': key, 'sha256': sha256_bytes(data), 'size': len(data), 'mtime_ns': None}, **extra)
+    st = os.stat(file_path)
+    entry = {
+        'key': key,
+        'sha256': sha256 or (sha256_bytes(data) if data is not None else sha256_file(file_path)),
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+    }
+    entry.update(extra)
+    return entry
+
+def refresh_entries(base_directory, state):
+    """Record the mtime of every committed file whose manifest entry was made from staged data."""
+    for relative_path, entry in state['files'].items():
+        if entry.get('mtime_ns') is None:
+            try:
+                entry['mtime_ns'] = os.stat(os.path.join(base_directory, *relative_path.split('/'))).st_mtime_ns
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,70 @@
+"""Build-step cache: skip res/inline-sciter.py when the UI resources it inlines are unchanged.
+
+The step's key hashes its declared inputs: every file under src/ui (except
+the generated src/ui/inline.rs) and the script itself. After a successful
+run the generated file is stored under <cache>/steps/inline-sciter/<key>;
+a later run with the same key, in this tree or any other brand tree derived
+from the same checkout, restores it instead of running the script.
+"""
+
+import os
+
+from .downloads import cache_dir
+from .fileio import replace_with_copy
+from .state import inputs_key, sha256_file
+
+INLINE_SCITER_SCRIPT = 'res/inline-sciter.py'
+INLINE_SCITER_INPUTS = 'src/ui'
+INLINE_SCITER_OUTPUT = 'src/ui/inline.rs'
+
+# Bump when the key or the cached layout changes
+STEP_CACHE_VERSION = 1
+
+def native_path(source_dir, relative_path):
+    """Return the path of a '/' separated relative path inside source_dir."""
+    return os.path.join(source_dir, *relative_path.split('/'))
+
+def directory_digest(directory, exclude=()):
+    """Return {relative path: SHA-256} for every file under directory, except the relative paths in exclude."""
+    digest = {}
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            relative_path = os.path.relpath(path, directory).replace(os.sep, '/')
+            if relative_path not in exclude:
+                digest[relative_path] = sha256_file(path)
+    return digest
+
+def inline_sciter_key(source_dir):
+    """Return the key of the inline-sciter step for the tree at source_dir."""
+    inputs_dir = native_path(source_dir, INLINE_SCITER_INPUTS)
+    output = os.path.relpath(native_path(source_dir, INLINE_SCITER_OUTPUT), inputs_dir).replace(os.sep, '/')
+    return inputs_key({
+        'version': STEP_CACHE_VERSION,
+        'script': sha256_file(native_path(source_dir, INLINE_SCITER_SCRIPT)),
+        'inputs': directory_digest(inputs_dir, exclude={output}),
+    })
+
+def step_cache_path(key):
+    """Return where the output of the inline-sciter step with this key is cached."""
+    return os.path.join(cache_dir(), 'steps', 'inline-sciter', key)
+
+def restore_inline_sciter(source_dir):
+    """Put the cached output in place if the step's inputs are unchanged. Returns whether it did."""
+    cached = step_cache_path(inline_sciter_key(source_dir))
+    if not os.path.isfile(cached):
+        return False
+    output = native_path(source_dir, INLINE_SCITER_OUTPUT)
+    if not os.path.isfile(output) or sha256_file(output) != sha256_file(cached):
+        replace_with_copy(cached, output)
+    return True
+
+def save_inline_sciter(source_dir):
+    """Cache the output of a successful inline-sciter run in source_dir."""
+    output = native_path(source_dir, INLINE_SCITER_OUTPUT)
+    if not os.path.isfile(output):
+        return
+    cached = step_cache_path(inline_sciter_key(source_dir))
+    os.makedirs(os.path.dirname(cached), exist_ok=True)
+    replace_with_copy(output, cached)
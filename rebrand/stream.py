@@ -0,0 +1,164 @@
+"""Streaming rewrites: patch files too large to hold in memory, a fixed-size chunk at a time.
+
+The engine normally reads a whole file, decodes it and splits it into lines.
+Generated sources can run to many megabytes (src/ui/inline.rs, a ui.rs full
+of base64 icon literals), so files of STREAM_THRESHOLD bytes or more go
+through here instead:
+
+1. stream_anchors() runs the anchor regex (see anchors.py) over the raw
+   bytes, CHUNK_SIZE at a time. A chunk is cut after its last complete line,
+   so markers that straddle two chunks are seen whole; a line longer than a
+   chunk is scanned in pieces that overlap by the longest marker.
+2. read_lines() reads back only the lines the edits can look at: the anchor
+   lines, the lines their offsets point at and the line before each anchor.
+   No other line is ever decoded.
+3. splice_lines() copies the file to a temporary file next to it in chunks,
+   writing the new bytes of each changed line in its place and hashing the
+   output on the way.
+
+Memory stays at a few chunks plus the lines the edits touch.
+"""
+
+import hashlib
+import os
+
+from .anchors import compile_matcher
+from .fileio import atomic_output
+from .state import inputs_key
+
+CHUNK_SIZE = 1 << 20
+STREAM_THRESHOLD = 8 << 20  # files at least this large are streamed
+
+def longest_marker(edits):
+    """Return the length in bytes of the longest marker of edits (how far a straddling match can reach back)."""
+    markers = [edit['find'] for edit in edits if edit['op'] == 'replace_line']
+    markers += [edit['start'] for edit in edits if edit['op'] == 'comment_block']
+    return max((len(marker.encode('utf-8')) for marker in markers), default=0)
+
+def stream_anchors(file, patterns, overlap, chunk_size=CHUNK_SIZE):
+    """Return the anchor index (see anchors.scan_anchors) of an open binary file, read chunk_size bytes at a time.
+
+    overlap is the longest marker in bytes (see longest_marker).
+    """
+    anchors = []
+    if not patterns:
+        return anchors
+    matcher = compile_matcher(tuple(patterns))
+    file.seek(0)
+    carry = b''  # the part of the buffer not scanned yet, or the overlap of a long line
+    carry_offset = 0  # file offset of carry[0]
+    line = 0  # line index at carry[0]
+    skip = 0  # 1 when carry starts in the middle of a line, whose first byte was scanned already
+    while True:
+        chunk = file.read(chunk_size)
+        buffer = carry + chunk
+        end = buffer.rfind(b'\n') + 1 if chunk else len(buffer)
+        long_line = end == 0
+        if long_line:
+            end = len(buffer)  # No line ends in this chunk; scan it and keep the overlap
+        position = 0
+        for match in matcher.finditer(buffer, skip, end):
+            if long_line and match.end() == end:
+                continue  # '$' matches at the end of the buffer; a real marker is found again in the overlap
+            start = match.start()
+            line += buffer.count(b'\n', position, start)
+            position = start
+            if not anchors or anchors[-1][0] != line:
+                anchors.append([line, carry_offset + start])
+        if not chunk:
+            return anchors
+        line += buffer.count(b'\n', position, end)
+        if not long_line:
+            cut, skip = end, 0
+        elif len(buffer) > overlap + 1:
+            cut, skip = len(buffer) - overlap - 1, 1
+        else:
+            cut = 0
+        carry = buffer[cut:]
+        carry_offset += cut
+
+def file_anchors(entry, file, patterns, overlap, chunk_size=CHUNK_SIZE):
+    """Return (anchors, reused) for an open file: the index of its manifest entry if size and mtime match, else a fresh scan.
+
+    Unlike anchors.find_anchors() a changed mtime is not settled by hashing
+    the content; the file is scanned again.
+    """
+    st = os.fstat(file.fileno())
+    if (entry and 'anchors' in entry and entry.get('patterns') == inputs_key(patterns)
+            and entry.get('size') == st.st_size and entry.get('mtime_ns') == st.st_mtime_ns):
+        return entry['anchors'], True
+    return stream_anchors(file, patterns, overlap, chunk_size), False
+
+def line_start(file, offset, block_size=1 << 12):
+    """Return the file offset where the line holding byte offset starts."""
+    position = offset
+    while position > 0:
+        step = min(position, block_size)
+        file.seek(position - step)
+        newline = file.read(step).rfind(b'\n')
+        if newline >= 0:
+            return position - step + newline + 1
+        position -= step
+    return 0
+
+def read_lines(file, anchors, offsets):
+    """Read each anchor line, the line before it and the lines up to the largest of offsets after it.
+
+    anchors is an anchor index ([line, byte offset] pairs). Returns (lines,
+    line count): lines maps a line index to (start offset, raw bytes with
+    the line ending); the count is None unless a read ran past the last line.
+    """
+    lines = {}
+    count = None
+    reach = max(offsets, default=0)
+    for line, offset in anchors:
+        start = line_start(file, offset)
+        if line and line - 1 not in lines:
+            previous = line_start(file, start - 1)
+            file.seek(previous)
+            lines[line - 1] = (previous, file.readline())
+        file.seek(start)
+        for index in range(line, line + reach + 1):
+            if index in lines:
+                file.seek(lines[index][0] + len(lines[index][1]))
+                continue
+            position = file.tell()
+            raw = file.readline()
+            if not raw:
+                count = index
+                break
+            lines[index] = (position, raw)
+    return lines, count
+
+def copy_range(file, output, start, end, digest, chunk_size=CHUNK_SIZE):
+    """Copy bytes start to end (None: to the end of the file) of file to output, hashing them. Returns the count."""
+    file.seek(start)
+    copied = 0
+    while end is None or start + copied < end:
+        chunk = file.read(chunk_size if end is None else min(chunk_size, end - start - copied))
+        if not chunk:
+            break
+        output.write(chunk)
+        digest.update(chunk)
+        copied += len(chunk)
+    return copied
+
+def splice_lines(file, path, replacements, chunk_size=CHUNK_SIZE):
+    """Write the content of the open file with byte ranges replaced to a temporary file next to path.
+
+    replacements is a sorted list of disjoint (start, end, new bytes). The
+    temporary file gets the permission bits of path. Returns (temporary
+    path, size, SHA-256 of the new content).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with atomic_output(path, rename=False) as temp_path, open(temp_path, 'wb') as output:
+        position = 0
+        for start, end, data in replacements:
+            size += copy_range(file, output, position, start, digest, chunk_size)
+            output.write(data)
+            digest.update(data)
+            size += len(data)
+            position = end
+        size += copy_range(file, output, position, None, digest, chunk_size)
+    return temp_path, size, digest.hexdigest()
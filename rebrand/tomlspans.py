@@ -0,0 +1,181 @@
+"""Format-preserving TOML locator: a Cargo.toml parsed once into table and key byte spans.
+
+parse_toml() records, for every [table], where its header ends, where its
+last key/value ends and, for every key, the span from the key to the end of
+its value (multi-line arrays and strings included, a trailing comment
+excluded). set_toml_keys() splices all toml_set edits of a file into those
+spans in one pass, so comments, blank lines, key order, line endings and a
+UTF-8 BOM stay exactly as they were. A key missing from an existing table is
+added after the table's last key.
+
+Parses are cached by the SHA-256 of the document, so the same content is
+never parsed twice in a run (e.g. the same Cargo.toml in several brand trees).
+"""
+
+import collections
+import threading
+
+from .state import sha256_bytes
+
+BOM_BYTES = b'\xef\xbb\xbf'
+PARSE_CACHE_SIZE = 64
+
+parsed = collections.OrderedDict()  # SHA-256 -> tables, most recently used last
+parsed_lock = threading.Lock()
+
+def dotted_name(raw):
+    """Return the normalized name of a TOML key or table header ('a . "b"' -> 'a.b')."""
+    return '.'.join(part.strip().strip('"\'') for part in raw.decode('utf-8').split('.'))
+
+def new_table(header_end):
+    """Return an empty table record whose header ends at byte header_end."""
+    return {'header_end': header_end, 'last': header_end, 'keys': {}}
+
+def line_end(data, position):
+    """Return the offset just past the line ending of the line holding position (or the end of data)."""
+    end = data.find(b'\n', position)
+    return len(data) if end < 0 else end + 1
+
+def string_end(data, position):
+    """Return the offset just past the TOML string starting at position."""
+    quote = data[position:position + 1]
+    if data.startswith(quote * 3, position):
+        close = data.find(quote * 3, position + 3)
+        while close > 0 and quote == b'"' and data[close - 1:close] == b'\\':
+            close = data.find(quote * 3, close + 1)
+        return len(data) if close < 0 else close + 3
+    i = position + 1
+    while i < len(data):
+        c = data[i:i + 1]
+        if c == b'\\' and quote == b'"':
+            i += 2
+            continue
+        if c == quote or c == b'\n':
+            return i + 1
+        i += 1
+    return len(data)
+
+def scan_value(data, position):
+    """Scan the value starting at position. Returns (end of the value, end of its last line)."""
+    depth = 0
+    value_end = position
+    i = position
+    while i < len(data):
+        c = data[i:i + 1]
+        if c in (b'"', b"'"):
+            i = value_end = string_end(data, i)
+            continue
+        if c == b'#':
+            i = data.find(b'\n', i)
+            if i < 0:
+                break
+            continue
+        if c == b'\n':
+            if depth <= 0:
+                return value_end, i + 1
+        elif c in b'[{':
+            depth += 1
+        elif c in b']}':
+            depth -= 1
+        if not c.isspace():
+            value_end = i + 1
+        i += 1
+    return value_end, len(data)
+
+def parse_toml(data):
+    """Return {table name: table record} for the TOML document in data (bytes).
+
+    The root table is ''. Each record has 'header_end' (offset after the
+    header line), 'last' (offset after the last key/value line) and 'keys':
+    {key: {'start', 'value_start', 'value_end', 'end'}} for the first
+    occurrence of every key. Array-of-tables ([[bin]]) are skipped.
+    """
+    tables = {'': new_table(0)}
+    current = tables['']
+    position = len(BOM_BYTES) if data.startswith(BOM_BYTES) else 0
+    while position < len(data):
+        end = line_end(data, position)
+        line = data[position:end]
+        stripped = line.strip()
+        if not stripped or stripped.startswith(b'#'):
+            position = end
+            continue
+        if stripped.startswith(b'['):
+            if stripped.startswith(b'[['):
+                current = new_table(end)  # Array of tables: not addressable by name
+            else:
+                name = dotted_name(stripped[1:stripped.find(b']')])
+                current = tables.setdefault(name, new_table(end))
+            position = end
+            continue
+
+        start = position + len(line) - len(line.lstrip())
+        equals = data.find(b'=', start, end)
+        if equals < 0:
+            position = end  # Not a key/value line; leave it alone
+            continue
+        value_start = equals + 1
+        while data[value_start:value_start + 1] in (b' ', b'\t'):
+            value_start += 1
+        value_end, end = scan_value(data, value_start)
+        current['keys'].setdefault(dotted_name(data[start:equals]), {
+            'start': start, 'value_start': value_start, 'value_end': value_end, 'end': end})
+        current['last'] = end
+        position = end
+    return tables
+
+def toml_spans(data):
+    """Return parse_toml(data), cached by the SHA-256 of data."""
+    digest = sha256_bytes(data)
+    with parsed_lock:
+        tables = parsed.get(digest)
+        if tables is not None:
+            parsed.move_to_end(digest)
+            return tables
+    tables = parse_toml(data)
+    with parsed_lock:
+        parsed[digest] = tables
+        while len(parsed) > PARSE_CACHE_SIZE:
+            parsed.popitem(last=False)
+    return tables
+
+def newline_of(data):
+    """Return the line ending data uses (b'\\r\\n' or b'\\n')."""
+    return b'\r\n' if b'\r\n' in data[:data.find(b'\n') + 1] else b'\n'
+
+def set_toml_keys(data, edits):
+    """Apply toml_set edits to the TOML document in data in one pass.
+
+    Each edit's 'line' replaces its key's span, keeping the indentation, a
+    trailing comment and the line ending; a key missing from its table is
+    added after the table's last key. Returns (new data, hits) with
+    hits[i] = 1 if edits[i] applied, 0 if its table does not exist.
+    """
+    tables = toml_spans(data)
+    newline = newline_of(data)
+    splices = []  # (start, end, order, replacement)
+    claimed = set()
+    hits = [0] * len(edits)
+    for n, edit in enumerate(edits):
+        table = tables.get(edit['section'])
+        if table is None or (edit['section'], edit['key']) in claimed:
+            continue
+        claimed.add((edit['section'], edit['key']))
+        replacement = edit['line'].encode('utf-8')
+        key = table['keys'].get(edit['key'])
+        if key is not None:
+            splices.append((key['start'], key['value_end'], n, replacement))
+        else:
+            at = table['last']
+            prefix = newline if at == len(data) and data and not data.endswith(b'\n') else b''
+            splices.append((at, at, n, prefix + replacement + newline))
+        hits[n] = 1
+
+    pieces = []
+    copied = 0
+    for start, end, _, replacement in sorted(splices):
+        pieces.append(data[copied:start])
+        pieces.append(replacement)
+        copied = end
+    pieces.append(data[copied:])
+    return b''.join(pieces), hits
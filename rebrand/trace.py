@@ -0,0 +1,114 @@
+"""Timing instrumentation: spans around pipeline steps, exported as JSON lines or a Chrome trace.
+
+Wrap a step in span(); the dict it yields holds the span's arguments and can
+be filled with counters (bytes_read, bytes_written, files, ...) while the
+step runs. Spans are only recorded after enable(), so instrumented code
+costs next to nothing otherwise. Spans from worker threads are recorded
+with their thread, which shows up as a separate lane in chrome://tracing or
+Perfetto.
+
+debug turns on verbose diagnostics elsewhere (e.g. the lines each edit
+replaced); those are never printed at the default level.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+enabled = False
+debug = False
+spans = []
+spans_lock = threading.Lock()
+origin_ns = time.perf_counter_ns()
+
+def enable():
+    """Start recording spans."""
+    global enabled
+    enabled = True
+
+@contextlib.contextmanager
+def recording():
+    """Record spans inside the block, then go back to recording them or not as before."""
+    global enabled
+    previous = enabled
+    enabled = True
+    try:
+        yield
+    finally:
+        enabled = previous
+
+def set_debug(value=True):
+    """Turn the debug diagnostics on or off."""
+    global debug
+    debug = value
+
+@contextlib.contextmanager
+def span(name, **args):
+    """Time the enclosed block as a span called name. Yields its argument dict for counters."""
+    if not enabled:
+        yield args
+        return
+    start = time.perf_counter_ns()
+    try:
+        yield args
+    finally:
+        end = time.perf_counter_ns()
+        record = {
+            'name': name,
+            'start_us': (start - origin_ns) // 1000,
+            'duration_us': (end - start) // 1000,
+            'thread': threading.current_thread().name,
+            'tid': threading.get_ident(),
+            'args': args,
+        }
+        with spans_lock:
+            spans.append(record)
+
+def reset():
+    """Forget the spans recorded so far."""
+    with spans_lock:
+        spans.clear()
+
+def recorded_spans():
+    """Return the finished spans ordered by start time."""
+    with spans_lock:
+        return sorted(spans, key=lambda record: record['start_us'])
+
+def export_jsonl(path):
+    """Write one JSON object per span: name, start and duration in microseconds, thread and counters."""
+    with open(path, 'w', encoding='utf-8') as file:
+        for record in recorded_spans():
+            line = {key: value for key, value in record.items() if key not in ('tid', 'args')}
+            line.update(record['args'])
+            file.write(json.dumps(line, default=str) + '\n')
+
+def export_chrome(path):
+    """Write the spans in Chrome trace-event format (complete 'X' events)."""
+    pid = os.getpid()
+    events = []
+    threads = {}
+    for record in recorded_spans():
+        threads[record['tid']] = record['thread']
+        events.append({
+            'name': record['name'],
+            'ph': 'X',
+            'ts': record['start_us'],
+            'dur': record['duration_us'],
+            'pid': pid,
+            'tid': record['tid'],
+            'args': record['args'],
+        })
+    for tid, thread_name in threads.items():
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread_name}})
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file, default=str)
+
+def export(path):
+    """Write the recorded spans to path: JSON lines for a .jsonl path, a Chrome trace otherwise."""
+    if path.endswith('.jsonl'):
+        export_jsonl(path)
+    else:
+        export_chrome(path)
+    print(f"Wrote {len(spans)} trace spans to {path}")
@@ -0,0 +1,244 @@
+"""Upgrade mode: carry the branding of an old release over to a new upstream release by three-way merge.
+
+Inputs are three trees: the old pristine release (the merge base), the old
+branded tree (ours) and the new pristine release (theirs). Only the files the
+rebrand owns are compared: the patch table targets, the icons, sciter.dll and
+whatever the branded tree's manifest records. Two trees' copies of a file
+are compared without reading them whenever the file system or git can
+tell: by git blob id for a git checkout (from the index, `git ls-files -s`,
+for files git does not report as modified), by size (different sizes
+differ), and by the quick check rsync uses: the same inode, or the same
+size and mtime, is the same content. Only files left undecided are hashed,
+once per inode, so files hardlinked between trees (see batch.py) are read
+once.
+
+Per file: unchanged by the branding -> the new release's version; unchanged
+upstream -> the branded version; changed on both sides -> a line-based
+three-way merge, with conflict markers where both sides changed the same
+lines. The result is a new branded tree derived from the new release.
+"""
+
+import difflib
+import hashlib
+import os
+import shutil
+import subprocess
+
+from .batch import derive_tree, materialized_paths
+from .engine import split_lines
+from .icons import ICON_FILES
+from .overlay import commit, new_overlay, write_file
+from .patches import REBRAND_PATCHES
+from .state import load_state
+
+CONFLICT_MARKERS = ('<<<<<<< branded', '||||||| old release', '=======', '>>>>>>> new release')
+
+def blob_id(data):
+    """Return the git blob id (SHA-1 of 'blob <size>\\0' + data) of data."""
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+def git_blob_ids(tree, paths):
+    """Return {path: blob id} for the paths git tracks unmodified in tree, or {} if tree is not a git checkout."""
+    if not os.path.exists(os.path.join(tree, '.git')):
+        return {}
+    try:
+        listed = subprocess.run(['git', '-C', tree, 'ls-files', '-s', '-z', '--', *paths],
+                                capture_output=True, check=True).stdout
+        modified = subprocess.run(['git', '-C', tree, 'diff-files', '--name-only', '--relative', '-z', '--', *paths],
+                                  capture_output=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    dirty = set(modified.decode('utf-8').split('\0'))
+    ids = {}
+    for record in listed.decode('utf-8').split('\0'):
+        if record:
+            info, path = record.split('\t', 1)
+            if path not in dirty:
+                ids[path] = info.split()[1]
+    return ids
+
+def scan_tree(tree, paths):
+    """Return {'dir', 'ids', 'stats'} for paths in tree without reading any file.
+
+    ids are the blob ids git knows (see git_blob_ids); stats maps every path
+    to its os.stat() result, or None if it is missing.
+    """
+    stats = {}
+    for path in paths:
+        try:
+            stats[path] = os.stat(os.path.join(tree, *path.split('/')))
+        except FileNotFoundError:
+            stats[path] = None
+    return {'dir': tree, 'ids': git_blob_ids(tree, paths), 'stats': stats}
+
+def content_id(scan, path, inode_ids):
+    """Return the blob id of path in a scanned tree, hashing the file unless git knows it.
+
+    inode_ids caches the ids of plain files by (device, inode, size, mtime),
+    shared between trees so hardlinked files are hashed only once.
+    """
+    if path in scan['ids']:
+        return scan['ids'][path]
+    st = scan['stats'][path]
+    fingerprint = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+    if fingerprint not in inode_ids:
+        with open(os.path.join(scan['dir'], *path.split('/')), 'rb') as file:
+            inode_ids[fingerprint] = blob_id(file.read())
+    return inode_ids[fingerprint]
+
+def same_content(first, second, path, inode_ids):
+    """Return True if path has the same content in two scanned trees (or is missing from both).
+
+    The files are read only when neither git nor their stat results settle it.
+    """
+    a, b = first['stats'][path], second['stats'][path]
+    if a is None or b is None:
+        return a is None and b is None
+    if path in first['ids'] and path in second['ids']:
+        return first['ids'][path] == second['ids'][path]
+    if a.st_size != b.st_size:
+        return False
+    if (a.st_dev, a.st_ino) == (b.st_dev, b.st_ino) or a.st_mtime_ns == b.st_mtime_ns:
+        return True  # The same file, or rsync's quick check: same size and mtime
+    return content_id(first, path, inode_ids) == content_id(second, path, inode_ids)
+
+def owned_paths(branded_dir):
+    """Return the sorted relative paths the rebrand owns in the branded tree."""
+    paths = set(REBRAND_PATCHES) | set(ICON_FILES) | {'sciter.dll'}
+    paths.update(load_state(branded_dir)['files'])
+    return sorted(paths)
+
+def change_hunks(base, other):
+    """Return (base start, base end, replacement lines) for every change from base to other."""
+    matcher = difflib.SequenceMatcher(None, base, other, autojunk=False)
+    return [(i1, i2, other[j1:j2]) for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal']
+
+def apply_hunks(base, start, end, hunks):
+    """Return base[start:end] with hunks (all inside that range, in order) applied."""
+    result = []
+    position = start
+    for i1, i2, lines in hunks:
+        result.extend(base[position:i1])
+        result.extend(lines)
+        position = i2
+    result.extend(base[position:end])
+    return result
+
+def merge3(base, ours, theirs):
+    """Three-way merge of three lists of lines. Returns (merged lines, conflict count).
+
+    Changes from both sides to the same base lines (or insertions at the
+    same place) are a conflict unless they are identical; changes to
+    neighbouring lines merge cleanly. Conflicts are written with
+    CONFLICT_MARKERS around the branded, old and new versions.
+    """
+    hunks = sorted([(i1, i2, lines, 'ours') for i1, i2, lines in change_hunks(base, ours)]
+                   + [(i1, i2, lines, 'theirs') for i1, i2, lines in change_hunks(base, theirs)],
+                   key=lambda hunk: (hunk[0], hunk[1]))
+    merged = []
+    conflicts = 0
+    position = 0
+    i = 0
+    while i < len(hunks):
+        start, end = hunks[i][0], hunks[i][1]
+        group = [hunks[i]]
+        i += 1
+        while i < len(hunks) and (hunks[i][0] < end or hunks[i][0] == end and (hunks[i][1] == end or start == end)):
+            end = max(end, hunks[i][1])
+            group.append(hunks[i])
+            i += 1
+        merged.extend(base[position:start])
+        position = end
+        sides = {side: apply_hunks(base, start, end, [hunk[:3] for hunk in group if hunk[3] == side])
+                 for side in ('ours', 'theirs')}
+        if all(hunk[3] == 'ours' for hunk in group):
+            merged.extend(sides['ours'])
+        elif all(hunk[3] == 'theirs' for hunk in group) or sides['ours'] == sides['theirs']:
+            merged.extend(sides['theirs'])
+        else:
+            conflicts += 1
+            newline = '\r\n' if base[start:end] and base[start].endswith('\r\n') else '\n'
+            for marker, lines in zip(CONFLICT_MARKERS, (sides['ours'], base[start:end], sides['theirs'], [])):
+                merged.append(marker + newline)
+                merged.extend(line if line.endswith('\n') else line + newline for line in lines)
+    merged.extend(base[position:])
+    return merged, conflicts
+
+def read_or_none(tree, path):
+    """Return the bytes of path in tree, or None if it does not exist."""
+    try:
+        with open(os.path.join(tree, *path.split('/')), 'rb') as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+def text_lines(data):
+    """Return data split into lines, or None if it is not UTF-8 text."""
+    if b'\0' in data[:8192]:
+        return None
+    try:
+        return split_lines(data.decode('utf-8'))
+    except UnicodeDecodeError:
+        return None
+
+def merge_file(path, old_dir, branded_dir, new_dir):
+    """Three-way merge one owned file. Returns (merged bytes, outcome, conflict count)."""
+    base, ours, theirs = (read_or_none(tree, path) for tree in (old_dir, branded_dir, new_dir))
+    if ours is None:
+        return theirs, "not in the branded tree, new release kept", 0
+    if theirs is None:
+        return ours, "removed upstream, branded version kept", 1
+    lines = [text_lines(data or b'') for data in (base, ours, theirs)]
+    if None in lines:
+        return ours, "binary, branded version kept", 0
+    merged, conflicts = merge3(*lines)
+    outcome = f"{conflicts} conflicts" if conflicts else "merged"
+    return ''.join(merged).encode('utf-8'), outcome, conflicts
+
+def upgrade(old_dir, branded_dir, new_dir, output_dir, link_mode='auto', overwrite=False):
+    """Derive a branded tree of new_dir at output_dir, merging the branding of branded_dir (from old_dir).
+
+    Prints one line per owned file that needed more than a copy and returns
+    {relative path: conflict count} for the files with conflicts.
+    """
+    for tree in (old_dir, branded_dir, new_dir):
+        if not os.path.isdir(tree):
+            raise ValueError(f"Source directory not found: {tree}")
+    if os.path.exists(output_dir) and not overwrite:
+        raise ValueError(f"Output already exists: {output_dir} (use --overwrite)")
+
+    paths = owned_paths(branded_dir)
+    inode_ids = {}
+    base, ours, theirs = (scan_tree(tree, paths) for tree in (old_dir, branded_dir, new_dir))
+
+    overlay = new_overlay()
+    conflicted = {}
+    unchanged = 0
+    for path in paths:
+        target = os.path.join(output_dir, *path.split('/'))
+        if same_content(ours, base, path, inode_ids) or same_content(ours, theirs, path, inode_ids):
+            unchanged += 1  # The new release's file is already right
+            continue
+        if same_content(theirs, base, path, inode_ids):
+            data, outcome, conflicts = read_or_none(branded_dir, path), "branding carried over", 0
+        else:
+            data, outcome, conflicts = merge_file(path, old_dir, branded_dir, new_dir)
+        print(f"{path}: {outcome}")
+        if conflicts:
+            conflicted[path] = conflicts
+        if data is not None:
+            write_file(overlay, target, data)
+
+    if os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    counts = derive_tree(new_dir, output_dir, materialized_paths(), link_mode)
+    for path in overlay['files']:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    written = commit(overlay)
+    print(f"Derived {output_dir} from {new_dir} ({', '.join(f'{n} {method}' for method, n in sorted(counts.items()))}); "
+          f"{len(written)} branded files written, {unchanged} owned files taken from the new release")
+    if conflicted:
+        print(f"Conflicts in {len(conflicted)} files; resolve the {CONFLICT_MARKERS[0]} markers, then run 'rebrand run':")
+        for path, conflicts in conflicted.items():
+            print(f"  {path}: {conflicts}")
+    return conflicted
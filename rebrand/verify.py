@@ -0,0 +1,227 @@
+"""Post-build verification: check that the built binaries actually carry the branding.
+
+A marker the patch table missed only shows in the build output, so verify
+scans the artifacts themselves: every artifact is memory-mapped and searched
+once for all strings at the same time (one regex alternation of every
+needle), in UTF-8 and in UTF-16LE, where Windows keeps its version resource.
+
+- Expected strings (the app name, public key and rendezvous server, and the
+  version resource values) must turn up in at least one artifact of the
+  brand. The version resource comes from Runner.rc for a Flutter build and
+  from the [package.metadata.winres] table of Cargo.toml for a cargo build
+  (see RESOURCE_SOURCES); its values are only required when the brand has
+  a PE file (.exe, .dll) among its artifacts.
+- Upstream defaults (RustDesk's public key and server, its product and
+  executable names in the version resource) must not turn up anywhere.
+
+Artifacts are cut into SEGMENT_SIZE pieces, overlapping by the longest
+needle, and the pieces of every artifact of every brand are scanned on one
+process pool, so a few large binaries keep every core busy as well as many
+small ones.
+"""
+
+import mmap
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .patches import build_patches
+
+ENCODINGS = ('utf-8', 'utf-16le')
+SEGMENT_SIZE = 64 << 20
+
+# Files picked up when a directory is given: these, plus executables outside Windows (where
+# X_OK only says the file exists, so target/release would bring its .pdb, .rlib and .d files)
+ARTIFACT_EXTENSIONS = {'.exe', '.dll', '.so', '.dylib', '.msi'}
+PE_EXTENSIONS = {'.exe', '.dll'}
+
+# (label, text, encodings) of what an unbranded RustDesk build contains
+UPSTREAM_DEFAULTS = (
+    ('upstream public key', 'OeVuKk5nlHiXp+APNn0Y3pC1Iwpwn44JGqrQCsWqmBw=', ENCODINGS),
+    ('upstream rendezvous server', 'rs-ny.rustdesk.com', ENCODINGS),
+    ('upstream product name', 'RustDesk', ('utf-16le',)),
+    ('upstream executable name', 'rustdesk.exe', ('utf-16le',)),
+)
+
+# Where each kind of build takes its version resource from: (file, pattern of its key/value lines)
+RESOURCE_SOURCES = {
+    'flutter': ('flutter/windows/runner/Runner.rc', re.compile(r'VALUE "(\w+)", "([^"]*)"')),
+    'cargo': ('Cargo.toml', re.compile(r'^(\w+) = "([^"]*)"$')),
+}
+
+def resource_source(paths, root=None):
+    """Guess which build produced paths: 'flutter' if any lies in Flutter's build output (flutter/build/...), else 'cargo'.
+
+    Paths are taken relative to root (the source tree) when it is given, so
+    the directories the checkout itself lives in never count.
+    """
+    for path in paths:
+        parts = os.path.normpath(os.path.relpath(path, root) if root else path).split(os.sep)
+        if any(part == 'flutter' and following == 'build' for part, following in zip(parts, parts[1:])):
+            return 'flutter'
+    return 'cargo'
+
+def version_strings(profile, source='flutter'):
+    """Return {version resource key: value} as the patch table writes them for profile into source's resource."""
+    relative_path, pattern = RESOURCE_SOURCES[source]
+    edits = build_patches(profile).get(relative_path.replace('/', os.sep), [])
+    if source == 'cargo':
+        edits = [edit for edit in edits if edit.get('section') == 'package.metadata.winres']
+    return dict(match.groups() for match in (pattern.search(edit['line']) for edit in edits) if match)
+
+def expected_strings(profile, source='flutter'):
+    """Return the (label, text, encodings, PE only) strings a build of profile must contain."""
+    expected = [
+        ('app name', profile['app_name'], ENCODINGS, False),
+        ('public key', profile['pub_key'], ('utf-8',), False),
+        ('rendezvous server', profile['rendezvous_server'], ('utf-8',), False),
+    ]
+    expected += [(key, value, ('utf-16le',), True) for key, value in sorted(version_strings(profile, source).items())]
+    return expected
+
+def leftover_defaults(profile, source='flutter'):
+    """Return the UPSTREAM_DEFAULTS that profile does not use itself."""
+    own = {profile['app_name'], profile['pub_key'], profile['rendezvous_server']}
+    own.update(version_strings(profile, source).values())
+    return [(label, text, encodings) for label, text, encodings in UPSTREAM_DEFAULTS if text not in own]
+
+def needles(profile, source='flutter'):
+    """Return {encoded bytes: [(kind, label, encoding), ...]} for everything to search for."""
+    table = {}
+    for label, text, encodings, _ in expected_strings(profile, source):
+        for encoding in encodings:
+            table.setdefault(text.encode(encoding), []).append(('expected', label, encoding))
+    for label, text, encodings in leftover_defaults(profile, source):
+        for encoding in encodings:
+            table.setdefault(text.encode(encoding), []).append(('leftover', label, encoding))
+    return table
+
+def find_artifacts(paths):
+    """Expand paths into artifact files: files as given; for a directory, its binaries (not recursive)."""
+    artifacts = []
+    for path in paths:
+        if not os.path.isdir(path):
+            if not os.path.isfile(path):
+                raise ValueError(f"Artifact not found: {path}")
+            artifacts.append(path)
+            continue
+        for name in sorted(os.listdir(path)):
+            file_path = os.path.join(path, name)
+            if not os.path.isfile(file_path):
+                continue
+            if os.path.splitext(name)[1].lower() in ARTIFACT_EXTENSIONS:
+                artifacts.append(file_path)
+            elif os.name != 'nt' and os.access(file_path, os.X_OK):
+                artifacts.append(file_path)
+    return artifacts
+
+def scan_segment(path, start, end, patterns):
+    """Search bytes start to end of the file at path for patterns (a tuple of bytes).
+
+    Matches that start before end are counted, even if they run past it.
+    Returns {pattern: [count, first offset]}.
+    """
+    found = {}
+    with open(path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if not size or start >= size:
+            return found
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            matcher = re.compile(b'|'.join(re.escape(pattern) for pattern in sorted(patterns, key=len, reverse=True)))
+            reach = min(size, end + max(len(pattern) for pattern in patterns) - 1)
+            for match in matcher.finditer(view, start, reach):
+                if match.start() >= end:
+                    break
+                hit = found.setdefault(match.group(), [0, match.start()])
+                hit[0] += 1
+    return found
+
+def segments(path, segment_size=SEGMENT_SIZE):
+    """Return the (start, end) ranges a file is scanned in."""
+    size = os.path.getsize(path)
+    return [(start, min(size, start + segment_size)) for start in range(0, max(size, 1), segment_size)]
+
+def verify_brands(brands, jobs=None, segment_size=SEGMENT_SIZE, source=None):
+    """Scan the artifacts of every brand. Returns a report per brand, in order.
+
+    brands is a list of (name, profile, artifact paths). source names the
+    build's version resource (see RESOURCE_SOURCES); None guesses it from
+    each brand's paths (see resource_source). A report is a dict with
+    'name', 'artifacts' ([{'path', 'size', 'found': {label: count},
+    'leftovers': [(label, encoding, count, first offset)]}]), 'missing'
+    (labels of expected strings found nowhere) and 'ok'.
+    """
+    sources = [source or resource_source(paths) for _, _, paths in brands]
+    tasks = []
+    for (name, profile, paths), brand_source in zip(brands, sources):
+        patterns = tuple(needles(profile, brand_source))
+        for path in paths:
+            tasks.extend((path, start, end, patterns) for start, end in segments(path, segment_size))
+
+    workers = min(jobs or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        outcomes = [scan_segment(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(scan_segment, *zip(*tasks)))
+
+    merged = {}  # (path, patterns) -> {pattern: [count, first offset]}
+    for (path, _, _, patterns), found in zip(tasks, outcomes):
+        totals = merged.setdefault((path, patterns), {})
+        for pattern, (count, offset) in found.items():
+            total = totals.setdefault(pattern, [0, offset])
+            total[0] += count
+            total[1] = min(total[1], offset)
+
+    reports = []
+    for (name, profile, paths), brand_source in zip(brands, sources):
+        table = needles(profile, brand_source)
+        patterns = tuple(table)
+        has_pe = any(os.path.splitext(path)[1].lower() in PE_EXTENSIONS for path in paths)
+        seen = set()
+        artifacts = []
+        for path in paths:
+            pe = os.path.splitext(path)[1].lower() in PE_EXTENSIONS
+            found = {}
+            leftovers = []
+            for pattern, (count, offset) in sorted(merged.get((path, patterns), {}).items(), key=lambda item: item[1][1]):
+                for kind, label, encoding in table[pattern]:
+                    if kind == 'leftover':
+                        leftovers.append((label, encoding, count, offset))
+                    else:
+                        found[label] = found.get(label, 0) + count
+                        seen.add((label, pe))
+            artifacts.append({'path': path, 'size': os.path.getsize(path), 'found': found, 'leftovers': leftovers})
+        # Without a PE file there is no version resource to find
+        missing = [label for label, _, _, pe_only in expected_strings(profile, brand_source)
+                   if (has_pe or not pe_only) and (label, True) not in seen and (pe_only or (label, False) not in seen)]
+        ok = not missing and not any(artifact['leftovers'] for artifact in artifacts)
+        reports.append({'name': name, 'artifacts': artifacts, 'missing': missing, 'ok': ok})
+    return reports
+
+def print_reports(reports, elapsed=None):
+    """Print what every brand's artifacts contain, and what is missing or left over."""
+    for report in reports:
+        for artifact in report['artifacts']:
+            found = ", ".join(f"{label} x{count}" for label, count in sorted(artifact['found'].items())) or "no branding"
+            print(f"[{report['name']}] {artifact['path']} ({artifact['size'] / (1 << 20):.1f} MiB): {found}")
+            for label, encoding, count, offset in artifact['leftovers']:
+                print(f"  leftover {label} ({encoding}) x{count}, first at 0x{offset:x}")
+        if report['missing']:
+            print(f"[{report['name']}] missing from every artifact: {', '.join(report['missing'])}")
+        if not report['artifacts']:
+            print(f"[{report['name']}] no artifacts found")
+    total = sum(artifact['size'] for report in reports for artifact in report['artifacts'])
+    failed = [report['name'] for report in reports if not report['ok'] or not report['artifacts']]
+    summary = f"Verified {len(reports)} brands, {total / (1 << 20):.1f} MiB of artifacts"
+    if elapsed is not None:
+        summary += f" in {elapsed:.2f}s"
+    print(summary + (f"; FAILED: {', '.join(failed)}" if failed else "; all branded"))
+
+def verify(brands, jobs=None, source=None):
+    """Scan and report the artifacts of brands (see verify_brands). Returns True if every brand passed."""
+    started = time.perf_counter()
+    reports = verify_brands(brands, jobs, source=source)
+    print_reports(reports, time.perf_counter() - started)
+    return all(report['ok'] and report['artifacts'] for report in reports)
@@ -0,0 +1,197 @@
+"""Watch mode: re-apply the branding whenever something overwrites a branded file.
+
+A `git pull` or a code generator regularly rewrites config.rs, Cargo.toml or
+the Dart models and silently drops the branding. watch() brands the tree
+once, then monitors every file of the patch table and the icons: through
+inotify on Linux (on the parent directories, so files replaced by rename
+are seen too), by polling their stat otherwise. Bursts of changes are
+debounced; then only the affected files are re-patched and committed (see
+overlay.py). The profile, the filled patches, the rendered icons and the
+manifest stay in memory, and the TOML and anchor caches stay warm, so a
+re-apply takes a few milliseconds. Our own writes leave the files current
+in the manifest and are ignored.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+from .engine import apply_patches
+from .icons import ICON_FILES, get_icons, icon_key
+from .overlay import commit, discard, new_overlay, write_file
+from .patches import build_patches
+from .pipeline import brand_profile, normalize_inputs
+from .state import inputs_key, is_current, load_state, make_entry, refresh_entries, save_state
+
+DEBOUNCE = 0.2  # seconds without new changes before re-applying
+POLL_INTERVAL = 0.5  # seconds between stat polls when inotify is unavailable
+
+# inotify(7) event bits
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_IGNORED = 0x8000
+IN_Q_OVERFLOW = 0x4000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+def inotify_watcher(paths):
+    """Start an inotify watcher on the directories of paths. Returns it, or None where inotify is unavailable."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    watcher = {'libc': libc, 'fd': fd, 'watches': {}, 'paths': set(paths)}
+    add_watches(watcher)
+    return watcher
+
+def add_watches(watcher):
+    """Watch every existing directory of the watched paths that is not watched yet."""
+    watched = set(watcher['watches'].values())
+    for directory in sorted({os.path.dirname(path) for path in watcher['paths']} - watched):
+        if os.path.isdir(directory):
+            wd = watcher['libc'].inotify_add_watch(watcher['fd'], os.fsencode(directory), WATCH_MASK)
+            if wd >= 0:
+                watcher['watches'][wd] = directory
+
+def read_inotify(watcher, timeout):
+    """Wait up to timeout seconds for events. Returns the set of watched paths they touched."""
+    changed = set()
+    readable, _, _ = select.select([watcher['fd']], [], [], timeout)
+    if not readable:
+        return changed
+    try:
+        buffer = os.read(watcher['fd'], 64 * 1024)
+    except BlockingIOError:
+        return changed
+    offset = 0
+    while offset + EVENT_HEADER.size <= len(buffer):
+        wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+        name = buffer[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+        offset += EVENT_HEADER.size + length
+        directory = watcher['watches'].get(wd)
+        if mask & IN_Q_OVERFLOW:
+            changed.update(watcher['paths'])  # Events were lost; check everything
+        elif mask & IN_IGNORED:
+            watcher['watches'].pop(wd, None)  # Directory removed; its files are rechecked below
+            changed.update(path for path in watcher['paths'] if os.path.dirname(path) == directory)
+        elif directory is not None:
+            path = os.path.join(directory, os.fsdecode(name))
+            if path in watcher['paths']:
+                changed.add(path)
+    add_watches(watcher)
+    return changed
+
+def close_watcher(watcher):
+    """Stop an inotify watcher."""
+    os.close(watcher['fd'])
+
+def stat_snapshot(paths):
+    """Return {path: (mtime, size, inode) or None if missing}."""
+    snapshot = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+            snapshot[path] = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except FileNotFoundError:
+            snapshot[path] = None
+    return snapshot
+
+def poll_changes(paths, snapshot, timeout):
+    """Sleep up to timeout seconds, then return the paths whose stat differs from snapshot (updated in place)."""
+    time.sleep(timeout)
+    current = stat_snapshot(paths)
+    changed = {path for path in paths if current[path] != snapshot.get(path)}
+    snapshot.update(current)
+    return changed
+
+def watch(source_dir, app_name, pub_key, rendezvous_server, icon_png, executable_name=None, description=None,
+          jobs=None, debounce=DEBOUNCE, poll_interval=POLL_INTERVAL, polling=False, stop=None):
+    """Brand source_dir, then keep re-applying the branding to files that change until stopped.
+
+    Arguments are as for pipeline.rebrand(). polling forces stat polling
+    instead of inotify. stop, if given, is a threading.Event that ends the
+    watch; otherwise it runs until interrupted (Ctrl+C).
+    """
+    app_name, pub_key, rendezvous_server = normalize_inputs(source_dir, app_name, pub_key, rendezvous_server, icon_png)
+
+    key = icon_key(icon_png)
+    icons = get_icons(icon_png, key)
+    profile = brand_profile(app_name, pub_key, rendezvous_server, icons, executable_name, description)
+    patches = build_patches(profile)
+    state = load_state(source_dir)
+
+    # Native path -> (relative path, manifest key) for every file the watch keeps branded
+    targets = {os.path.join(source_dir, relative_path): (relative_path.replace(os.sep, '/'), inputs_key(edits))
+               for relative_path, edits in patches.items()}
+    targets.update({os.path.join(source_dir, *name.split('/')): (name, key) for name in ICON_FILES})
+
+    def reapply(paths):
+        """Re-brand the paths that are no longer current. Returns how many files were written."""
+        stale = {path for path in paths if not is_current(state['files'].get(targets[path][0]), path, targets[path][1])}
+        if not stale:
+            return 0
+        overlay = new_overlay()
+        for path in sorted(stale):
+            name = targets[path][0]
+            if name in ICON_FILES:
+                write_file(overlay, path, icons[name])
+                state['files'][name] = make_entry(path, key, icons[name], staged=True)
+        affected = {relative_path: edits for relative_path, edits in patches.items()
+                    if os.path.join(source_dir, relative_path) in stale}
+        try:
+            apply_patches(source_dir, affected, jobs=jobs, state=state, overlay=overlay)
+        except BaseException:
+            discard(overlay)
+            raise
+        written = commit(overlay)
+        refresh_entries(source_dir, state)
+        state['profile'] = inputs_key(profile)
+        save_state(source_dir, state)
+        return len(written)
+
+    started = time.perf_counter()
+    written = reapply(set(targets))
+    print(f"Branded {written} files in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    watcher = None if polling else inotify_watcher(targets)
+    snapshot = stat_snapshot(targets) if watcher is None else None
+    print(f"Watching {len(targets)} files in {source_dir} ({'inotify' if watcher else 'polling'}); Ctrl+C to stop")
+    try:
+        while not (stop and stop.is_set()):
+            if watcher:
+                changed = read_inotify(watcher, poll_interval)
+            else:
+                changed = poll_changes(targets, snapshot, poll_interval)
+            if not changed:
+                continue
+            # Debounce: wait until the burst is over
+            while True:
+                more = read_inotify(watcher, debounce) if watcher else poll_changes(targets, snapshot, debounce)
+                if not more:
+                    break
+                changed |= more
+            started = time.perf_counter()
+            written = reapply(changed)
+            if written:
+                names = ', '.join(sorted(targets[path][0] for path in changed))
+                print(f"Re-applied branding to {written} files in {(time.perf_counter() - started) * 1000:.0f} ms ({names})")
+            if snapshot is not None:
+                snapshot.update(stat_snapshot(targets))  # Do not report our own writes next time
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if watcher:
+            close_watcher(watcher)
+    print("Stopped watching")
@@ -0,0 +1,50 @@
+"""Shared fixtures: a private download/icon cache and a small RustDesk-like source tree to rebrand."""
+
+import os
+
+import pytest
+from PIL import Image
+
+CLIENT_RS = '''fn connect() {
+    if !key.is_empty() && !token.is_empty() {
+        secure_tcp(key, token);
+    }
+    run();
+}
+'''
+
+CONFIG_RS = '''lazy_static! {
+    pub static ref APP_NAME: RwLock<String> = RwLock::new("RustDesk".to_owned());
+}
+pub const PUBLIC_RS_PUB_KEY: &str = "OeVuKk5nlHiXp+APNn0Y3pC1Iwpwn44JGqrQCsWqmBw=";
+'''
+
+CARGO_TOML = '''[package]
+name = "rustdesk"
+version = "1.2.3"
+
+[package.metadata.winres]
+ProductName = "RustDesk"
+FileDescription = "RustDesk Remote Desktop"
+'''
+
+@pytest.fixture(autouse=True)
+def rebrand_cache(tmp_path_factory, monkeypatch):
+    """Point the download and icon cache at a fresh directory, away from the user's own."""
+    directory = str(tmp_path_factory.mktemp('cache'))
+    monkeypatch.setenv('REBRAND_CACHE_DIR', directory)
+    return directory
+
+@pytest.fixture
+def source_tree(tmp_path):
+    """Return (tree, icon): a tree with a few files the patch table edits, and a PNG icon outside it."""
+    tree = tmp_path / 'rustdesk'
+    for relative_path, text in (('src/client.rs', CLIENT_RS), ('libs/hbb_common/src/config.rs', CONFIG_RS),
+                                ('Cargo.toml', CARGO_TOML)):
+        path = tree.joinpath(*relative_path.split('/'))
+        os.makedirs(path.parent, exist_ok=True)
+        path.write_bytes(text.encode('utf-8'))
+    os.makedirs(tree / 'res')
+    icon = tmp_path / 'icon.png'
+    Image.new('RGBA', (64, 64), (200, 30, 30, 255)).save(icon)
+    return tree, str(icon)
@@ -0,0 +1,154 @@
+"""Download cache tests against a local http.server stand-in for the sciter.dll host."""
+
+import hashlib
+import http.server
+import os
+import threading
+
+import pytest
+
+from rebrand import downloads
+from rebrand.downloads import DownloadError, fetch, partial_path
+
+BODY = os.urandom(200_000)
+ETAG = '"v1"'
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """Serves BODY with an ETag, honouring If-None-Match, Range and If-Range."""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        start = 0
+        requested = self.headers.get('Range')
+        if requested and self.headers.get('If-Range') in (None, ETAG):
+            start = int(requested.split('=')[1].rstrip('-'))
+            if start >= len(BODY):
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(BODY)}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(BODY) - 1}/{len(BODY)}')
+        else:
+            self.send_response(200)
+        body = BODY[start:]
+        self.send_header('ETag', ETAG)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if server.drop_after is not None:
+            # Announce the whole body but hang up half way
+            self.wfile.write(body[:server.drop_after])
+            server.drop_after = None
+            self.wfile.flush()
+            self.connection.shutdown(2)
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.requests = []
+    httpd.drop_after = None
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = f'http://127.0.0.1:{httpd.server_address[1]}/sciter.dll'
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(downloads.time, 'sleep', lambda seconds: None)
+
+def read(path):
+    with open(path, 'rb') as file:
+        return file.read()
+
+def test_download_then_revalidate(server, tmp_path):
+    cache = str(tmp_path / 'cache')
+    destination = str(tmp_path / 'sciter.dll')
+    outcome, cached = fetch(server.url, destination, cache=cache)
+    assert outcome == 'downloaded'
+    assert read(destination) == BODY == read(cached)
+
+    os.unlink(destination)
+    outcome, _ = fetch(server.url, destination, cache=cache)
+    assert outcome == 'revalidated'
+    assert server.requests[-1]['If-None-Match'] == ETAG
+    assert read(destination) == BODY
+
+def test_dropped_transfer_resumes(server, tmp_path):
+    cache = str(tmp_path / 'cache')
+    server.drop_after = 3 * downloads.CHUNK_SIZE  # The first chunks reach the partial file before the drop
+    outcome, cached = fetch(server.url, cache=cache, log=lambda message: None)
+    assert outcome == 'resumed'
+    assert read(cached) == BODY
+    assert server.requests[-1]['Range'] not in (None, 'bytes=0-')
+    assert server.requests[-1]['If-Range'] == ETAG
+    assert not os.path.exists(partial_path(cache, server.url))
+
+def test_offline_serves_the_cache_only(server, tmp_path):
+    cache = str(tmp_path / 'cache')
+    with pytest.raises(DownloadError):
+        fetch(server.url, offline=True, cache=cache)
+    assert not server.requests
+
+    fetch(server.url, cache=cache)
+    count = len(server.requests)
+    destination = str(tmp_path / 'sciter.dll')
+    assert fetch(server.url, destination, offline=True, cache=cache)[0] == 'cached'
+    assert len(server.requests) == count
+    assert read(destination) == BODY
+
+def test_pinned_checksum(server, tmp_path):
+    cache = str(tmp_path / 'cache')
+    with pytest.raises(DownloadError, match='Checksum mismatch'):
+        fetch(server.url, expected_sha256='0' * 64, cache=cache)
+    assert not os.path.exists(partial_path(cache, server.url))
+    assert not os.path.exists(partial_path(cache, server.url) + '.json')
+
+    outcome, cached = fetch(server.url, expected_sha256=hashlib.sha256(BODY).hexdigest().upper(), cache=cache)
+    assert outcome == 'downloaded'
+    assert read(cached) == BODY
+
+def write_partial(cache, url, data, sidecar):
+    partial = partial_path(cache, url)
+    os.makedirs(os.path.dirname(partial), exist_ok=True)
+    with open(partial, 'wb') as file:
+        file.write(data)
+    if sidecar is not None:
+        with open(partial + '.json', 'w', encoding='utf-8') as file:
+            file.write(sidecar)
+    return partial
+
+def test_complete_partial_answered_with_416_starts_over(server, tmp_path):
+    cache = str(tmp_path / 'cache')
+    partial = write_partial(cache, server.url, BODY, '{"validator": "\\"v1\\""}')  # Size not recorded
+    outcome, cached = fetch(server.url, cache=cache)
+    assert outcome == 'downloaded'
+    assert read(cached) == BODY
+    assert [request.get('Range') for request in server.requests] == [f'bytes={len(BODY)}-', None]
+    assert not os.path.exists(partial) and not os.path.exists(partial + '.json')
+
+def test_complete_partial_of_known_size_is_not_resumed(server, tmp_path):
+    cache = str(tmp_path / 'cache')
+    write_partial(cache, server.url, BODY, '{"validator": "\\"v1\\"", "size": %d}' % len(BODY))
+    assert fetch(server.url, cache=cache)[0] == 'downloaded'
+    assert len(server.requests) == 1 and 'Range' not in server.requests[0]
+
+def test_partial_without_validator_is_not_resumed(server, tmp_path):
+    cache = str(tmp_path / 'cache')
+    write_partial(cache, server.url, BODY[:1000], None)
+    outcome, cached = fetch(server.url, cache=cache)
+    assert outcome == 'downloaded'
+    assert read(cached) == BODY
+    assert 'Range' not in server.requests[0]
@@ -0,0 +1,75 @@
+"""Overlay commit and re-run tests: a failed commit leaves the tree as it was, a repeated rebrand changes nothing."""
+
+import os
+
+import pytest
+
+from rebrand import overlay as overlay_module
+from rebrand.engine import plan_edits, split_lines
+from rebrand.overlay import commit, new_overlay, write_file
+from rebrand.patches import REBRAND_PATCHES
+from rebrand.pipeline import rebrand
+
+def leftovers(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(('.tmp', '.bak')))
+
+def test_failed_commit_restores_the_originals(tmp_path, monkeypatch):
+    paths = [str(tmp_path / name) for name in ('a.rs', 'b.rs', 'c.rs')]
+    for path in paths[:2]:
+        with open(path, 'wb') as file:
+            file.write(b'original ' + os.path.basename(path).encode())
+    overlay = new_overlay()
+    for path in paths:
+        write_file(overlay, path, b'branded')
+
+    renames = []
+    real_replace = os.replace
+    def failing_replace(source, destination):
+        renames.append(destination)
+        if len(renames) == 3:
+            raise OSError("disk full")
+        real_replace(source, destination)
+    monkeypatch.setattr(overlay_module.os, 'replace', failing_replace)
+
+    with pytest.raises(OSError, match="disk full"):
+        commit(overlay)
+    monkeypatch.undo()
+    assert renames[:3] == paths
+    for path in paths[:2]:
+        with open(path, 'rb') as file:
+            assert file.read() == b'original ' + os.path.basename(path).encode()
+    assert not os.path.exists(paths[2])
+    assert leftovers(tmp_path) == []
+
+def test_commit_writes_every_staged_file(tmp_path):
+    overlay = new_overlay()
+    path = str(tmp_path / 'a.rs')
+    write_file(overlay, path, b'branded')
+    assert commit(overlay) == [path]
+    with open(path, 'rb') as file:
+        assert file.read() == b'branded'
+    assert leftovers(tmp_path) == [] and overlay['files'] == {}
+
+def test_plan_edits_on_its_own_output_changes_nothing(source_tree):
+    tree, _ = source_tree
+    edits = REBRAND_PATCHES['src/client.rs']
+    lines = split_lines((tree / 'src' / 'client.rs').read_text())
+    changes, hits, _ = plan_edits(lines.__getitem__, len(lines), edits, range(len(lines)))
+    assert hits == [1] and changes
+    branded = []
+    for i, line in enumerate(lines):
+        branded.extend(changes.get(i, [line]))
+    changes, hits, stale = plan_edits(branded.__getitem__, len(branded), edits, range(len(branded)))
+    assert changes == {} and hits == [1] and stale == []
+
+def test_forced_rerun_does_not_nest_comments(source_tree):
+    tree, icon = source_tree
+    client_rs = tree / 'src' / 'client.rs'
+    outputs = []
+    for _ in range(2):
+        rebrand(str(tree), 'MyApp', 'k' * 44, 'rs.example.com', icon,
+                download_sciter=False, inline_sciter=False, force=True)
+        outputs.append(client_rs.read_text())
+    assert outputs[0] == outputs[1]
+    assert outputs[0].count('/*') == 1 and outputs[0].count('*/') == 1
+    assert leftovers(tree / 'src') == []
@@ -0,0 +1,38 @@
+"""Patch plan tests: applying a compiled plan gives the tree a direct rebrand gives."""
+
+import shutil
+
+import pytest
+
+from rebrand.pipeline import rebrand
+from rebrand.plan import apply_plan, compile_plan, load_plan, save_plan
+from rebrand.state import STATE_FILE
+
+BRAND = ('MyApp', 'k' * 44, 'rs.example.com')
+
+def tree_bytes(tree):
+    return {path.relative_to(tree).as_posix(): path.read_bytes()
+            for path in sorted(tree.rglob('*')) if path.is_file() and path.name != STATE_FILE}
+
+def test_applied_plan_matches_a_rebrand_run(source_tree, tmp_path):
+    tree, icon = source_tree
+    planned = tmp_path / 'planned'
+    shutil.copytree(tree, planned)
+    pristine = tree_bytes(tree)
+
+    plan_path = str(tmp_path / 'plan.json')
+    save_plan(plan_path, compile_plan(str(tree), *BRAND, icon))
+    assert tree_bytes(tree) == pristine
+    assert apply_plan(load_plan(plan_path), str(planned)) > 0
+
+    rebrand(str(tree), *BRAND, icon, download_sciter=False, inline_sciter=False)
+    assert tree_bytes(planned) == tree_bytes(tree)
+    assert tree_bytes(tree) != pristine
+    assert apply_plan(load_plan(plan_path), str(planned)) == 0
+
+def test_plan_refuses_a_tree_it_was_not_compiled_for(source_tree, tmp_path):
+    tree, icon = source_tree
+    plan = compile_plan(str(tree), *BRAND, icon)
+    (tree / 'src' / 'client.rs').write_text('fn main() {}\n')
+    with pytest.raises(ValueError, match='src/client.rs'):
+        apply_plan(plan, str(tree))
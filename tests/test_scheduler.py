@@ -0,0 +1,78 @@
+"""Build scheduler tests with stub build commands standing in for cargo."""
+
+import os
+import sys
+import time
+
+from rebrand.scheduler import schedule_builds
+
+def python(code):
+    """Return a (name, command, shell) step running code with this interpreter."""
+    return ('python', [sys.executable, '-c', code], False)
+
+def make_trees(tmp_path, names):
+    trees = {}
+    for name in names:
+        trees[name] = str(tmp_path / name)
+        os.makedirs(trees[name])
+    return trees
+
+def test_builds_run_concurrently_and_keep_their_order(tmp_path):
+    trees = make_trees(tmp_path, ['a', 'b', 'c'])
+    builds = [(name, tree, [python('import time; time.sleep(1)')]) for name, tree in trees.items()]
+    started = time.monotonic()
+    summaries = schedule_builds(builds, str(tmp_path / 'logs'), concurrency=3)
+    assert time.monotonic() - started < 2.5
+    assert [summary['name'] for summary in summaries] == ['a', 'b', 'c']
+    assert all(summary['returncode'] == 0 and summary['failed_step'] is None for summary in summaries)
+
+def test_concurrency_limits_parallel_builds(tmp_path):
+    trees = make_trees(tmp_path, ['a', 'b'])
+    marker = str(tmp_path / 'running')
+    # Each build fails if another one is running at the same time
+    code = (f"import os, time; fd = os.open({marker!r}, os.O_CREAT | os.O_EXCL); time.sleep(0.3); "
+            f"os.close(fd); os.unlink({marker!r})")
+    summaries = schedule_builds([(name, tree, [python(code)]) for name, tree in trees.items()],
+                                str(tmp_path / 'logs'), concurrency=1)
+    assert [summary['returncode'] for summary in summaries] == [0, 0]
+
+def test_failing_step_stops_the_build_and_is_logged(tmp_path):
+    trees = make_trees(tmp_path, ['ok', 'broken'])
+    builds = [
+        ('ok', trees['ok'], [python("print('built')")]),
+        ('broken', trees['broken'], [python("import sys; print('oops', file=sys.stderr); sys.exit(3)"),
+                                     python("open('ran', 'w').close()")]),
+    ]
+    ok, broken = schedule_builds(builds, str(tmp_path / 'logs'), concurrency=2)
+    assert ok['returncode'] == 0
+    with open(ok['log'], encoding='utf-8') as file:
+        assert 'built' in file.read()
+
+    assert broken['returncode'] == 3
+    assert broken['failed_step'] == 'python'
+    assert len(broken['steps']) == 1
+    assert not os.path.exists(os.path.join(trees['broken'], 'ran'))
+    with open(broken['log'], encoding='utf-8') as file:
+        log = file.read()
+    assert 'oops' in log and 'exit status 3' in log
+
+def test_builds_run_in_their_tree_with_cargo_jobs_set(tmp_path, monkeypatch):
+    monkeypatch.delenv('CARGO_BUILD_JOBS', raising=False)
+    trees = make_trees(tmp_path, ['a'])
+    code = "import os; open('jobs.txt', 'w').write(os.environ['CARGO_BUILD_JOBS'])"
+    summary, = schedule_builds([('a', trees['a'], [python(code)])], str(tmp_path / 'logs'), concurrency=1)
+    assert summary['returncode'] == 0
+    with open(os.path.join(trees['a'], 'jobs.txt'), encoding='utf-8') as file:
+        assert int(file.read()) == max(1, os.cpu_count() or 1)
+
+def test_timeout_stops_a_hung_build(tmp_path):
+    trees = make_trees(tmp_path, ['hung'])
+    started = time.monotonic()
+    summary, = schedule_builds([('hung', trees['hung'], [python('import time; time.sleep(60)')])],
+                               str(tmp_path / 'logs'), concurrency=1, timeout=0.5)
+    assert time.monotonic() - started < 10
+    assert summary['returncode'] != 0
+    assert summary['steps'][-1]['timed_out']
+
+def test_no_builds(tmp_path):
+    assert schedule_builds([], str(tmp_path / 'logs')) == []
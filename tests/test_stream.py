@@ -0,0 +1,63 @@
+"""Streaming rewrite tests: chunked anchor scans and spliced output against the in-memory path."""
+
+import io
+
+import pytest
+
+from rebrand import engine
+from rebrand.anchors import anchor_patterns, scan_anchors
+from rebrand.stream import longest_marker, stream_anchors
+
+EDITS = [
+    {'op': 'replace_line', 'find': 'const APP_NAME: &str', 'line': 'const APP_NAME: &str = "MyApp";'},
+    {'op': 'replace_line', 'find': '// rendezvous', 'offset': 1, 'expect': 'RENDEZVOUS',
+     'line': 'pub const RENDEZVOUS_SERVERS: &[&str] = &["rs.example.com"];'},
+    {'op': 'comment_block', 'start': 'fn check_update(', 'line': '/*'},
+]
+
+def source(filler=40, long_line=0):
+    """Return a Rust-ish source with every marker of EDITS, padded so markers land at awkward offsets."""
+    parts = ['\ufeff// generated\n']
+    for n in range(3):
+        parts.append('x' * (filler + n) + '\n')
+        parts.append('const APP_NAME: &str = "RustDesk";\r\n')
+        parts.append('// rendezvous\npub const RENDEZVOUS_SERVERS: &[&str] = &["rs-ny.rustdesk.com"];\n')
+        parts.append('y' * long_line + 'fn check_update(x: u8) {\n    let _ = x;\n}\n')
+    return ''.join(parts).encode('utf-8')
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 7, 12, 19, 20, 21, 22, 64, 4096])
+@pytest.mark.parametrize('long_line', [0, 50])
+def test_stream_anchors_match_a_whole_file_scan(chunk_size, long_line):
+    data = source(long_line=long_line)
+    patterns = anchor_patterns(EDITS)
+    expected = scan_anchors(data, patterns)
+    assert expected
+    assert stream_anchors(io.BytesIO(data), patterns, longest_marker(EDITS), chunk_size) == expected
+
+@pytest.mark.parametrize('filler', range(0, 24, 3))
+def test_markers_straddling_chunks_are_found(filler):
+    data = source(filler)
+    patterns = anchor_patterns(EDITS)
+    overlap = longest_marker(EDITS)
+    for chunk_size in (overlap - 1, overlap, overlap + 1):
+        assert stream_anchors(io.BytesIO(data), patterns, overlap, chunk_size) == scan_anchors(data, patterns)
+
+def rewrite(tmp_path, name, data, threshold, monkeypatch):
+    path = tmp_path / name
+    path.write_bytes(data)
+    monkeypatch.setattr(engine, 'STREAM_THRESHOLD', threshold)
+    hits, _, anchors = engine.rewrite_file(str(path), EDITS, log=lambda message: None)
+    return path.read_bytes(), hits, anchors
+
+@pytest.mark.parametrize('long_line', [0, 5000])
+def test_streamed_rewrite_matches_the_in_memory_rewrite(tmp_path, monkeypatch, long_line):
+    data = source(long_line=long_line)
+    in_memory = rewrite(tmp_path, 'memory.rs', data, len(data) + 1, monkeypatch)
+    streamed = rewrite(tmp_path, 'streamed.rs', data, 0, monkeypatch)
+    assert streamed == in_memory
+    assert in_memory[0] != data
+    assert list(tmp_path.glob('.*.tmp')) == []
+
+def test_streamed_rewrite_is_idempotent(tmp_path, monkeypatch):
+    once = rewrite(tmp_path, 'streamed.rs', source(), 0, monkeypatch)[0]
+    assert rewrite(tmp_path, 'streamed.rs', once, 0, monkeypatch)[0] == once
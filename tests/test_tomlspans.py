@@ -0,0 +1,87 @@
+"""Cargo.toml splicing tests: every edited document must still parse, with only the edited keys changed."""
+
+import tomllib
+
+from rebrand.tomlspans import BOM_BYTES, set_toml_keys
+
+def toml_set(section, key, value):
+    return {'op': 'toml_set', 'section': section, 'key': key, 'line': f'{key} = {value}'}
+
+def load(data):
+    text = data.decode('utf-8')
+    return tomllib.loads(text[1:] if text.startswith('\ufeff') else text)
+
+CARGO = b'''# Cargo manifest
+[package]
+name = "rustdesk" # the crate
+version = "1.2.3"
+description = """
+RustDesk "remote desktop"
+  spanning lines
+"""
+authors = [
+    "rustdesk <info@rustdesk.com>", # owner
+    "someone [else]",
+]
+
+[[bin]]
+name = "rustdesk"
+path = "src/main.rs"
+
+[package.metadata.winres]
+ProductName = "RustDesk"
+FileDescription = "RustDesk Remote Desktop"
+
+[[bin]]
+name = "naming"
+path = "src/naming.rs"
+'''
+
+def test_keys_are_spliced_and_everything_else_kept():
+    edits = [toml_set('package', 'name', '"myapp"'),
+             toml_set('package', 'description', '"My App"'),
+             toml_set('package', 'authors', '["me"]'),
+             toml_set('package.metadata.winres', 'ProductName', '"MyApp"')]
+    data, hits = set_toml_keys(CARGO, edits)
+    assert hits == [1, 1, 1, 1]
+    document = load(data)
+    assert document['package']['name'] == 'myapp'
+    assert document['package']['description'] == 'My App'
+    assert document['package']['authors'] == ['me']
+    assert document['package']['version'] == '1.2.3'
+    assert document['package']['metadata']['winres'] == {'ProductName': 'MyApp',
+                                                          'FileDescription': 'RustDesk Remote Desktop'}
+    assert [binary['name'] for binary in document['bin']] == ['rustdesk', 'naming']
+    assert b'name = "myapp" # the crate\n' in data
+    assert data.startswith(b'# Cargo manifest\n')
+
+def test_missing_key_is_added_after_the_tables_last_key():
+    data, hits = set_toml_keys(CARGO, [toml_set('package.metadata.winres', 'LegalCopyright', '"Me"'),
+                                       toml_set('package', 'license', '"MIT"')])
+    assert hits == [1, 1]
+    document = load(data)
+    assert document['package']['license'] == 'MIT'
+    assert document['package']['metadata']['winres']['LegalCopyright'] == 'Me'
+    assert data.index(b'license = "MIT"') < data.index(b'[[bin]]')
+    assert len(document['bin']) == 2 and all('license' not in binary for binary in document['bin'])
+
+def test_array_of_tables_and_missing_tables_are_not_touched():
+    data, hits = set_toml_keys(CARGO, [toml_set('bin', 'name', '"myapp"'), toml_set('dependencies', 'x', '"1"')])
+    assert hits == [0, 0]
+    assert data == CARGO
+
+def test_bom_and_crlf_are_kept():
+    original = BOM_BYTES + CARGO.replace(b'\n', b'\r\n')
+    data, hits = set_toml_keys(original, [toml_set('package', 'version', '"2.0.0"'),
+                                          toml_set('package', 'edition', '"2021"')])
+    assert hits == [1, 1]
+    assert data.startswith(BOM_BYTES)
+    assert b'\n' not in data.replace(b'\r\n', b'')
+    assert load(data)['package']['version'] == '2.0.0'
+    assert load(data)['package']['edition'] == '2021'
+    assert data.replace(b'"2.0.0"', b'"1.2.3"').replace(b'edition = "2021"\r\n', b'') == original
+
+def test_key_added_to_a_document_without_a_final_newline():
+    data, hits = set_toml_keys(b'[package]\nname = "rustdesk"', [toml_set('package', 'version', '"1.0.0"')])
+    assert hits == [1]
+    assert load(data)['package'] == {'name': 'rustdesk', 'version': '1.0.0'}
@@ -0,0 +1,74 @@
+"""Three-way merge tests for upgrade mode."""
+
+import shutil
+
+from rebrand import upgrade as upgrade_module
+from rebrand.engine import split_lines
+from rebrand.pipeline import rebrand
+from rebrand.upgrade import CONFLICT_MARKERS, merge3, upgrade
+
+BASE = '''[package]
+name = "rustdesk"
+version = "1.2.3"
+edition = "2021"
+
+[package.metadata.winres]
+ProductName = "RustDesk"
+'''
+
+def merge(base, ours, theirs):
+    merged, conflicts = merge3(split_lines(base), split_lines(ours), split_lines(theirs))
+    return ''.join(merged), conflicts
+
+def test_changes_to_different_lines_merge_cleanly():
+    ours = BASE.replace('ProductName = "RustDesk"', 'ProductName = "MyApp"')
+    theirs = BASE.replace('edition = "2021"', 'edition = "2024"')
+    merged, conflicts = merge(BASE, ours, theirs)
+    assert conflicts == 0
+    assert merged == ours.replace('edition = "2021"', 'edition = "2024"')
+
+def test_branding_edit_on_top_of_an_upstream_change_to_the_next_line():
+    ours = BASE.replace('name = "rustdesk"', 'name = "myapp"')
+    theirs = BASE.replace('version = "1.2.3"', 'version = "1.3.0"').replace('edition = "2021"\n', 'edition = "2021"\nauthors = []\n')
+    merged, conflicts = merge(BASE, ours, theirs)
+    assert conflicts == 0
+    assert merged == theirs.replace('name = "rustdesk"', 'name = "myapp"')
+
+def test_identical_changes_are_not_a_conflict():
+    ours = theirs = BASE.replace('version = "1.2.3"', 'version = "1.3.0"')
+    assert merge(BASE, ours, theirs) == (theirs, 0)
+
+def test_both_sides_changing_a_line_is_a_conflict():
+    ours = BASE.replace('ProductName = "RustDesk"', 'ProductName = "MyApp"')
+    theirs = BASE.replace('ProductName = "RustDesk"', 'ProductName = "RustDesk Remote"')
+    merged, conflicts = merge(BASE, ours, theirs)
+    assert conflicts == 1
+    block = merged[merged.index(CONFLICT_MARKERS[0]):]
+    assert block == ''.join(f'{marker}\n{line}' for marker, line in zip(
+        CONFLICT_MARKERS, ('ProductName = "MyApp"\n', 'ProductName = "RustDesk"\n', 'ProductName = "RustDesk Remote"\n', '')))
+    assert merged.startswith(BASE[:BASE.index('ProductName')])
+
+def test_conflict_markers_follow_crlf_line_endings():
+    base = BASE.replace('\n', '\r\n')
+    merged, conflicts = merge(base, base.replace('"RustDesk"\r\n', '"MyApp"\r\n'),
+                              base.replace('"RustDesk"\r\n', '"Other"\r\n'))
+    assert conflicts == 1
+    assert '\n' not in merged.replace('\r\n', '')
+
+def test_upgrade_of_plain_directories_reads_no_unchanged_file(source_tree, tmp_path, monkeypatch):
+    old, icon = source_tree
+    branded, new = tmp_path / 'branded', tmp_path / 'new'
+    shutil.copytree(old, branded)
+    shutil.copytree(old, new)  # Keeps the mtimes, as unpacking a release archive does
+    rebrand(str(branded), 'MyApp', 'k' * 44, 'rs.example.com', icon, download_sciter=False, inline_sciter=False)
+    client_rs = new / 'src' / 'client.rs'
+    client_rs.write_text(client_rs.read_text() + 'fn upstream() {}\n')
+
+    hashed = []
+    monkeypatch.setattr(upgrade_module, 'blob_id', lambda data: hashed.append(data) or str(len(hashed)))
+    output = tmp_path / 'output'
+    assert upgrade(str(old), str(branded), str(new), str(output)) == {}
+    assert hashed == []
+    assert (output / 'Cargo.toml').read_bytes() == (branded / 'Cargo.toml').read_bytes()
+    merged = (output / 'src' / 'client.rs').read_text()
+    assert merged.startswith((branded / 'src' / 'client.rs').read_text()) and merged.endswith('fn upstream() {}\n')
@@ -0,0 +1,101 @@
+"""Artifact verification tests on synthetic binaries from rebrand.fixture.fake_binary."""
+
+import os
+
+import pytest
+
+from rebrand.fixture import fake_binary, upstream_binary_strings
+from rebrand.verify import find_artifacts, resource_source, verify_brands
+
+PROFILE = {'app_name': 'My App', 'pub_key': 'KEY', 'rendezvous_server': 'srv.example.com', 'description': 'Remote'}
+BRANDING = [b'My App', 'My App'.encode('utf-16le'), b'KEY', b'srv.example.com']
+FLUTTER_RESOURCE = [text.encode('utf-16le') for text in ('1.0.0.0', 'my app', 'my app.exe')]
+CARGO_RESOURCE = [text.encode('utf-16le') for text in ('my app.exe', 'Remote')]
+
+def binary(tmp_path, relative_path, strings, size=200_000):
+    path = str(tmp_path.joinpath(*relative_path.split('/')))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fake_binary(path, size, strings)
+    return path
+
+def report_for(paths, **kwargs):
+    report, = verify_brands([('brand', PROFILE, paths)], jobs=1, **kwargs)
+    return report
+
+def test_branded_cargo_exe_passes(tmp_path):
+    path = binary(tmp_path, 'target/release/myapp.exe', BRANDING + CARGO_RESOURCE)
+    report = report_for([path])
+    assert report['ok'], report
+    assert report['artifacts'][0]['found']['FileDescription'] == 1
+
+def test_branded_flutter_exe_passes(tmp_path):
+    path = binary(tmp_path, 'flutter/build/windows/runner/Release/myapp.exe', BRANDING + FLUTTER_RESOURCE)
+    assert resource_source([path]) == 'flutter'
+    assert report_for([path])['ok']
+
+def test_flutter_exe_without_its_version_resource_fails(tmp_path):
+    path = binary(tmp_path, 'flutter/build/myapp.exe', BRANDING + CARGO_RESOURCE)
+    report = report_for([path])
+    assert not report['ok']
+    assert set(report['missing']) == {'FileVersion', 'ProductVersion', 'InternalName'}
+
+def test_non_pe_build_does_not_need_a_version_resource(tmp_path):
+    path = binary(tmp_path, 'target/release/myapp', BRANDING)
+    assert report_for([path])['ok']
+    assert report_for([path], source='flutter')['ok']
+
+def test_missing_branding_is_reported(tmp_path):
+    path = binary(tmp_path, 'target/release/myapp', BRANDING[:2])
+    report = report_for([path])
+    assert not report['ok']
+    assert report['missing'] == ['public key', 'rendezvous server']
+
+def test_upstream_defaults_are_leftovers(tmp_path):
+    path = binary(tmp_path, 'target/release/rustdesk.exe', BRANDING + CARGO_RESOURCE + upstream_binary_strings())
+    report = report_for([path])
+    assert not report['ok']
+    leftovers = {label for label, _, _, _ in report['artifacts'][0]['leftovers']}
+    assert leftovers == {'upstream public key', 'upstream rendezvous server', 'upstream product name',
+                         'upstream executable name'}
+
+def test_strings_across_segment_boundaries_are_found_once(tmp_path):
+    path = binary(tmp_path, 'target/release/myapp.exe', BRANDING + CARGO_RESOURCE, size=1_000_000)
+    whole = report_for([path])
+    for segment_size in (4096, 65_537, 333_333):
+        split = report_for([path], segment_size=segment_size)
+        assert split['artifacts'][0]['found'] == whole['artifacts'][0]['found']
+        assert split['ok']
+
+def test_process_pool_matches_sequential_scan(tmp_path):
+    paths = [binary(tmp_path, f'target/release/part{n}.dll', BRANDING + CARGO_RESOURCE, size=300_000) for n in range(3)]
+    sequential, = verify_brands([('brand', PROFILE, paths)], jobs=1, segment_size=100_000)
+    pooled, = verify_brands([('brand', PROFILE, paths)], jobs=2, segment_size=100_000)
+    assert pooled == sequential
+
+def test_find_artifacts(tmp_path):
+    release = tmp_path / 'target' / 'release'
+    exe = binary(tmp_path, 'target/release/myapp.exe', [])
+    binary(tmp_path, 'target/release/build.log', [])
+    tool = binary(tmp_path, 'target/release/myapp', [])
+    os.chmod(tool, 0o755)
+    assert find_artifacts([str(release)]) == sorted([tool, exe])
+    with pytest.raises(ValueError):
+        find_artifacts([str(release / 'missing.exe')])
+
+def test_find_artifacts_on_windows_goes_by_extension(tmp_path, monkeypatch):
+    release = tmp_path / 'target' / 'release'
+    wanted = [binary(tmp_path, f'target/release/{name}', []) for name in ('myapp.exe', 'sciter.dll')]
+    for name in ('myapp.pdb', 'myapp.d', 'librustdesk.rlib', 'myapp.lib', 'myapp.exp', 'myapp'):
+        os.chmod(binary(tmp_path, f'target/release/{name}', []), 0o755)
+    monkeypatch.setattr(os, 'name', 'nt')
+    found = find_artifacts([str(release)])
+    monkeypatch.undo()
+    assert found == sorted(wanted)
+
+def test_resource_source_ignores_where_the_checkout_lives(tmp_path):
+    tree = tmp_path / 'flutter' / 'rustdesk'
+    path = binary(tree, 'target/release/myapp.exe', [])
+    assert resource_source([path]) == 'cargo'
+    assert resource_source([path], str(tree)) == 'cargo'
+    flutter = binary(tree, 'flutter/build/windows/runner/Release/myapp.exe', [])
+    assert resource_source([flutter], str(tree)) == 'flutter'